@@ -0,0 +1,98 @@
+"""Benchmark the short-term overheating horizon table against the previous
+per-dwelling loop implementation.
+
+Run from the repository root:
+    python scripts/benchmark_overheating_df.py --dwellings 10000
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+root = Path(__file__).parent.parent
+sys.path.insert(0, str(root / "src"))
+os.environ.setdefault("AREA_TYPE", "Dwelling")
+
+from utils import common_functions, loader, schema  # noqa: E402
+
+
+def legacy_get_overheating_df(overheating_hours: pd.DataFrame) -> pd.DataFrame:
+  """The per-dwelling, per-horizon loop used before the vectorized version."""
+  overheating_dict: dict[str, dict[str, float]] = {}
+  intervals: list[float] = [1, 7, 14, 30, 60, 90, 180]
+  list_areas: list[int] = overheating_hours[
+      schema.ShortTermForecastData.AREA_ID].unique()
+  for area_id in list_areas:
+    filt = overheating_hours[schema.ShortTermForecastData.AREA_ID] == area_id
+    temp_dataf: pd.DataFrame = overheating_hours[filt].sort_index()
+    start_date = temp_dataf.index[0]
+    end_date = temp_dataf.index[-1]
+    cumsum_overheating_hours = temp_dataf[
+        schema.ShortTermForecastData.OVERHEATING_FLAG].cumsum()
+    temp_dict: dict[str, float] = {}
+    for i in intervals:
+      time_horizon = start_date + pd.Timedelta(days=i)
+      if time_horizon > end_date:
+        temp_dict[f'Next {i} day(s)'] = np.nan
+      else:
+        temp_dict[f'Next {i} day(s)'] = cumsum_overheating_hours[
+            cumsum_overheating_hours.index < time_horizon].values[-1]
+    overheating_dict[common_functions.get_area_str(area_id)] = temp_dict
+  return pd.DataFrame.from_dict(overheating_dict, orient='index')
+
+
+def make_overheating_hours(nb_dwellings: int, nb_hours: int,
+                           seed: int) -> pd.DataFrame:
+  """Create random hourly overheating flags for a fleet of dwellings."""
+  rng = np.random.default_rng(seed)
+  index = pd.date_range('2021-05-01', periods=nb_hours, freq='h', tz='UTC')
+  return pd.DataFrame(
+      {
+          schema.ShortTermForecastData.OVERHEATING_FLAG:
+          rng.integers(0, 2, nb_dwellings * nb_hours),
+          schema.ShortTermForecastData.AREA_ID:
+          np.repeat(np.arange(nb_dwellings), nb_hours),
+      },
+      index=np.tile(index, nb_dwellings))
+
+
+def time_call(func, *args) -> tuple[float, pd.DataFrame]:
+  """Return the wall time in seconds and the result of a call."""
+  start = time.perf_counter()
+  result = func(*args)
+  return time.perf_counter() - start, result
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__)
+  parser.add_argument('--dwellings', type=int, default=10000)
+  parser.add_argument('--hours', type=int, default=24 * 153)
+  parser.add_argument(
+      '--legacy-dwellings',
+      type=int,
+      default=100,
+      help='Fleet size for the legacy loop, which scales quadratically.')
+  parser.add_argument('--seed', type=int, default=0)
+  args = parser.parse_args()
+
+  overheating_hours = make_overheating_hours(args.dwellings, args.hours,
+                                             args.seed)
+  vectorized_time, _ = time_call(loader.get_overheating_df, overheating_hours)
+  print(f'vectorized: {args.dwellings} dwellings in {vectorized_time:.3f} s')
+
+  sample = overheating_hours[overheating_hours[
+      schema.ShortTermForecastData.AREA_ID] < args.legacy_dwellings]
+  legacy_time, expected = time_call(legacy_get_overheating_df, sample)
+  sample_time, result = time_call(loader.get_overheating_df, sample)
+  result.index = common_functions.get_list_area_str(result.index)
+  pd.testing.assert_frame_equal(result, expected)
+  print(f'legacy: {args.legacy_dwellings} dwellings in {legacy_time:.3f} s, '
+        f'vectorized: {sample_time:.3f} s (identical tables)')
+
+
+if __name__ == '__main__':
+  main()
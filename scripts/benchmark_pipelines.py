@@ -0,0 +1,354 @@
+"""Benchmark the loader and page pipelines on synthetic fleets of dwellings.
+
+Every fleet duplicates the dwelling of the simulation data. On each fleet the
+loader functions and the figures of the pages are timed, then the process-wide
+data store is replaced by a store of the fleet and every server-side callback
+is requested through the Dash test client, as the browser would. The
+timings and payload sizes are written to a JSON file; given the file of an
+earlier run, the stages that got slower are reported and the exit status is
+non-zero.
+
+Run from the repository root:
+    python scripts/benchmark_pipelines.py --fleets 3 100 1000 10000
+"""
+import argparse
+import base64
+import dataclasses
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+import pandas as pd
+from dotenv import load_dotenv
+
+root = Path(__file__).parent.parent
+sys.path.insert(0, str(root / "src"))
+
+import app as dash_app  # noqa: E402
+from components import ids  # noqa: E402
+from pages import longterm_page, shortterm_page, validation_page  # noqa: E402
+from utils import common_functions, data_store, enums  # noqa: E402
+from utils import loader, row_model, schema  # noqa: E402
+
+ROWS_REQUEST = {
+    'startRow': 0,
+    'endRow': row_model.BLOCK_SIZE,
+    'sortModel': [],
+    'filterModel': {}
+}
+
+
+class Recorder:
+  """Times the stages of the benchmark and keeps the results."""
+
+  def __init__(self, repeat: int) -> None:
+    self.repeat = repeat
+    self.results: list[dict[str, Any]] = []
+
+  def time(self, fleet: int, stage: str, func: Callable[..., Any], *args):
+    """Calls a function `repeat` times and records the fastest call, and the
+    size of the result if it is bytes."""
+    best = float('inf')
+    for _ in range(self.repeat):
+      start = time.perf_counter()
+      result = func(*args)
+      best = min(best, time.perf_counter() - start)
+    record = {'fleet': fleet, 'stage': stage, 'seconds': best}
+    if isinstance(result, bytes):
+      record['bytes'] = len(result)
+    self.results.append(record)
+    print(
+        f'{fleet:>6} dwellings  {stage:<45} {best:8.3f} s'
+        f'{"  " + str(record["bytes"]) + " B" if "bytes" in record else ""}',
+        flush=True)
+    return result
+
+
+def make_longterm_data(area_ids: list[int]) -> pd.DataFrame:
+  """Create the long term data of a fleet from May to September, as streamed
+  by the loader, from the dwelling of the simulation data."""
+  dataf = loader.load_simulation_data()[[
+      schema.LongTermForecastData.PREDICTED_IAT
+  ]]
+  dataf = dataf[(dataf.index.month >= 5) & (dataf.index.month <= 9)]
+  dataf = loader.duplicates_dummy_forecasted_data(dataf, area_ids)
+  dataf.index.name = schema.LongTermForecastData.DATETIME
+  return dataf
+
+
+def make_store(fleet: int, simulation: pd.DataFrame, forecast: pd.DataFrame,
+               hours: pd.DataFrame) -> data_store.DataStore:
+  """Create a store serving a fleet, the other datasets being built from it
+  as in the app. The datasets are versioned by the fleet size, so the tables
+  cached for another fleet are not served."""
+  specs = dict(data_store.DATASET_SPECS)
+  for dataset, frame in ((enums.Dataset.SIMULATION, simulation),
+                         (enums.Dataset.SHORT_TERM_FORECAST, forecast),
+                         (enums.Dataset.LONG_TERM_OVERHEATING_HOURS, hours)):
+    specs[dataset] = dataclasses.replace(specs[dataset],
+                                         build=lambda frame=frame: frame,
+                                         sources=(),
+                                         source_version=lambda: str(fleet))
+  return data_store.DataStore(specs)
+
+
+def post_callback(client,
+                  headers: dict[str, str],
+                  outputs: list[tuple[str, str]],
+                  inputs: list[tuple[str, str, Any]],
+                  state: list[tuple[str, str, Any]] | None = None) -> bytes:
+  """Request a callback as the browser does and return the response."""
+  if len(outputs) == 1:
+    output = f'{outputs[0][0]}.{outputs[0][1]}'
+  else:
+    output = '..' + '...'.join(f'{id_}.{prop}' for id_, prop in outputs) + '..'
+  body = {
+      'output':
+      output,
+      'outputs': [{
+          'id': id_,
+          'property': prop
+      } for id_, prop in outputs] if len(outputs) > 1 else {
+          'id': outputs[0][0],
+          'property': outputs[0][1]
+      },
+      'inputs': [{
+          'id': id_,
+          'property': prop,
+          'value': value
+      } for id_, prop, value in inputs],
+      'state': [{
+          'id': id_,
+          'property': prop,
+          'value': value
+      } for id_, prop, value in state or []],
+      'changedPropIds': [f'{inputs[0][0]}.{inputs[0][1]}'],
+  }
+  response = client.post('/_dash-update-component', json=body, headers=headers)
+  if response.status_code != 200:
+    raise RuntimeError(f'{output}: HTTP {response.status_code}')
+  return response.data
+
+
+def benchmark_loader(recorder: Recorder, fleet: int,
+                     area_ids: list[int]) -> dict[str, pd.DataFrame]:
+  """Time the loader functions on a fleet and return its datasets."""
+  simulation = recorder.time(fleet, 'get_dummy_simulation_data',
+                             loader.get_dummy_simulation_data, area_ids)
+  forecast = recorder.time(fleet, 'get_dummy_forecasted_data',
+                           loader.get_dummy_forecasted_data, area_ids)
+  overheating_hours = loader.assess_overheating_hours(
+      forecast[schema.ShortTermForecastData.PREDICTED_IAT_90]).to_frame()
+  overheating_hours[schema.ShortTermForecastData.AREA_ID] = forecast[
+      schema.ShortTermForecastData.AREA_ID]
+  recorder.time(fleet, 'get_overheating_df', loader.get_overheating_df,
+                overheating_hours)
+  longterm = make_longterm_data(area_ids)
+  percentages = recorder.time(
+      fleet, 'get_overheating_perct_per_year',
+      lambda: loader.get_overheating_perct_per_year(longterm.copy()))
+  recorder.time(fleet, 'get_overheating_table', loader.get_overheating_table,
+                percentages)
+  recorder.time(fleet, 'get_simulation_errors', loader.get_simulation_errors,
+                simulation)
+  recorder.time(fleet, 'simulate_indoor_air_temperature',
+                loader.simulate_indoor_air_temperature, simulation,
+                loader.load_weather_data())
+  recorder.time(fleet, 'get_comfort_criteria_per_year',
+                loader.get_comfort_criteria_per_year, simulation)
+  del percentages
+  return {
+      'simulation': simulation,
+      'forecast': forecast,
+      # the last use of the long term data, which is not copied
+      'hours': loader.get_overheating_hours_per_year(longterm),
+  }
+
+
+def benchmark_figures(recorder: Recorder, fleet: int) -> None:
+  """Time the figures of the pages of the first dwelling, with the size of
+  their JSON."""
+  area_id = data_store.get_area_ids(enums.Dataset.SIMULATION)[0]
+  figures = {
+      'validation_page.create_figure':
+      lambda: validation_page.create_figure(
+          data_store.get_area_frame(enums.Dataset.SIMULATION, area_id)[
+              validation_page.COLS_TO_PLOT]),
+      'shortterm_page.create_figure':
+      lambda: shortterm_page.create_figure(
+          data_store.get_area_frame(enums.Dataset.SHORT_TERM_FORECAST, area_id)
+      ),
+      'longterm_page.create_figure':
+      lambda: longterm_page.create_figure(
+          data_store.get_area_frame(enums.Dataset.LONG_TERM_OVERHEATING_PERCT,
+                                    area_id).reset_index()),
+  }
+  for stage, create_figure in figures.items():
+    recorder.time(fleet, stage, lambda: create_figure().to_json().encode())
+
+
+def benchmark_callbacks(recorder: Recorder, fleet: int, client,
+                        headers: dict[str, str]) -> None:
+  """Time every server-side callback through the Dash test client, with the
+  size of its response. The pages are rendered without the layout cache."""
+
+  def display_page(pathname: str) -> bytes:
+    dash_app.LAYOUT_CACHE.clear()
+    return post_callback(client, headers, [('page-content', 'children')],
+                         [('url', 'pathname', pathname)])
+
+  for pathname in dash_app.ROUTES:
+    recorder.time(fleet, f'display_page {pathname}', display_page, pathname)
+
+  area_id = data_store.get_area_ids(enums.Dataset.SIMULATION)[0]
+  area_str = common_functions.get_area_str(area_id)
+  for page, dataset, dropdown_id, key_id, chart_id in (
+      ('validation', enums.Dataset.SIMULATION, ids.DROPDOWN_CP,
+       ids.INTERMEDIATE_DATA_CP, ids.CHART_CP),
+      ('shortterm', enums.Dataset.SHORT_TERM_FORECAST, ids.DROPDOWN_ST,
+       ids.INTERMEDIATE_DATA_ST, ids.CHART_ST),
+  ):
+    recorder.time(fleet, f'{page}.filter_data', post_callback, client, headers,
+                  [(key_id, 'data')], [(dropdown_id, 'value', area_str)])
+    key = data_store.make_area_key(dataset, area_id)
+    recorder.time(fleet, f'{page}.update_graph', post_callback, client,
+                  headers, [(chart_id, 'figure')],
+                  [(key_id, 'data', key), (chart_id, 'relayoutData', None)])
+  recorder.time(
+      fleet, 'validation.update_errors_text', post_callback, client, headers,
+      [(ids.TEXT_CP, 'children')],
+      [(ids.INTERMEDIATE_DATA_CP, 'data',
+        data_store.make_area_key(enums.Dataset.SIMULATION, area_id))])
+
+  for page, table_id in (('validation', ids.TABLE_CP), ('shortterm',
+                                                        ids.TABLE_ST)):
+    recorder.time(fleet, f'{page}.get_table_rows', post_callback, client,
+                  headers, [(table_id, 'getRowsResponse')],
+                  [(table_id, 'getRowsRequest', ROWS_REQUEST)])
+
+  # the default threshold of the slider and another one, looked up in the
+  # hours at or above each threshold without the table cache
+  threshold = float(os.getenv('THRESHOLD_OVERHEATING_IAT'))
+  for suffix, slider_value in (('', threshold), (' at threshold',
+                                                 threshold + 1.5)):
+
+    def get_table_rows(value: float) -> bytes:
+      longterm_page.THRESHOLD_TABLE_CACHE.clear()
+      return post_callback(client, headers,
+                           [(ids.TABLE_LT, 'getRowsResponse')],
+                           [(ids.TABLE_LT, 'getRowsRequest', ROWS_REQUEST)],
+                           [(ids.SLIDER_LT, 'value', value)])
+
+    recorder.time(fleet, f'longterm.get_table_rows{suffix}', get_table_rows,
+                  slider_value)
+    recorder.time(fleet, f'longterm.update_graph{suffix}', post_callback,
+                  client, headers, [(ids.CHART_LT, 'figure')],
+                  [(ids.INTERMEDIATE_DATA_LT, 'data',
+                    data_store.make_area_key(
+                        enums.Dataset.LONG_TERM_OVERHEATING_PERCT, area_id)),
+                   (ids.SLIDER_LT, 'value', slider_value)])
+
+  recorder.time(
+      fleet, 'longterm.filter_data', post_callback, client, headers,
+      [(ids.INTERMEDIATE_DATA_LT, 'data'), (ids.SUBTITLE_LT, 'children')],
+      [(ids.TABLE_LT, 'selectedRows', [{
+          row_model.INDEX_COLUMN: area_str
+      }])])
+
+
+def compare(results: list[dict[str, Any]], baseline_path: Path,
+            tolerance: float) -> list[str]:
+  """Return the stages slower than in the baseline by more than the
+  tolerance."""
+  with open(baseline_path, encoding='utf-8') as file:
+    baseline = {
+        (record['fleet'], record['stage']): record['seconds']
+        for record in json.load(file)['results']
+    }
+  regressions = []
+  for record in results:
+    previous = baseline.get((record['fleet'], record['stage']))
+    if previous is not None and record['seconds'] > previous * (1 + tolerance):
+      regressions.append(f'{record["fleet"]} dwellings {record["stage"]}: '
+                         f'{previous:.3f} s -> {record["seconds"]:.3f} s')
+  return regressions
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__)
+  parser.add_argument('--fleets',
+                      type=int,
+                      nargs='+',
+                      default=[3, 100, 1000, 10000])
+  parser.add_argument('--repeat',
+                      type=int,
+                      default=3,
+                      help='Calls per stage, the fastest is kept.')
+  parser.add_argument('--output',
+                      type=Path,
+                      default=Path('benchmark_results.json'))
+  parser.add_argument('--baseline',
+                      type=Path,
+                      default=None,
+                      help='Results of an earlier run to compare against.')
+  parser.add_argument(
+      '--tolerance',
+      type=float,
+      default=0.2,
+      help='Relative slowdown over the baseline reported as a regression.')
+  args = parser.parse_args()
+  load_dotenv(root / '.env')
+  # the stores of the fleets are not refreshed in the background
+  os.environ['DATA_REFRESH_SECONDS'] = '0'
+
+  app = dash_app.create_app()
+  client = app.server.test_client()
+  username, password = next(
+      iter(dash_app.VALID_USERNAME_PASSWORD_PAIRS.items()))
+  headers = {
+      'Authorization':
+      'Basic ' + base64.b64encode(f'{username}:{password}'.encode()).decode()
+  }
+  client.get('/', headers=headers)
+
+  recorder = Recorder(args.repeat)
+  app_store = data_store.get_store()
+  for fleet in args.fleets:
+    area_ids = list(range(fleet))
+    datasets = benchmark_loader(recorder, fleet, area_ids)
+    data_store.set_store(
+        make_store(fleet, datasets['simulation'], datasets['forecast'],
+                   datasets['hours']))
+    del datasets
+    benchmark_figures(recorder, fleet)
+    benchmark_callbacks(recorder, fleet, client, headers)
+    data_store.set_store(app_store)
+
+  with open(args.output, 'w', encoding='utf-8') as file:
+    json.dump(
+        {
+            'date': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'repeat': args.repeat,
+            'results': recorder.results,
+        },
+        file,
+        indent=2)
+  print(f'results written to {args.output}')
+
+  if args.baseline is not None:
+    regressions = compare(recorder.results, args.baseline, args.tolerance)
+    for regression in regressions:
+      print(f'regression: {regression}')
+    if regressions:
+      sys.exit(1)
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,54 @@
+"""Calibrate the resistance and capacitance of the 1R1C thermal model of a
+batch of monitored dwellings against their measured indoor air temperature.
+
+The input is a simulation output csv file, with the outdoor air temperature,
+gains, heating output and measured indoor air temperature of every dwelling,
+default SIMULATION_DATA_PATH. The fitted parameters and the RMSE, MAE, MSE,
+bias and CV(RMSE) of the calibrated models are written to a csv file.
+
+Run from the repository root:
+    python scripts/calibrate_dwellings.py --input simulation_output.csv
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+root = Path(__file__).parent.parent
+sys.path.insert(0, str(root / "src"))
+
+from utils import loader, schema  # noqa: E402
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__)
+  parser.add_argument('--input',
+                      type=Path,
+                      default=None,
+                      help='Simulation output csv file, default '
+                      'SIMULATION_DATA_PATH.')
+  parser.add_argument('--output',
+                      type=Path,
+                      default=Path('calibrated_parameters.csv'))
+  args = parser.parse_args()
+  load_dotenv(root / '.env')
+
+  if args.input is None:
+    dataf = loader.load_simulation_data()
+  else:
+    dataf = loader.load_prepared_data_from_csv(args.input)
+  if schema.SimulationData.AREA_ID not in dataf.columns:
+    # the simulation output of a single dwelling
+    dataf[schema.SimulationData.AREA_ID] = 0
+  start = time.perf_counter()
+  parameters = loader.get_calibrated_parameters(dataf)
+  print(f'{len(parameters.index)} dwellings calibrated '
+        f'({time.perf_counter() - start:.1f} s)')
+  parameters.to_csv(args.output)
+  print(f'parameters written to {args.output}')
+
+
+if __name__ == '__main__':
+  main()
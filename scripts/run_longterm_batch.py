@@ -0,0 +1,56 @@
+"""Compute the long term overheating risk of a portfolio of dwellings across
+all cores and cache it for the dashboard.
+
+The run is resumable: shards completed by an interrupted run with the same
+source file, size and thresholds are not computed again.
+
+Run from the repository root:
+    python scripts/run_longterm_batch.py --dwellings 10000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+root = Path(__file__).parent.parent
+sys.path.insert(0, str(root / "src"))
+
+from utils import batch_runner  # noqa: E402
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__)
+  parser.add_argument('--dwellings', type=int, default=3)
+  parser.add_argument('--shard-size', type=int, default=100)
+  parser.add_argument('--workers',
+                      type=int,
+                      default=None,
+                      help='Number of processes, default the number of CPUs.')
+  parser.add_argument(
+      '--chunksize',
+      type=int,
+      default=None,
+      help='Rows read at a time, default LONG_TERM_CHUNK_SIZE.')
+  args = parser.parse_args()
+  load_dotenv(root / '.env')
+
+  start = time.perf_counter()
+
+  def report(nb_done: int, nb_shards: int):
+    print(
+        f'{nb_done}/{nb_shards} shards done '
+        f'({time.perf_counter() - start:.1f} s)',
+        flush=True)
+
+  batch_dir = batch_runner.run_batch(args.dwellings,
+                                     shard_size=args.shard_size,
+                                     max_workers=args.workers,
+                                     chunksize=args.chunksize,
+                                     progress=report)
+  print(f'results of {args.dwellings} dwellings written to {batch_dir}')
+
+
+if __name__ == '__main__':
+  main()
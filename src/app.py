@@ -1,17 +1,41 @@
+import io
+import logging
+import os
+from types import ModuleType
+from typing import Any
+
 import dash_auth
-import icecream as ic
+import flask
 from dash import Dash, Input, Output, dcc, html
+from dash.dependencies import Component
 from dash_bootstrap_components.themes import LUX
 from dotenv import load_dotenv
 
 from components import ids, sidebar
 from pages import home_page, longterm_page, shortterm_page, validation_page
+from utils import instrumentation, lazy_import, refresh_scheduler
 
 load_dotenv()
 
+data_store = lazy_import.lazy_module('utils.data_store')
+loader = lazy_import.lazy_module('utils.loader')
+
 # Example use of flask basic authentication
 VALID_USERNAME_PASSWORD_PAIRS = {'User': 'Password'}  #username:password
 
+# the page modules are imported at start-up, as Dash sends the callbacks of
+# every page to the browser when the app is loaded, and import their heavy
+# dependencies the first time their route is displayed
+ROUTES = {
+    '/validation': validation_page,
+    '/st-alerts': shortterm_page,
+    '/lt-alerts': longterm_page,
+}
+
+# the layout last rendered for each page, with the dataset versions and .env
+# parameters it was rendered from
+LAYOUT_CACHE: dict[str, tuple[tuple[Any, ...], list[Component]]] = {}
+
 CONTENT_STYLE = {
     "margin-left": "18rem",
     "margin-right": "2rem",
@@ -19,6 +43,28 @@ CONTENT_STYLE = {
 }
 
 
+def get_page_layout(app: Dash, page: ModuleType) -> list[Component]:
+  """Returns the layout of a page, rendered again only when one of the
+  datasets or .env parameters it is rendered from changed.
+
+  Args:
+      app (Dash): The dash app to add the layout to.
+      page (ModuleType): The page module, with its DATASETS and PARAMETERS.
+
+  Returns:
+      list[Component]: The layout components."""
+  key = (tuple(data_store.get_version(dataset) for dataset in page.DATASETS),
+         tuple(os.getenv(parameter) for parameter in page.PARAMETERS))
+  cached = LAYOUT_CACHE.get(page.__name__)
+  instrumentation.count_cache('layout', cached is not None
+                              and cached[0] == key)
+  if cached is not None and cached[0] == key:
+    return cached[1]
+  layout = page.create_layout(app)
+  LAYOUT_CACHE[page.__name__] = (key, layout)
+  return layout
+
+
 def create_layout(app: Dash) -> html.Div:
   """Create the callback to handle mutlipage inputs
     
@@ -30,14 +76,9 @@ def create_layout(app: Dash) -> html.Div:
 
   @app.callback(Output('page-content', 'children'), [Input('url', 'pathname')])
   def display_page(pathname: str):
-    if pathname == '/validation':
-      return validation_page.create_layout(app)
-    if pathname == '/st-alerts':
-      return shortterm_page.create_layout(app)
-    if pathname == '/lt-alerts':
-      return longterm_page.create_layout(app)
-    else:  # if redirected to unknown link
-      return home_page.create_layout(app)
+    # home page if redirected to unknown link
+    page = ROUTES.get(pathname, home_page)
+    return get_page_layout(app, page)
 
   return html.Div([
       dcc.Location(id='url', refresh='callback-nav'),
@@ -46,6 +87,73 @@ def create_layout(app: Dash) -> html.Div:
   ])
 
 
+def add_measured_data_route(app: Dash) -> None:
+  """Add the route appending new hourly measured indoor air temperatures to
+  the data store. The measured data is POSTed as a csv file, see
+  loader.load_measured_data_from_csv, and only the datasets of the measured
+  areas are updated. A file without the required columns, with unparseable
+  datetimes or values or with unknown Area_IDs is rejected with a 400 error.
+
+  Args:
+      app (Dash): The dash app to add the route to."""
+
+  @app.server.route('/measured-data', methods=['POST'])
+  def append_measured_data():
+    try:
+      measured = loader.load_measured_data_from_csv(
+          io.StringIO(flask.request.get_data(as_text=True)))
+      area_ids = data_store.append_measured_data(measured)
+    except ValueError as error:
+      return flask.jsonify({'error': str(error)}), 400
+    return flask.jsonify({'rows': len(measured.index), 'areas': area_ids})
+
+
+def get_callback(app: Dash,
+                 request: flask.Request) -> tuple[str | None, str | None]:
+  """Returns the name and output of the callback run by a request, if any.
+
+  Args:
+      app (Dash): The dash app.
+      request (flask.Request): The request.
+
+  Returns:
+      tuple[str | None, str | None]: The name and output of the callback, None when the request does not run one."""
+  if not request.path.endswith('_dash-update-component'):
+    return None, None
+  body = request.get_json(silent=True) or {}
+  output = body.get('output')
+  function = app.callback_map.get(output, {}).get('callback')
+  return getattr(function, '__name__', None), output
+
+
+def add_instrumentation(app: Dash) -> None:
+  """Measure every request of the server and add the /metrics route serving
+  the wall time, rows and payload of the callbacks, the loader stages and the
+  cache hits and misses in the Prometheus text format, see instrumentation.
+
+  Args:
+      app (Dash): The dash app to instrument."""
+
+  @app.server.before_request
+  def start_request():
+    flask.g.request_trace = instrumentation.start_request()
+
+  @app.server.after_request
+  def end_request(response: flask.Response) -> flask.Response:
+    trace = flask.g.pop('request_trace', None)
+    if trace is not None:
+      callback, output = get_callback(app, flask.request)
+      instrumentation.end_request(trace, callback or flask.request.path,
+                                  callback, output,
+                                  response.calculate_content_length() or 0)
+    return response
+
+  @app.server.route('/metrics')
+  def metrics():
+    return flask.Response(instrumentation.render_metrics(),
+                          content_type=instrumentation.CONTENT_TYPE)
+
+
 def create_app() -> Dash:
   """Create the dash app
     
@@ -55,12 +163,16 @@ def create_app() -> Dash:
   auth = dash_auth.BasicAuth(app, VALID_USERNAME_PASSWORD_PAIRS)
   app.title = 'Thermal comfort analysis'
   app.layout = create_layout(app)
+  add_measured_data_route(app)
+  add_instrumentation(app)
+  refresh_scheduler.start_refresh_scheduler()
 
   return app
 
 
 def main():
   """Main function to run the app."""
+  logging.basicConfig(level=logging.INFO)
   app = create_app()
   app.run_server(port=8070)
   # port = int(os.environ.get("PORT", 5000))
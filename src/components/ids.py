@@ -8,6 +8,7 @@ INTERMEDIATE_METADATA_CP = 'intermediate-metadata'
 CHART_CP = 'comparison-chart'
 TEXT_CP = 'text-comparison'
 DROPDOWN_SELECTION_CP = 'dropdown-text-comparison'
+TABLE_CP = 'table-comparison'
 
 #Short term forecast page
 DROPDOWN_ST = 'dropdown-shortterm'
@@ -22,3 +23,5 @@ CHART_LT = 'longterm-chart'
 INTERMEDIATE_DATA_LT = 'intermediate-data-longterm'
 TABLE_LT = 'table-longterm'
 SUBTITLE_LT = 'subtitle-longterm'
+SLIDER_LT = 'slider-longterm'
+THRESHOLD_TEXT_LT = 'threshold-text-longterm'
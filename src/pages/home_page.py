@@ -3,6 +3,10 @@ from dash.dependencies import Component
 
 from . import paragraph_text
 
+# the datasets and .env parameters the layout is rendered from
+DATASETS = ()
+PARAMETERS = ()
+
 
 def create_layout(app: Dash) -> list[Component]:
   """ Create the layout for the home page.
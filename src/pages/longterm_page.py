@@ -1,19 +1,37 @@
+from __future__ import annotations
+
 import os
 from typing import Any
 
-import dash_ag_grid as dag
 import dash_bootstrap_components as dbc
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from dash import Dash, Input, Output, callback, dcc, html
+from dash import (Dash, Input, Output, State, callback, clientside_callback,
+                  dcc, html, no_update)
 from dash.dependencies import Component
 
 from components import ids
-from utils import common_functions, loader, schema
+from utils import common_functions, enums, instrumentation, lazy_import, schema
 
 from . import paragraph_text
 
+dag = lazy_import.lazy_module('dash_ag_grid')
+pd = lazy_import.lazy_module('pandas')
+px = lazy_import.lazy_module('plotly.express')
+go = lazy_import.lazy_module('plotly.graph_objects')
+data_store = lazy_import.lazy_module('utils.data_store')
+loader = lazy_import.lazy_module('utils.loader')
+row_model = lazy_import.lazy_module('utils.row_model')
+
+# the datasets and .env parameters the layout is rendered from
+DATASETS = (enums.Dataset.LONG_TERM_OVERHEATING_TABLE,
+            enums.Dataset.LONG_TERM_OVERHEATING_PERCT)
+PARAMETERS = ('AREA_TYPE', 'HIGH_RISK_THRESHOLD', 'MEDIAN_RISK_THRESHOLD',
+              'THRESHOLD_OVERHEATING_IAT', 'THRESHOLD_OVERHEATING_IAT_MIN',
+              'THRESHOLD_OVERHEATING_IAT_MAX')
+
+# the risk table of each threshold chosen with the slider, with the dataset
+# version and .env parameters it was computed from
+THRESHOLD_TABLE_CACHE: dict[str, tuple[tuple[Any, ...], pd.DataFrame]] = {}
+
 
 def create_layout(app: Dash) -> list[Component]:
   """ Creates longterm page layout and loads the content.
@@ -23,25 +41,22 @@ def create_layout(app: Dash) -> list[Component]:
         
     Returns:
         list[Component]: The layout components."""
-  dataf = loader.get_dummy_longterm_data()
-  percentage_per_year = loader.get_overheating_perct_per_year(dataf)
-  overheating_table = loader.get_overheating_table(percentage_per_year)
-  overheating_table.index = common_functions.get_list_area_str(
-      overheating_table.index)
-  percentage_per_year = percentage_per_year.reset_index()
-  default_area_id = percentage_per_year[
-      schema.LongTermForecastOutputs.AREA_ID].unique()[0]
+  overheating_table = row_model.get_display_frame(
+      enums.Dataset.LONG_TERM_OVERHEATING_TABLE)
+  default_area_id = data_store.get_area_ids(
+      enums.Dataset.LONG_TERM_OVERHEATING_PERCT)[0]
   default_area_str = common_functions.get_area_str(default_area_id)
   default_table = create_table(overheating_table)
 
-  filt = (percentage_per_year[schema.LongTermForecastOutputs.AREA_ID] ==
-          default_area_id)
-  to_plot_df = percentage_per_year[filt]
+  to_plot_df = data_store.get_area_frame(
+      enums.Dataset.LONG_TERM_OVERHEATING_PERCT,
+      default_area_id).reset_index()
   default_fig = create_figure(to_plot_df)
   return [
       html.H1('Forecasted indoor air temperature - long term alert'),
       html.Hr(),
       html.Div(paragraph_text.LT_INTROTEXT),
+      create_slider(),
       dbc.Col(default_table, className="py-4"),
       html.
       H2(id=ids.SUBTITLE_LT,
@@ -101,8 +116,88 @@ def create_figure(dataf: pd.DataFrame) -> go.Figure:
   return fig
 
 
+def create_slider() -> html.Div:
+  """ Create the slider choosing the indoor air temperature threshold of the
+    overheating hours, from THRESHOLD_OVERHEATING_IAT_MIN to
+    THRESHOLD_OVERHEATING_IAT_MAX, THRESHOLD_OVERHEATING_IAT by default.
+
+  Returns:
+      html.Div: The slider and its text."""
+  thresholds = loader.get_iat_thresholds()
+  threshold = float(os.getenv('THRESHOLD_OVERHEATING_IAT'))
+  marks = {int(x): f'{int(x)}\u00B0C' for x in thresholds if x == int(x)}
+  return html.Div([
+      html.Div(get_threshold_text(threshold), id=ids.THRESHOLD_TEXT_LT),
+      dcc.Slider(thresholds[0],
+                 thresholds[-1],
+                 step=1 / loader.IAT_THRESHOLDS_PER_DEGREE,
+                 value=threshold,
+                 marks=marks,
+                 tooltip={'placement': 'bottom'},
+                 id=ids.SLIDER_LT),
+  ])
+
+
+def get_threshold_text(threshold: float) -> str:
+  """ Create the text of the indoor air temperature threshold.
+
+  Args:
+      threshold (float): The threshold [degreeC].
+
+  Returns:
+      str: The threshold text."""
+  return f'Hours with an indoor air temperature of {threshold:.1f}\u00B0C or more are overheating hours.'
+
+
+def is_default_threshold(threshold: float | None) -> bool:
+  """ Whether a threshold of the slider is THRESHOLD_OVERHEATING_IAT, the
+    threshold of the datasets of the data store.
+
+  Args:
+      threshold (float | None): The threshold [degreeC].
+
+  Returns:
+      bool: True if the datasets hold the results of the threshold."""
+  return threshold is None or loader.get_threshold_label(
+      threshold) == loader.get_threshold_label(
+          float(os.getenv('THRESHOLD_OVERHEATING_IAT')))
+
+
+def get_threshold_table(threshold: float) -> pd.DataFrame:
+  """ Returns the risk table of a threshold of the slider, looked up in the
+    hours at or above each threshold counted per dwelling and year, and
+    computed again only when they or the .env parameters of the table changed.
+
+  Args:
+      threshold (float): The threshold [degreeC].
+
+  Returns:
+      pd.DataFrame: The risk table, see row_model.to_display_frame."""
+  if is_default_threshold(threshold):
+    return row_model.get_display_frame(
+        enums.Dataset.LONG_TERM_OVERHEATING_TABLE)
+  label = loader.get_threshold_label(threshold)
+  key = (data_store.get_version(enums.Dataset.LONG_TERM_OVERHEATING_HOURS),
+         os.getenv('THRESHOLD_OVERHEATING_PERCENTAGE'),
+         os.getenv('THRESHOLD_NIGHT_OVERHEATING_PERCENTAGE'))
+  cached = THRESHOLD_TABLE_CACHE.get(label)
+  instrumentation.count_cache('threshold_table', cached is not None
+                              and cached[0] == key)
+  if cached is not None and cached[0] == key:
+    return cached[1]
+  hours = loader.get_overheating_hours_at_threshold(
+      data_store.get_frame(enums.Dataset.LONG_TERM_OVERHEATING_HOURS),
+      threshold)
+  table = row_model.to_display_frame(
+      loader.get_overheating_table(
+          loader.get_overheating_perct_from_hours(hours)))
+  THRESHOLD_TABLE_CACHE[label] = (key, table)
+  return table
+
+
 def create_table(dataf: pd.DataFrame) -> dag.AgGrid:
-  """ Create a dash ag-grid table with the given dataframe. 
+  """ Create a dash ag-grid table with the columns of the given dataframe.
+    The rows are requested by the grid block by block, see get_table_rows.
   
   Args:
       dataf (pd.DataFrame): The dataframe to be visualised.
@@ -111,7 +206,6 @@ def create_table(dataf: pd.DataFrame) -> dag.AgGrid:
       dag.AgGrid: The dash ag-grid table."""
   high_risk_threshold = float(os.getenv('HIGH_RISK_THRESHOLD'))
   medium_risk_threshold = float(os.getenv('MEDIAN_RISK_THRESHOLD'))
-  dataf = dataf.reset_index().fillna('NaN')
   cell_styles = {
       'textAlign':
       'center',
@@ -138,9 +232,15 @@ def create_table(dataf: pd.DataFrame) -> dag.AgGrid:
       ],
   }
   columnDefs = [{
-      'field': x,
-      'headerName': x.capitalize(),
-      'cellStyle': cell_styles,
+      'field':
+      x,
+      'headerName':
+      x.capitalize(),
+      'cellStyle':
+      cell_styles,
+      'filter':
+      'agTextColumnFilter'
+      if x == row_model.INDEX_COLUMN else 'agNumberColumnFilter',
   } for x in dataf.columns]
   defaultColDef = {
       "sortable": True,
@@ -150,56 +250,95 @@ def create_table(dataf: pd.DataFrame) -> dag.AgGrid:
       columnDefs=columnDefs,
       columnSize="responsiveSizeToFit",
       className="ag-theme-alpine-dark",
-      rowData=dataf.to_dict("records"),
+      rowModelType="infinite",
+      getRowId=f"params.data.{row_model.INDEX_COLUMN}",
       defaultColDef=defaultColDef,
       dashGridOptions={
-          "domLayout": "autoHeight",
           "rowSelection": "single",
+          "cacheBlockSize": row_model.BLOCK_SIZE,
       },
-      style={"height": "100%"},
+      style=row_model.get_grid_style(len(dataf.index)),
   )
   return table
 
 
+@callback(Output(ids.TABLE_LT, 'getRowsResponse'),
+          Input(ids.TABLE_LT, 'getRowsRequest'), State(ids.SLIDER_LT, 'value'))
+def get_table_rows(request: dict[str, Any] | None,
+                   threshold: float | None) -> dict[str, Any]:
+  """ Send the block of rows requested by the table, filtered and sorted on
+    the server, for the threshold of the slider.
+
+  Args:
+      request (dict[str, Any] | None): The rows requested by the table.
+      threshold (float | None): The threshold of the slider.
+
+  Returns:
+      dict[str, Any]: The requested rows and the number of filtered rows."""
+  if request is None:
+    return no_update
+  return row_model.get_frame_rows(get_threshold_table(threshold), request)
+
+
+# Update the threshold text in the browser and drop the rows of the table, so
+# it requests them again for the new threshold.
+clientside_callback(f"""
+    function(threshold) {{
+        dash_ag_grid.getApiAsync('{ids.TABLE_LT}').then(
+            (api) => api.purgeInfiniteCache()).catch(() => {{}});
+        return `Hours with an indoor air temperature of ${{threshold.toFixed(1)}}\u00B0C or more are overheating hours.`;
+    }}
+    """,
+                    Output(ids.THRESHOLD_TEXT_LT, 'children'),
+                    Input(ids.SLIDER_LT, 'value'),
+                    prevent_initial_call=True)
+
+
 @callback(Output(ids.INTERMEDIATE_DATA_LT, 'data'),
           Output(ids.SUBTITLE_LT, 'children'),
           Input(ids.TABLE_LT, "selectedRows"))
-def filter_data(selected) -> tuple[dict[str, dict[str, Any]], str]:
+def filter_data(selected) -> tuple[data_store.AreaKey, str]:
   """ Filter the data based on the selected area and update the subtitle.
+    Only the key of the data is stored, the data stays in the server-side
+    data store.
 
   Args:
       selected (list[dict[str, Any]]): The selected area.
 
   Returns:
-      tuple[dict[str, dict[str, Any]], str]: The filtered data and the new subtitle."""
+      tuple[data_store.AreaKey, str]: The key of the filtered data and the new subtitle."""
 
-  dataf = loader.get_dummy_longterm_data()
-  percentage_per_year = loader.get_overheating_perct_per_year(dataf)
-  percentage_per_year = percentage_per_year.reset_index()
   if selected:
     area_str = selected[0]['index']
     area_id = common_functions.get_area_id(area_str)
   else:
-    area_id = percentage_per_year[
-        schema.LongTermForecastOutputs.AREA_ID].unique()[0]
+    area_id = data_store.get_area_ids(
+        enums.Dataset.LONG_TERM_OVERHEATING_PERCT)[0]
     area_str = common_functions.get_area_str(area_id)
-  filt = (
-      percentage_per_year[schema.LongTermForecastOutputs.AREA_ID] == area_id)
-  return {
-      "data-frame": percentage_per_year[filt].reset_index().to_dict("records")
-  }, f'Visualisation of the forecasted indoor air temperature of {area_str}.'
+  return data_store.make_area_key(
+      enums.Dataset.LONG_TERM_OVERHEATING_PERCT, area_id
+  ), f'Visualisation of the forecasted indoor air temperature of {area_str}.'
 
 
 @callback(Output(ids.CHART_LT, 'figure'),
-          Input(ids.INTERMEDIATE_DATA_LT, 'data'))
-def update_graph(c_store: Any) -> go.Figure:
-  """ Update the graph based on the selected area.
+          Input(ids.INTERMEDIATE_DATA_LT, 'data'),
+          Input(ids.SLIDER_LT, 'value'))
+def update_graph(c_store: data_store.AreaKey,
+                 threshold: float | None) -> go.Figure:
+  """ Update the graph based on the selected area and the threshold of the
+    slider.
 
   Args:
-      c_store (Any): The data stored in the store.
+      c_store (data_store.AreaKey): The key stored in the store.
+      threshold (float | None): The threshold of the slider.
   
   Returns:
       go.Figure: The updated graph."""
-  dff = pd.DataFrame(c_store["data-frame"])
-  dff = dff.set_index('index')
-  return create_figure(dff)
+  if is_default_threshold(threshold):
+    dff = data_store.get_area_frame_from_key(c_store)
+  else:
+    hours = data_store.get_area_frame(
+        enums.Dataset.LONG_TERM_OVERHEATING_HOURS, c_store['area_id'])
+    dff = loader.get_overheating_perct_from_hours(
+        loader.get_overheating_hours_at_threshold(hours, threshold))
+  return create_figure(dff.reset_index())
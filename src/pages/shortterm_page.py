@@ -1,18 +1,27 @@
+from __future__ import annotations
+
 import os
-from datetime import datetime
 from typing import Any
 
-import dash_ag_grid as dag
 import dash_bootstrap_components as dbc
-import icecream as ic
-import numpy as np
-import pandas as pd
-import plotly.graph_objects as go
-from dash import Dash, Input, Output, callback, dcc, html
+from dash import (Dash, Input, Output, callback, clientside_callback, dcc,
+                  html, no_update)
 from dash.dependencies import Component
 
 from components import dropdown, ids
-from utils import common_functions, loader, schema
+from utils import common_functions, enums, lazy_import, schema
+
+dag = lazy_import.lazy_module('dash_ag_grid')
+pd = lazy_import.lazy_module('pandas')
+go = lazy_import.lazy_module('plotly.graph_objects')
+data_store = lazy_import.lazy_module('utils.data_store')
+downsampling = lazy_import.lazy_module('utils.downsampling')
+row_model = lazy_import.lazy_module('utils.row_model')
+
+# the datasets and .env parameters the layout is rendered from
+DATASETS = (enums.Dataset.SHORT_TERM_FORECAST,
+            enums.Dataset.SHORT_TERM_OVERHEATING_TABLE)
+PARAMETERS = ('AREA_TYPE', 'THRESHOLD_OVERHEATING_IAT', 'MAX_PLOT_POINTS')
 
 
 def create_layout(app: Dash) -> list[Component]:
@@ -21,28 +30,18 @@ def create_layout(app: Dash) -> list[Component]:
         app (Dash): The dash app to add the layout to.
     Returns:
         list[Component]: The layout components."""
-  forecast_df = loader.get_dummy_forecasted_data()
-
-  def get_list_dwellings(dataf: pd.DataFrame) -> list[str]:
-    return common_functions.get_list_area_str(
-        dataf[schema.ShortTermForecastData.AREA_ID].unique())
-
-  list_dwellings: list[str] = get_list_dwellings(forecast_df)
+  list_dwellings: list[str] = common_functions.get_list_area_str(
+      data_store.get_area_ids(enums.Dataset.SHORT_TERM_FORECAST))
   default_dwelling_id = common_functions.get_area_id(list_dwellings[0])
   dropdown_component = dropdown.get_dropdown(app, 'Choose dwelling',
                                              list_dwellings, ids.DROPDOWN_ST)
 
-  filt = forecast_df[
-      schema.ShortTermForecastData.AREA_ID] == default_dwelling_id
-  filtered_forecast_df = forecast_df[filt]
+  filtered_forecast_df = data_store.get_area_frame(
+      enums.Dataset.SHORT_TERM_FORECAST, default_dwelling_id)
   default_fig = create_figure(filtered_forecast_df)
 
-  overheating_hours = assess_overheating_hours(
-      forecast_df[schema.ShortTermForecastData.PREDICTED_IAT_90]).to_frame()
-  overheating_hours[schema.ShortTermForecastData.AREA_ID] = forecast_df[
-      schema.ShortTermForecastData.AREA_ID]
-  overheating_df = get_overheating_df(overheating_hours)
-  default_table = create_table(overheating_df)
+  default_table = create_table(
+      row_model.get_display_frame(enums.Dataset.SHORT_TERM_OVERHEATING_TABLE))
   return [
       html.H1('Forecasted indoor air temperature - short term alert'),
       html.Hr(),
@@ -59,13 +58,13 @@ def create_layout(app: Dash) -> list[Component]:
 
 
 def create_table(dataf: pd.DataFrame) -> dag.AgGrid:
-  """ Create an ag-grid table with the given dataframe. 
+  """ Create an ag-grid table with the columns of the given dataframe. The
+    rows are requested by the grid block by block, see get_table_rows.
   Args:
       dataf (pd.DataFrame): The dataframe to be visualised.
   
   Returns:
       dag.AgGrid: The ag-grid table component."""
-  dataf = dataf.reset_index().fillna('NaN')
   cell_styles = {
       'textAlign':
       'center',
@@ -91,9 +90,15 @@ def create_table(dataf: pd.DataFrame) -> dag.AgGrid:
       ],
   }
   columnDefs = [{
-      'field': x,
-      'headerName': x.capitalize(),
-      'cellStyle': cell_styles,
+      'field':
+      x,
+      'headerName':
+      x.capitalize(),
+      'cellStyle':
+      cell_styles,
+      'filter':
+      'agTextColumnFilter'
+      if x == row_model.INDEX_COLUMN else 'agNumberColumnFilter',
   } for x in dataf.columns]
   defaultColDef = {
       "sortable": True,
@@ -102,63 +107,18 @@ def create_table(dataf: pd.DataFrame) -> dag.AgGrid:
       id=ids.TABLE_ST,
       columnDefs=columnDefs,
       className="ag-theme-alpine-dark",
-      rowData=dataf.to_dict("records"),
+      rowModelType="infinite",
+      getRowId=f"params.data.{row_model.INDEX_COLUMN}",
       defaultColDef=defaultColDef,
       dashGridOptions={
-          "domLayout": "autoHeight",
           "rowSelection": "single",
+          "cacheBlockSize": row_model.BLOCK_SIZE,
       },
-      style={"height": "100%"},
+      style=row_model.get_grid_style(len(dataf.index)),
   )
   return table
 
 
-def get_overheating_df(overheating_hours: pd.DataFrame) -> pd.DataFrame:
-  """ Create a dataframe with the number of overheating hours for each dwelling. 
-  
-  Args:
-      overheating_hours (pd.DataFrame): The dataframe with the number of overheating hours.
-      
-  Returns:
-      pd.DataFrame: The dataframe with the number of overheating hours for each dwelling."""
-  overheating_dict: dict[str, dict[str, float]] = {}
-  intervals: list[float] = [1, 7, 14, 30, 60, 90, 180]  #number of days
-  list_areas: list[int] = overheating_hours[
-      schema.ShortTermForecastData.AREA_ID].unique()
-  for area_id in list_areas:
-    filt = overheating_hours[schema.ShortTermForecastData.AREA_ID] == area_id
-    temp_dataf: pd.DataFrame = overheating_hours[filt].sort_index()
-    start_date: datetime = temp_dataf.index[0]
-    end_date: datetime = temp_dataf.index[-1]
-    cumsum_overheating_hours: pd.DataFrame = temp_dataf[
-        schema.ShortTermForecastData.OVERHEATING_FLAG].cumsum()
-    temp_dict: dict[str, float] = {}
-    for i in intervals:
-      time_horizon = start_date + pd.Timedelta(days=i)
-      if time_horizon > end_date:
-        temp_dict[f'Next {i} day(s)'] = np.nan
-      else:
-        temp_dict[f'Next {i} day(s)'] = cumsum_overheating_hours[
-            cumsum_overheating_hours.index < time_horizon].values[-1]
-    overheating_dict[common_functions.get_area_str(area_id)] = temp_dict
-  return pd.DataFrame.from_dict(overheating_dict,
-                                orient='index')  #.dropna(axis=1, how='all')
-
-
-def assess_overheating_hours(iat_values: pd.Series) -> pd.Series:
-  """ Assess the number of overheating hours based on the indoor air temperature 
-    and overheating threshold value. 
-    
-    Args:
-        iat_values (pd.Series): The indoor air temperature values.
-    
-    Returns:
-        pd.Series: The number of overheating hours."""
-  threshold_iat = float(os.getenv('THRESHOLD_OVERHEATING_IAT'))
-  return iat_values.apply(lambda x: 1 if x > threshold_iat else 0).rename(
-      schema.ShortTermForecastData.OVERHEATING_FLAG)
-
-
 def create_figure(dataf: pd.DataFrame) -> go.Figure:
   """ Create a figure with the given dataframe.
 
@@ -166,9 +126,16 @@ def create_figure(dataf: pd.DataFrame) -> go.Figure:
       dataf (pd.DataFrame): The dataframe to be visualised.
 
   Returns:
-      go.Figure: The plotly figure."""
+      go.Figure: The plotly figure, empty if the dataframe has no rows."""
 
+  if dataf.empty:
+    return go.Figure()
   threshold_iat = float(os.getenv('THRESHOLD_OVERHEATING_IAT'))
+  dataf = downsampling.downsample_frame(dataf[[
+      schema.ShortTermForecastData.PREDICTED_IAT_90,
+      schema.ShortTermForecastData.PREDICTED_IAT_10,
+      schema.ShortTermForecastData.PREDICTED_IAT_50
+  ]])
   index = dataf.index
   upper_limit = dataf[schema.ShortTermForecastData.PREDICTED_IAT_90]
   lower_limit = dataf[schema.ShortTermForecastData.PREDICTED_IAT_10]
@@ -201,13 +168,14 @@ def create_figure(dataf: pd.DataFrame) -> go.Figure:
           line_color='indigo',
           name='Lower limit'))
   fig.add_trace(
-      go.Scatter(x=index,
-                 y=[threshold_iat] * len(index),
+      go.Scatter(x=index[[0, -1]],
+                 y=[threshold_iat] * 2,
                  mode='lines',
                  line_color='red',
                  name='Indoor air temperature threshold'))
 
   fig.update_layout(title=None,
+                    uirevision='zoom',
                     yaxis_title='Temperature (°C)',
                     xaxis_title='Date',
                     margin=dict(l=0, r=0, b=0, t=0),
@@ -224,68 +192,76 @@ def create_figure(dataf: pd.DataFrame) -> go.Figure:
 
 ### Callbacks
 
-
-@callback(Output(ids.DROPDOWN_SELECTION_ST, 'children'),
-          Input(ids.DROPDOWN_ST, 'value'))
-def update_selection_text(value: str) -> str:
-  """ Update the selected dwelling text.
-  
-  Args:
-      value (str): The selected dwelling value.
-      
-  Returns:
-      str: The selected dwelling text."""
-  return f'You have selected {value}'
+# Update the selected dwelling text in the browser, without a request.
+clientside_callback(
+    """
+    function(value) {
+        return `You have selected ${value}`;
+    }
+    """, Output(ids.DROPDOWN_SELECTION_ST, 'children'),
+    Input(ids.DROPDOWN_ST, 'value'))
 
 
 @callback(Output(ids.INTERMEDIATE_DATA_ST, 'data'),
           Input(ids.DROPDOWN_ST, 'value'))
-def filter_data(value: str) -> dict[str, dict[str, Any]]:
-  """ Filter the forecasted data based on the selected dwelling.
+def filter_data(value: str) -> data_store.AreaKey:
+  """ Filter the forecasted data based on the selected dwelling. Only the key
+    of the data is stored, the data stays in the server-side data store.
 
   Args:
       value (str): The selected dwelling value.
 
   Returns:
-      dict[str, dict[str, Any]]: The filtered forecasted data."""
-  cols_to_keep = [
-      schema.ShortTermForecastData.PREDICTED_IAT_90,
-      schema.ShortTermForecastData.PREDICTED_IAT_10,
-      schema.ShortTermForecastData.PREDICTED_IAT_50
-  ]
-
+      data_store.AreaKey: The key of the filtered forecasted data."""
   dwelling_id = common_functions.get_area_id(value)
-  dataf = loader.get_dummy_forecasted_data()
-  filt = (dataf[schema.ShortTermForecastData.AREA_ID] == dwelling_id)
-  return {
-      "data-frame": dataf[filt][cols_to_keep].reset_index().to_dict("records")
-  }
+  return data_store.make_area_key(enums.Dataset.SHORT_TERM_FORECAST,
+                                  dwelling_id)
 
 
 @callback(Output(ids.CHART_ST, 'figure'),
-          Input(ids.INTERMEDIATE_DATA_ST, 'data'))
-def update_graph(c_store: Any) -> go.Figure:
-  """ Update the graph based on the selected dwelling.
+          Input(ids.INTERMEDIATE_DATA_ST, 'data'),
+          Input(ids.CHART_ST, 'relayoutData'))
+def update_graph(c_store: data_store.AreaKey,
+                 relayout_data: dict[str, Any] | None) -> go.Figure:
+  """ Update the graph based on the selected dwelling, resampling the
+    zoomed range when the graph is zoomed.
 
   Args:
-      c_store (Any): The data stored in the store.
+      c_store (data_store.AreaKey): The key stored in the store.
+      relayout_data (dict[str, Any] | None): The zoom state of the graph.
   
   Returns:
       go.Figure: The updated graph."""
-  dff = pd.DataFrame(c_store["data-frame"])
-  dff = dff.set_index('index')
+  dff = data_store.get_area_frame_from_key(c_store)
+  dff = downsampling.filter_x_range(dff,
+                                    downsampling.get_x_range(relayout_data))
   return create_figure(dff)
 
 
-@callback(Output(ids.TEXT_ST, "children"), Input(ids.TABLE_ST, "selectedRows"))
-def update_cell_selected(selected: list[dict[str, Any]]) -> str:
-  """ Update the selected cell text.
+# Update the selected cell text in the browser, without a request.
+clientside_callback(
+    """
+    function(selected) {
+        if (selected && selected.length) {
+            return `Selected cell: ${selected[0]['index']}`;
+        }
+        return 'No cell has been selected.';
+    }
+    """, Output(ids.TEXT_ST, "children"), Input(ids.TABLE_ST, "selectedRows"))
+
+
+@callback(Output(ids.TABLE_ST, 'getRowsResponse'),
+          Input(ids.TABLE_ST, 'getRowsRequest'))
+def get_table_rows(request: dict[str, Any] | None) -> dict[str, Any]:
+  """ Send the block of rows requested by the table, filtered and sorted on
+    the server.
 
   Args:
-      selected (list[dict[str, Any]]): The selected cell.
-  
+      request (dict[str, Any] | None): The rows requested by the table.
+
   Returns:
-      str: The selected cell text."""
-  if selected:
-    return f"Selected cell: {selected[0]['index']}"
-  return "No cell has been selected."
+      dict[str, Any]: The requested rows and the number of filtered rows."""
+  if request is None:
+    return no_update
+  return row_model.get_rows(enums.Dataset.SHORT_TERM_OVERHEATING_TABLE,
+                            request)
@@ -1,17 +1,34 @@
+from __future__ import annotations
+
+import os
 from typing import Any
 
-import icecream as ic
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from dash import Dash, Input, Output, callback, dcc, html
+import dash_bootstrap_components as dbc
+from dash import (Dash, Input, Output, callback, clientside_callback, dcc,
+                  html, no_update)
 from dash.dependencies import Component
 
 from components import dropdown, ids
-from utils import common_functions, loader, loss_functions, schema
+from utils import common_functions, enums, lazy_import, schema
 
 from . import paragraph_text
 
+dag = lazy_import.lazy_module('dash_ag_grid')
+pd = lazy_import.lazy_module('pandas')
+px = lazy_import.lazy_module('plotly.express')
+go = lazy_import.lazy_module('plotly.graph_objects')
+data_store = lazy_import.lazy_module('utils.data_store')
+downsampling = lazy_import.lazy_module('utils.downsampling')
+row_model = lazy_import.lazy_module('utils.row_model')
+
+# the datasets and .env parameters the layout is rendered from
+DATASETS = (enums.Dataset.SIMULATION, enums.Dataset.SIMULATION_ERRORS)
+PARAMETERS = ('AREA_TYPE', 'MAX_PLOT_POINTS')
+
+COLS_TO_PLOT = [
+    schema.SimulationData.PREDICTED_IAT, schema.SimulationData.MEASURED_IAT
+]
+
 
 def create_layout(app: Dash) -> list[Component]:
   """ Creates validation page layout and loads the content. 
@@ -21,26 +38,21 @@ def create_layout(app: Dash) -> list[Component]:
     
     Returns:
         list[Component]: The layout components."""
-  dataf = loader.get_dummy_simulation_data()
-  dataf = loader.simulation_data_prep(dataf)
-
-  def get_list_dwellings(dataf: pd.DataFrame) -> list[str]:
-    return common_functions.get_list_area_str(
-        dataf[schema.SimulationData.AREA_ID].unique())
-
-  list_dwellings: list[str] = get_list_dwellings(dataf)
+  list_dwellings: list[str] = common_functions.get_list_area_str(
+      data_store.get_area_ids(enums.Dataset.SIMULATION))
   default_dwelling_id = common_functions.get_area_id(list_dwellings[0])
-  cols_to_keep = [
-      schema.SimulationData.PREDICTED_IAT, schema.SimulationData.MEASURED_IAT
-  ]
-  filt = (dataf[schema.SimulationData.AREA_ID] == default_dwelling_id)
-  dataf = dataf[filt][cols_to_keep]
+  dataf = data_store.get_area_frame(enums.Dataset.SIMULATION,
+                                    default_dwelling_id)[COLS_TO_PLOT]
   dropdown_component = dropdown.get_dropdown(app, 'Choose dwelling',
                                              list_dwellings, ids.DROPDOWN_CP)
+  errors_table = create_table(
+      row_model.get_display_frame(enums.Dataset.SIMULATION_ERRORS))
   return [
       html.H1('Comparison of measured and simulated data'),
       html.Hr(),
       html.Div(paragraph_text.VALIDATION_TEXT),
+      html.H2('Accuracy of the models of all dwellings'),
+      dbc.Col(errors_table, className="py-4"),
       dcc.Graph(figure=create_figure(dataf), id=ids.CHART_CP),
       dropdown_component,
       html.Div(id=ids.DROPDOWN_SELECTION_CP, children=[]),
@@ -56,8 +68,10 @@ def create_figure(dataf: pd.DataFrame) -> go.Figure:
   Returns:
       go.Figure: The plotly figure.
   """
+  dataf = downsampling.downsample_frame(dataf)
   fig = px.line(dataf, x=dataf.index, y=dataf.columns)
   fig.update_layout(title=None,
+                    uirevision='zoom',
                     yaxis_title='Temperature (°C)',
                     xaxis_title='Date',
                     margin=dict(l=0, r=0, b=0, t=0),
@@ -72,6 +86,52 @@ def create_figure(dataf: pd.DataFrame) -> go.Figure:
   return fig
 
 
+def create_table(dataf: pd.DataFrame) -> dag.AgGrid:
+  """ Create an ag-grid table ranking the dwellings by the error of their
+    model, the largest RMSE first. The rows are requested by the grid block
+    by block, see get_table_rows.
+
+  Args:
+      dataf (pd.DataFrame): The errors of each dwelling.
+
+  Returns:
+      dag.AgGrid: The ag-grid table component."""
+  columnDefs = [{
+      'field': row_model.INDEX_COLUMN,
+      'headerName': os.getenv('AREA_TYPE'),
+      'filter': 'agTextColumnFilter',
+  }] + [{
+      'field': x,
+      'headerName': x,
+      'filter': 'agNumberColumnFilter',
+      'valueFormatter': {
+          'function': "d3.format('.2f')(params.value)"
+      },
+      'sort': 'desc' if x == schema.SimulationErrors.RMSE else None,
+  } for x in dataf.columns if x != row_model.INDEX_COLUMN]
+  defaultColDef = {
+      "sortable": True,
+      "cellStyle": {
+          'textAlign': 'center'
+      },
+  }
+  table = dag.AgGrid(
+      id=ids.TABLE_CP,
+      columnDefs=columnDefs,
+      columnSize="responsiveSizeToFit",
+      className="ag-theme-alpine-dark",
+      rowModelType="infinite",
+      getRowId=f"params.data.{row_model.INDEX_COLUMN}",
+      defaultColDef=defaultColDef,
+      dashGridOptions={
+          "rowSelection": "single",
+          "cacheBlockSize": row_model.BLOCK_SIZE,
+      },
+      style=row_model.get_grid_style(len(dataf.index)),
+  )
+  return table
+
+
 def generate_error_text(errors: dict[str, float]) -> str:
   """ Creates a text string to output the error values. 
   
@@ -84,90 +144,96 @@ def generate_error_text(errors: dict[str, float]) -> str:
   return f'The error between the modelled and the measured data was calculated using RMSE: {errors["RMSE"]:.2f} and MAE: {errors["MAE"]:.2f}.'
 
 
-def calculate_simulation_errors(predicted_data: pd.Series,
-                                measured_data: pd.Series) -> dict[str, float]:
-  """ Calculate the RMSE and MAE between the predicted and measured data. 
-  
-  Args:
-      predicted_data (pd.Series): The predicted data.
-      measured_data (pd.Series): The measured data.
-      
-  Returns:
-      dict[str, float]: The RMSE and MAE values."""
-  rmse = loss_functions.calculate_rmse(predicted_data, measured_data)
-  mae = loss_functions.calculate_mae(predicted_data, measured_data)
-  return {'RMSE': rmse, 'MAE': mae}
-
-
 ### Callbacks
-@callback(Output(ids.DROPDOWN_SELECTION_CP, 'children'),
-          Input(ids.DROPDOWN_CP, 'value'))
-def update_selection_text(value: str) -> str:
-  """ Update the selected dwelling text.
-
-  Args:
-      value (str): The selected dwelling value.
-  
-  Returns:
-      str: The selected dwelling text.
-  """
-  return f'You have selected {value}'
+# Update the selected dwelling text in the browser, without a request.
+clientside_callback(
+    """
+    function(value) {
+        return `You have selected ${value}`;
+    }
+    """, Output(ids.DROPDOWN_SELECTION_CP, 'children'),
+    Input(ids.DROPDOWN_CP, 'value'))
 
 
 @callback(Output(ids.INTERMEDIATE_DATA_CP, 'data'),
           Input(ids.DROPDOWN_CP, 'value'))
-def filter_data(value: str) -> dict[str, dict[str, Any]]:
-  """ Filter the simulation data based on the selected dwelling.
+def filter_data(value: str) -> data_store.AreaKey:
+  """ Filter the simulation data based on the selected dwelling. Only the key
+    of the data is stored, the data stays in the server-side data store.
 
   Args:
       value (str): The selected dwelling value.
 
   Returns:
-      dict[str, dict[str, Any]]: The filtered simulation data.
+      data_store.AreaKey: The key of the filtered simulation data.
   """
   #https://dash.plotly.com/sharing-data-between-callbacks
-  cols_to_keep = [
-      schema.SimulationData.PREDICTED_IAT, schema.SimulationData.MEASURED_IAT
-  ]
-  dataf = loader.get_dummy_simulation_data()
-  dataf = loader.simulation_data_prep(dataf)
   dwelling_id = common_functions.get_area_id(value)
-  filt = (dataf[schema.SimulationData.AREA_ID] == dwelling_id)
-  return {
-      "data-frame": dataf[filt][cols_to_keep].reset_index().to_dict("records")
-  }
+  return data_store.make_area_key(enums.Dataset.SIMULATION, dwelling_id)
 
 
 @callback(Output(ids.CHART_CP, 'figure'),
-          Input(ids.INTERMEDIATE_DATA_CP, 'data'))
-def update_graph(c_store: Any) -> go.Figure:
-  """ Update the graph based on the selected dwelling.
+          Input(ids.INTERMEDIATE_DATA_CP, 'data'),
+          Input(ids.CHART_CP, 'relayoutData'))
+def update_graph(c_store: data_store.AreaKey,
+                 relayout_data: dict[str, Any] | None) -> go.Figure:
+  """ Update the graph based on the selected dwelling, resampling the
+    zoomed range when the graph is zoomed.
 
   Args:
-      c_store (Any): The data stored in the store.
+      c_store (data_store.AreaKey): The key stored in the store.
+      relayout_data (dict[str, Any] | None): The zoom state of the graph.
   
   Returns:
       go.Figure: The updated graph.
   """
-  dff = pd.DataFrame(c_store["data-frame"])
-  dff = dff.set_index('index')
-  return create_figure(dff)
+  dff = data_store.get_area_frame_from_key(c_store)
+  dff = downsampling.filter_x_range(dff,
+                                    downsampling.get_x_range(relayout_data))
+  return create_figure(dff[COLS_TO_PLOT])
 
 
 @callback(Output(ids.TEXT_CP, 'children'),
           Input(ids.INTERMEDIATE_DATA_CP, 'data'))
-def update_errors_text(c_store: Any) -> str:
-  """ Update the error text based on the selected dwelling.
+def update_errors_text(c_store: data_store.AreaKey) -> str:
+  """ Update the error text based on the selected dwelling. The errors of
+    each dwelling are kept in the data store and only recomputed for the
+    dwellings with new measured data.
 
   Args:
-      c_store (Any): The data stored in the store.
+      c_store (data_store.AreaKey): The key stored in the store.
   
   Returns:
       str: The updated error text.
   """
-  dff = pd.DataFrame(c_store["data-frame"])
-  dff = dff.set_index('index')
-  errors = calculate_simulation_errors(
-      dff[schema.SimulationData.PREDICTED_IAT],
-      dff[schema.SimulationData.MEASURED_IAT])
-  return generate_error_text(errors)
+  errors = data_store.get_area_frame(enums.Dataset.SIMULATION_ERRORS,
+                                     c_store['area_id'])
+  return generate_error_text(errors.iloc[0].to_dict())
+
+
+@callback(Output(ids.TABLE_CP, 'getRowsResponse'),
+          Input(ids.TABLE_CP, 'getRowsRequest'))
+def get_table_rows(request: dict[str, Any] | None) -> dict[str, Any]:
+  """ Send the block of rows requested by the table, filtered and sorted on
+    the server.
+
+  Args:
+      request (dict[str, Any] | None): The rows requested by the table.
+
+  Returns:
+      dict[str, Any]: The requested rows and the number of filtered rows."""
+  if request is None:
+    return no_update
+  return row_model.get_rows(enums.Dataset.SIMULATION_ERRORS, request)
+
+
+# Show the dwelling selected in the table, in the browser.
+clientside_callback(
+    """
+    function(selected) {
+        if (selected && selected.length) {
+            return selected[0]['index'];
+        }
+        return window.dash_clientside.no_update;
+    }
+    """, Output(ids.DROPDOWN_CP, 'value'), Input(ids.TABLE_CP, 'selectedRows'))
@@ -0,0 +1,235 @@
+"""Multi-process batch runner of the long term overheating risk of a portfolio.
+
+The dwellings are split into shards of consecutive Area_IDs and a process pool
+aggregates the overheating hours per dwelling and year of every shard. The
+source file is parsed once, into its columnar cache, before the pool starts,
+and every worker memory-maps the cached indoor air temperatures instead of
+parsing the file again. Each shard is written to the columnar cache as soon as
+it is complete, under a version depending on the source file, the number of
+dwellings, the shard size and the .env thresholds, so an interrupted run only
+computes the missing shards when started again. The shards are then merged into
+the hours of the portfolio, cached next to them for the dashboard to load
+instead of computing them. The yearly percentages and the risk table are
+derived from the hours by the data store, so they also reflect the measured
+data appended since."""
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Callable
+
+import pandas as pd
+
+from . import columnar_cache, instrumentation, loader
+
+PARAMETERS = ('THRESHOLD_OVERHEATING_IAT', 'THRESHOLD_OVERHEATING_IAT_MIN',
+              'THRESHOLD_OVERHEATING_IAT_MAX', 'NIGHT_START_HOUR',
+              'NIGHT_END_HOUR', 'THRESHOLD_OVERHEATING_PERCENTAGE',
+              'THRESHOLD_NIGHT_OVERHEATING_PERCENTAGE')
+HOURS = 'hours'
+# the hours have two column levels, flattened in the cache
+COLUMN_SEPARATOR = '|'
+
+
+def get_source_path() -> Path:
+  """Returns the path of the long term simulation data, from
+  LONG_TERM_SIMULATION_DATA_PATH in .env.
+
+  Returns:
+      Path: The path to the csv file."""
+  return Path(os.getenv('LONG_TERM_SIMULATION_DATA_PATH'))
+
+
+def get_batch_dir(source_path: Path) -> Path:
+  """Returns the cache folder of the batch runs over a source file.
+
+  Args:
+      source_path (Path): The path to the source file.
+
+  Returns:
+      Path: The batch folder."""
+  cache_root = Path(os.getenv('DATA_CACHE_PATH', 'src/data/cache'))
+  return cache_root / f'{source_path.stem}_batch'
+
+
+def get_run_fingerprint(source_path: Path, nb_dwellings: int,
+                        shard_size: int) -> dict[str, Any]:
+  """Returns what identifies the results of a batch run.
+
+  Args:
+      source_path (Path): The path to the source file.
+      nb_dwellings (int): The number of dwellings.
+      shard_size (int): The number of dwellings per shard.
+
+  Returns:
+      dict[str, Any]: The source file fingerprint, the run size and the .env thresholds."""
+  return {
+      **columnar_cache.get_source_fingerprint(source_path),
+      'nb_dwellings': nb_dwellings,
+      'shard_size': shard_size,
+      'parameters': {
+          name: os.getenv(name)
+          for name in PARAMETERS
+      },
+  }
+
+
+def run_shard(source_path: Path, area_ids: list[int], shard_dir: Path,
+              fingerprint: dict[str, Any], chunksize: int | None) -> int:
+  """Aggregates the overheating hours per year of a shard of dwellings from
+  the columnar cache of the source file and writes them to the cache. Runs in
+  a worker process.
+
+  Args:
+      source_path (Path): The path to the source file.
+      area_ids (list[int]): The Area_IDs of the shard.
+      shard_dir (Path): The cache folder of the shard.
+      fingerprint (dict[str, Any]): The fingerprint of the run.
+      chunksize (int | None): The number of rows read at a time.
+
+  Returns:
+      int: The number of dwellings of the shard."""
+  hours = loader.stream_overheating_hours_per_year(source_path, chunksize,
+                                                   area_ids)
+  columnar_cache.write_frame(_flatten_columns(hours), shard_dir, fingerprint)
+  return len(area_ids)
+
+
+def run_batch(nb_dwellings: int,
+              shard_size: int = 100,
+              max_workers: int | None = None,
+              chunksize: int | None = None,
+              progress: Callable[[int, int], None] | None = None) -> Path:
+  """Computes the long term overheating risk of a portfolio of dwellings
+  across a process pool, skipping the shards already cached by an earlier
+  run with the same fingerprint.
+
+  Args:
+      nb_dwellings (int): The number of dwellings.
+      shard_size (int): The number of dwellings per shard.
+      max_workers (int | None): The number of processes, default the number of CPUs.
+      chunksize (int | None): The number of rows read at a time, default LONG_TERM_CHUNK_SIZE from .env.
+      progress (Callable[[int, int], None] | None): Called with the number of completed and total shards.
+
+  Returns:
+      Path: The batch folder."""
+  source_path = get_source_path()
+  batch_dir = get_batch_dir(source_path)
+  fingerprint = get_run_fingerprint(source_path, nb_dwellings, shard_size)
+  version = _hash_fingerprint(fingerprint)
+  shards = [
+      list(range(start, min(start + shard_size, nb_dwellings)))
+      for start in range(0, nb_dwellings, shard_size)
+  ]
+  shard_dirs = [
+      batch_dir / f'shard_{i:05d}' / version for i in range(len(shards))
+  ]
+  pending = [
+      i for i, shard_dir in enumerate(shard_dirs)
+      if not (shard_dir / columnar_cache.META_FILE).exists()
+  ]
+  nb_done = len(shards) - len(pending)
+  if progress is not None:
+    progress(nb_done, len(shards))
+  if pending:
+    # the workers slice the memory-mapped cache instead of each parsing the
+    # csv file
+    columnar_cache.load_or_build(source_path,
+                                 loader.load_prepared_data_from_csv)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+      futures = [
+          executor.submit(run_shard, source_path, shards[i], shard_dirs[i],
+                          fingerprint, chunksize) for i in pending
+      ]
+      for future in as_completed(futures):
+        future.result()
+        nb_done += 1
+        if progress is not None:
+          progress(nb_done, len(shards))
+
+  hours = pd.concat(
+      [columnar_cache.read_frame(shard_dir) for shard_dir in shard_dirs])
+  columnar_cache.write_frame(hours, batch_dir / HOURS / version, fingerprint)
+  return batch_dir
+
+
+def get_latest_run() -> Path | None:
+  """Returns the results of the most recently completed batch run over the
+  current source file and .env thresholds.
+
+  Returns:
+      Path | None: The cache folder of the hours of the run, None if no such run completed."""
+  source_path = get_source_path()
+  results_dir = get_batch_dir(source_path) / HOURS
+  if not source_path.exists() or not results_dir.exists():
+    return None
+  expected = get_run_fingerprint(source_path, 0, 0)
+  runs = []
+  for cache_dir in results_dir.iterdir():
+    meta_path = cache_dir / columnar_cache.META_FILE
+    try:
+      completed = meta_path.stat().st_mtime_ns
+      with open(meta_path, encoding='utf-8') as file:
+        fingerprint = json.load(file)['source']
+    except OSError:  # not completed, or removed by a newer run meanwhile
+      continue
+    if all(fingerprint[key] == expected[key]
+           for key in ('path', 'mtime_ns', 'size', 'parameters')):
+      runs.append((completed, cache_dir))
+  return max(runs)[1] if runs else None
+
+
+def get_latest_run_version() -> str:
+  """Returns the version of the most recently completed batch run over the
+  current source file and .env thresholds, so that the datasets are rebuilt
+  when a new run completes.
+
+  Returns:
+      str: The hash of the fingerprint of the run, empty if no such run completed."""
+  run_dir = get_latest_run()
+  return run_dir.name if run_dir is not None else ''
+
+
+def read_results() -> pd.DataFrame | None:
+  """Reads the hours of the most recently completed batch run over the
+  current source file and .env thresholds.
+
+  Returns:
+      pd.DataFrame | None: The overheating and night overheating hours per dwelling and year, None if no such run completed."""
+  run_dir = get_latest_run()
+  if run_dir is None:
+    return None
+  return _unflatten_columns(columnar_cache.read_frame(run_dir))
+
+
+@instrumentation.stage
+def get_overheating_hours_per_year() -> pd.DataFrame:
+  """Returns the overheating and night overheating hours per dwelling and
+  year of the latest batch run, or streams them for the dummy dwellings if
+  no batch run matches the current source file and .env thresholds.
+
+  Returns:
+      pd.DataFrame: The overheating and night overheating hours per dwelling and year."""
+  hours = read_results()
+  if hours is None:
+    return loader.get_dummy_longterm_overheating_hours()
+  return hours
+
+
+def _hash_fingerprint(fingerprint: dict[str, Any]) -> str:
+  return hashlib.sha256(json.dumps(fingerprint,
+                                   sort_keys=True).encode()).hexdigest()[:16]
+
+
+def _flatten_columns(dataf: pd.DataFrame) -> pd.DataFrame:
+  dataf = dataf.copy(deep=False)
+  dataf.columns = [COLUMN_SEPARATOR.join(column) for column in dataf.columns]
+  return dataf
+
+
+def _unflatten_columns(dataf: pd.DataFrame) -> pd.DataFrame:
+  dataf = dataf.copy(deep=False)
+  dataf.columns = pd.MultiIndex.from_tuples(
+      [tuple(column.split(COLUMN_SEPARATOR)) for column in dataf.columns])
+  return dataf
@@ -0,0 +1,219 @@
+"""Calibration of the resistance and capacitance of the 1R1C thermal model of many dwellings at once against their measured indoor air temperature.
+
+The sum of the squared errors between the simulated and measured indoor air
+temperatures of each dwelling is minimised with the Levenberg-Marquardt method
+over the logs of R and C, which keeps both positive. The sensitivities of the
+simulated temperature to log R and log C follow the 1R1C recursion, see
+thermal_model.simulate_1r1c:
+
+    dT[k] = (1 - a) dT_eq[k] + da (T[k-1] - T_eq[k]) + a dT[k-1],  a = exp(-dt / (R C))
+
+with dT_eq / dlog R = R Q, dT_eq / dlog C = 0 and da / dlog R = da / dlog C
+= a dt / (R C). They are propagated alongside the temperature and reduced to
+the 2x2 normal equations of every dwelling on the fly, so each iteration is a
+single pass over the hours for all dwellings, and only the dwellings that have
+not converged yet are simulated again."""
+import os
+from dataclasses import dataclass
+
+import numpy as np
+from numpy import typing as npt
+
+
+@dataclass(frozen=True)
+class CalibrationSettings:
+  """The stopping criteria of the calibration.
+
+  Attributes:
+      max_iterations (int): The maximum number of iterations.
+      tolerance (float): The relative change of R and C under which a dwelling has converged.
+      initial_damping (float): The initial Levenberg-Marquardt damping."""
+  max_iterations: int = 50
+  tolerance: float = 1e-4
+  initial_damping: float = 1e-3
+
+
+def get_calibration_settings() -> CalibrationSettings:
+  """Get the calibration settings from CALIBRATION_MAX_ITERATIONS and
+  CALIBRATION_TOLERANCE in .env.
+
+  Returns:
+      CalibrationSettings: The calibration settings.
+  """
+  default = CalibrationSettings()
+  return CalibrationSettings(max_iterations=int(
+      os.getenv('CALIBRATION_MAX_ITERATIONS', default.max_iterations)),
+                             tolerance=float(
+                                 os.getenv('CALIBRATION_TOLERANCE',
+                                           default.tolerance)))
+
+
+def calibrate_1r1c(
+    outdoor_temperature: npt.NDArray[np.float64],
+    heat_gains: npt.NDArray[np.float64],
+    measured_temperature: npt.NDArray[np.float64],
+    resistance: npt.ArrayLike,
+    capacitance: npt.ArrayLike,
+    settings: CalibrationSettings | None = None,
+    timestep_hours: float = 1.0
+) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+  """Fit the resistance and capacitance of N dwellings to their measured
+  indoor air temperature. The simulation of each dwelling starts at its first
+  measured hour from the measured temperature, and the hours without
+  measurement are left out of the fit.
+
+  Arguments:
+      outdoor_temperature (npt.NDArray[np.float64]): The outdoor air temperature [degreeC], of shape (dwellings, hours).
+      heat_gains (npt.NDArray[np.float64]): The heating output and internal and solar gains [kW], of shape (dwellings, hours).
+      measured_temperature (npt.NDArray[np.float64]): The measured indoor air temperature [degreeC], of shape (dwellings, hours), NaN where not measured.
+      resistance (npt.ArrayLike): The initial resistance R of each dwelling [K/kW], of shape (dwellings,).
+      capacitance (npt.ArrayLike): The initial capacitance C of each dwelling [kWh/K], of shape (dwellings,).
+      settings (CalibrationSettings | None): The calibration settings, default from .env.
+      timestep_hours (float): The time step [h].
+
+  Returns:
+      tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]: The fitted resistance and capacitance of each dwelling, of shape (dwellings,).
+  """
+  if settings is None:
+    settings = get_calibration_settings()
+  nb_dwellings = len(outdoor_temperature)
+  # time-major so every step reads one contiguous row
+  oat = np.ascontiguousarray(np.asarray(outdoor_temperature, np.float64).T)
+  gains = np.ascontiguousarray(np.asarray(heat_gains, np.float64).T)
+  measured = np.ascontiguousarray(
+      np.asarray(measured_temperature, np.float64).T)
+  first_hour = get_first_measured_hour(measured_temperature)
+  initial_temperature = get_initial_temperature(measured_temperature)
+  resistance = np.broadcast_to(np.asarray(resistance, np.float64),
+                               nb_dwellings)
+  capacitance = np.broadcast_to(np.asarray(capacitance, np.float64),
+                                nb_dwellings)
+  log_parameters = np.log(np.column_stack([resistance, capacitance]))
+  hessian, gradient, loss = _get_normal_equations(oat, gains, measured,
+                                                  first_hour,
+                                                  initial_temperature,
+                                                  np.exp(log_parameters),
+                                                  timestep_hours)
+  damping = np.full(nb_dwellings, settings.initial_damping)
+  active = np.flatnonzero(np.isfinite(loss))
+  for _ in range(settings.max_iterations):
+    if not len(active):
+      break
+    step = _solve_damped(hessian[active], gradient[active], damping[active])
+    candidate = log_parameters[active] + step
+    candidate_hessian, candidate_gradient, candidate_loss = _get_normal_equations(
+        oat[:, active], gains[:, active],
+        measured[:, active], first_hour[active], initial_temperature[active],
+        np.exp(candidate), timestep_hours)
+    is_better = candidate_loss < loss[active]
+    improved = active[is_better]
+    log_parameters[improved] = candidate[is_better]
+    hessian[improved] = candidate_hessian[is_better]
+    gradient[improved] = candidate_gradient[is_better]
+    loss[improved] = candidate_loss[is_better]
+    damping[active] = np.where(is_better, damping[active] / 10,
+                               damping[active] * 10)
+    is_converged = (np.abs(step).max(axis=-1)
+                    < settings.tolerance) | (damping[active] > 1e10)
+    active = active[~is_converged]
+  parameters = np.exp(log_parameters)
+  return parameters[:, 0], parameters[:, 1]
+
+
+def get_first_measured_hour(
+    measured_temperature: npt.NDArray[np.float64]) -> npt.NDArray[np.int64]:
+  """Get the first measured hour of each dwelling, the hour its simulation
+  starts from.
+
+  Arguments:
+      measured_temperature (npt.NDArray[np.float64]): The measured indoor air temperature [degreeC], of shape (dwellings, hours), NaN where not measured.
+
+  Returns:
+      npt.NDArray[np.int64]: The first measured hour of each dwelling, 0 when never measured.
+  """
+  return np.isfinite(measured_temperature).argmax(axis=-1)
+
+
+def get_initial_temperature(
+    measured_temperature: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+  """Get the first measured temperature of each dwelling, its temperature at
+  its first measured hour.
+
+  Arguments:
+      measured_temperature (npt.NDArray[np.float64]): The measured indoor air temperature [degreeC], of shape (dwellings, hours), NaN where not measured.
+
+  Returns:
+      npt.NDArray[np.float64]: The first measured temperature of each dwelling, NaN when never measured.
+  """
+  first_hour = get_first_measured_hour(measured_temperature)
+  return measured_temperature[np.arange(len(measured_temperature)), first_hour]
+
+
+def _get_normal_equations(
+    oat: npt.NDArray[np.float64], gains: npt.NDArray[np.float64],
+    measured: npt.NDArray[np.float64], first_hour: npt.NDArray[np.int64],
+    initial_temperature: npt.NDArray[np.float64],
+    parameters: npt.NDArray[np.float64], timestep_hours: float
+) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64],
+           npt.NDArray[np.float64]]:
+  """Simulate the dwellings with their sensitivities to log R and log C and
+  reduce them to the Gauss-Newton normal equations: the approximated hessian
+  J^T J, the gradient J^T r and the sum of the squared residuals r.
+
+  The inputs are time-major, of shape (hours, dwellings), and the parameters
+  are of shape (dwellings, 2). The recursion of each dwelling is held at its
+  initial temperature, with zero sensitivities, up to its first hour."""
+  resistance = parameters[:, 0]
+  decay = np.exp(-timestep_hours / (resistance * parameters[:, 1]))
+  decay_sensitivity = decay * timestep_hours / (resistance * parameters[:, 1])
+  temperature = initial_temperature.copy()
+  sensitivity_r = np.zeros_like(temperature)
+  sensitivity_c = np.zeros_like(temperature)
+  sums = np.zeros((6, len(temperature)))
+  last_first_hour = first_hour.max(initial=0)
+  for k in range(1, len(oat)):
+    equilibrium_temperature = oat[k] + resistance * gains[k]
+    difference = temperature - equilibrium_temperature
+    sensitivity_r = ((1 - decay) * (resistance * gains[k]) +
+                     decay_sensitivity * difference + decay * sensitivity_r)
+    sensitivity_c = decay_sensitivity * difference + decay * sensitivity_c
+    temperature = equilibrium_temperature + decay * difference
+    if k <= last_first_hour:
+      is_started = k > first_hour
+      temperature = np.where(is_started, temperature, initial_temperature)
+      sensitivity_r = np.where(is_started, sensitivity_r, 0.0)
+      sensitivity_c = np.where(is_started, sensitivity_c, 0.0)
+    residual = measured[k] - temperature
+    # hours without measurement, or after a missing input, weigh nothing
+    is_valid = np.isfinite(residual)
+    residual = np.where(is_valid, residual, 0.0)
+    weighted_r = np.where(is_valid, sensitivity_r, 0.0)
+    weighted_c = np.where(is_valid, sensitivity_c, 0.0)
+    sums[0] += weighted_r * weighted_r
+    sums[1] += weighted_r * weighted_c
+    sums[2] += weighted_c * weighted_c
+    sums[3] += weighted_r * residual
+    sums[4] += weighted_c * residual
+    sums[5] += residual * residual
+  hessian = sums[[0, 1, 1, 2]].T.reshape(-1, 2, 2)
+  gradient = sums[3:5].T
+  loss = np.where(np.isfinite(initial_temperature), sums[5], np.nan)
+  return hessian, gradient, loss
+
+
+def _solve_damped(hessian: npt.NDArray[np.float64],
+                  gradient: npt.NDArray[np.float64],
+                  damping: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+  """Solve the damped 2x2 normal equations of every dwelling,
+  (H + damping diag(H)) step = gradient, with a zero step where singular."""
+  a = hessian[:, 0, 0] * (1 + damping)
+  b = hessian[:, 0, 1]
+  d = hessian[:, 1, 1] * (1 + damping)
+  determinant = a * d - b * b
+  with np.errstate(divide='ignore', invalid='ignore'):
+    step = np.column_stack([
+        d * gradient[:, 0] - b * gradient[:, 1],
+        a * gradient[:, 1] - b * gradient[:, 0]
+    ]) / determinant[:, np.newaxis]
+  return np.where((determinant > 0)[:, np.newaxis] & np.isfinite(step), step,
+                  0.0)
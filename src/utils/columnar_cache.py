@@ -0,0 +1,179 @@
+"""Build-once columnar cache for the prepared simulation data.
+
+A prepared frame is written as one typed .npy file per column, with floats
+down-cast to float32 and tz-aware datetimes stored as int64 nanoseconds, next
+to a meta.json describing the columns and the source file it was built from.
+Later loads memory-map the columns instead of parsing the CSV again; the CSV
+is only read when the source file's modification time or size changed."""
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+from numpy import typing as npt
+
+from . import instrumentation
+
+CACHE_FORMAT_VERSION = 1
+META_FILE = 'meta.json'
+
+
+def load_or_build(source_path: Path,
+                  build: Callable[[Path], pd.DataFrame]) -> pd.DataFrame:
+  """Loads the cached frame built from a source file, building and caching
+  it first if the cache is missing or the source file changed.
+
+  Args:
+      source_path (Path): The path to the source file.
+      build (Callable[[Path], pd.DataFrame]): The function building the frame from the source file.
+
+  Returns:
+      pd.DataFrame: The memory-mapped frame."""
+  fingerprint = get_source_fingerprint(source_path)
+  cache_dir = get_cache_dir(source_path, fingerprint)
+  is_cached = (cache_dir / META_FILE).exists()
+  instrumentation.count_cache('columnar', is_cached)
+  if not is_cached:
+    write_frame(build(source_path), cache_dir, fingerprint)
+  return read_frame(cache_dir)
+
+
+def load_if_cached(source_path: Path) -> pd.DataFrame | None:
+  """Loads the cached frame built from a source file, without building it.
+
+  Args:
+      source_path (Path): The path to the source file.
+
+  Returns:
+      pd.DataFrame | None: The memory-mapped frame, None if the cache is missing or the source file changed."""
+  cache_dir = get_cache_dir(source_path, get_source_fingerprint(source_path))
+  is_cached = (cache_dir / META_FILE).exists()
+  instrumentation.count_cache('columnar', is_cached)
+  return read_frame(cache_dir) if is_cached else None
+
+
+def get_source_fingerprint(source_path: Path) -> dict[str, Any]:
+  """Returns what identifies a version of a source file.
+
+  Args:
+      source_path (Path): The path to the source file.
+
+  Returns:
+      dict[str, Any]: The resolved path, modification time and size of the file."""
+  stat = source_path.stat()
+  return {
+      'path': str(source_path.resolve()),
+      'mtime_ns': stat.st_mtime_ns,
+      'size': stat.st_size,
+  }
+
+
+def get_cache_dir(source_path: Path, fingerprint: dict[str, Any]) -> Path:
+  """Returns the cache folder of a version of a source file. The folder is
+  under DATA_CACHE_PATH from .env, default 'src/data/cache'.
+
+  Args:
+      source_path (Path): The path to the source file.
+      fingerprint (dict[str, Any]): The fingerprint of the source file.
+
+  Returns:
+      Path: The cache folder."""
+  cache_root = Path(os.getenv('DATA_CACHE_PATH', 'src/data/cache'))
+  version = f"{fingerprint['mtime_ns']}-{fingerprint['size']}"
+  return cache_root / source_path.stem / version
+
+
+def write_frame(dataf: pd.DataFrame, cache_dir: Path,
+                fingerprint: dict[str, Any]) -> None:
+  """Writes a frame to a cache folder, one .npy file per column and index
+  level. The folder is written under a temporary name and renamed once
+  complete, and older versions of the same source are removed.
+
+  Args:
+      dataf (pd.DataFrame): The frame to cache.
+      cache_dir (Path): The cache folder.
+      fingerprint (dict[str, Any]): The fingerprint of the source file.
+
+  Raises:
+      TypeError: If a column is not numeric, boolean or datetime."""
+  cache_dir.parent.mkdir(parents=True, exist_ok=True)
+  tmp_dir = Path(tempfile.mkdtemp(dir=cache_dir.parent))
+  index_names = [
+      name if name is not None else f'level_{i}'
+      for i, name in enumerate(dataf.index.names)
+  ]
+  flat_df = dataf.rename_axis(index_names).reset_index()
+  columns_meta = []
+  for i, name in enumerate(flat_df.columns):
+    values, column_meta = _encode_column(flat_df[name])
+    column_meta.update({'name': name, 'file': f'col_{i:04d}.npy'})
+    np.save(tmp_dir / column_meta['file'], values)
+    columns_meta.append(column_meta)
+  meta = {
+      'format': CACHE_FORMAT_VERSION,
+      'source': fingerprint,
+      'index': index_names,
+      'original_index_names': list(dataf.index.names),
+      'columns': columns_meta,
+  }
+  with open(tmp_dir / META_FILE, 'w', encoding='utf-8') as file:
+    json.dump(meta, file)
+  try:
+    os.rename(tmp_dir, cache_dir)
+  except OSError:  # another process cached the same version first
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+  for old_dir in cache_dir.parent.iterdir():
+    if old_dir != cache_dir and (old_dir / META_FILE).exists():
+      shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def read_frame(cache_dir: Path) -> pd.DataFrame:
+  """Reads a cached frame, memory-mapping its columns.
+
+  Args:
+      cache_dir (Path): The cache folder.
+
+  Returns:
+      pd.DataFrame: The cached frame."""
+  with open(cache_dir / META_FILE, encoding='utf-8') as file:
+    meta = json.load(file)
+  columns = {
+      column_meta['name']:
+      _decode_column(np.load(cache_dir / column_meta['file'], mmap_mode='r'),
+                     column_meta)
+      for column_meta in meta['columns']
+  }
+  index = pd.MultiIndex.from_arrays(
+      [columns.pop(name) for name in meta['index']],
+      names=meta['original_index_names'])
+  if index.nlevels == 1:
+    index = index.get_level_values(0)
+  return pd.DataFrame(columns, index=index, copy=False)
+
+
+def _encode_column(series: pd.Series) -> tuple[np.ndarray, dict[str, Any]]:
+  if isinstance(series.dtype, pd.DatetimeTZDtype):
+    return series.array.asi8, {'kind': 'datetime', 'tz': str(series.dt.tz)}
+  if pd.api.types.is_datetime64_dtype(series.dtype):
+    return series.array.asi8, {'kind': 'datetime', 'tz': None}
+  if pd.api.types.is_float_dtype(series.dtype):
+    return series.to_numpy(dtype=np.float32), {'kind': 'float'}
+  if (pd.api.types.is_integer_dtype(series.dtype)
+      or pd.api.types.is_bool_dtype(series.dtype)):
+    return series.to_numpy(), {'kind': 'int'}
+  raise TypeError(
+      f'Column {series.name} of type {series.dtype} cannot be cached.')
+
+
+def _decode_column(values: np.ndarray,
+                   column_meta: dict[str, Any]) -> npt.ArrayLike:
+  if column_meta['kind'] == 'datetime':
+    datetimes = pd.DatetimeIndex(values.view('datetime64[ns]'))
+    if column_meta['tz'] is not None:
+      datetimes = datetimes.tz_localize('UTC').tz_convert(column_meta['tz'])
+    return datetimes.array
+  return values
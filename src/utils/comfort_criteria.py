@@ -0,0 +1,271 @@
+"""This file holds the CIBSE TM52 and TM59 overheating criteria of many dwellings at once, stored as arrays of shape (dwellings, hours).
+
+The hours of every row start at midnight and cover whole days, e.g. the May to
+September of a dwelling and year. The average indoor air temperature stands
+for the operative temperature of the rooms.
+
+The adaptive limit of TM52 follows the exponentially weighted running mean of
+the daily mean outdoor air temperature:
+
+    T_rm[d] = (1 - alpha) T_od[d-1] + alpha T_rm[d-1],  alpha = 0.8
+    T_max[d] = 0.33 T_rm[d] + 21.8
+
+and the exceedance of an hour is the operative temperature minus T_max,
+rounded to the nearest degree. TM59 Criterion A is met when the hours with an
+exceedance of at least 1 degC are no more than 3 % of the occupied hours, and
+Criterion B when the bedroom is above 26 degC for no more than 1 % of the
+annual night hours, from 22:00 to 07:00. The daily weighted exceedance of TM52
+Criterion 2 is the sum of the positive exceedances of the occupied hours of a
+day, and should not be above 6 degC hours on any day."""
+import numpy as np
+from numpy import typing as npt
+
+HOURS_PER_DAY = 24
+DAYS_PER_YEAR = 365
+RUNNING_MEAN_ALPHA = 0.8
+COMFORT_SLOPE = 0.33
+# the maximum acceptable temperature of a category II building, normal
+# expectation, T_comf + 3 degC with T_comf = 0.33 T_rm + 18.8
+MAXIMUM_TEMPERATURE_INTERCEPT = 21.8
+CRITERION_A_EXCEEDANCE = 1
+CRITERION_A_PERCENTAGE = 3
+CRITERION_B_TEMPERATURE = 26
+CRITERION_B_PERCENTAGE = 1
+MAXIMUM_DAILY_WEIGHTED_EXCEEDANCE = 6
+# the days of running mean computed by a single matrix product, which bounds
+# the size of the weights matrix
+RUNNING_MEAN_BLOCK_DAYS = 128
+
+
+def get_night_hours(start_hour: int = 22,
+                    end_hour: int = 6) -> npt.NDArray[np.bool_]:
+  """Flag the hours of the day from start_hour to end_hour included, which
+  span midnight. The default is the 22:00 to 07:00 night of TM59.
+
+  Arguments:
+      start_hour (int): The first night hour.
+      end_hour (int): The last night hour.
+
+  Returns:
+      npt.NDArray[np.bool_]: The night flag of each hour of the day, of shape (24,).
+  """
+  hours = np.arange(HOURS_PER_DAY)
+  return (hours >= start_hour) | (hours <= end_hour)
+
+
+def get_daily_mean(
+    hourly_values: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+  """Get the daily mean of hourly values, leaving out the missing hours. The
+  days without any value are given the mean of the previous day, or of the
+  next day at the start.
+
+  Arguments:
+      hourly_values (npt.NDArray[np.float64]): The hourly values, of shape (dwellings, hours), the hours a multiple of 24.
+
+  Returns:
+      npt.NDArray[np.float64]: The daily means, of shape (dwellings, days).
+  """
+  days = _to_days(hourly_values)
+  is_valid = np.isfinite(days)
+  nb_valid = is_valid.sum(axis=-1)
+  with np.errstate(invalid='ignore', divide='ignore'):
+    daily_mean = np.where(is_valid, days, 0.0).sum(axis=-1) / nb_valid
+  has_value = nb_valid > 0
+  rows = np.arange(len(daily_mean))[:, np.newaxis]
+  day_index = np.arange(daily_mean.shape[-1])
+  previous_day = np.maximum.accumulate(np.where(has_value, day_index, -1),
+                                       axis=-1)
+  first_day = has_value.argmax(axis=-1)[:, np.newaxis]
+  return daily_mean[rows, np.where(previous_day >= 0, previous_day, first_day)]
+
+
+def get_running_mean(
+    daily_mean: npt.NDArray[np.float64],
+    alpha: float = RUNNING_MEAN_ALPHA,
+    initial_running_mean: npt.ArrayLike | None = None,
+    block_days: int = RUNNING_MEAN_BLOCK_DAYS) -> npt.NDArray[np.float64]:
+  """Get the exponentially weighted running mean of the daily mean outdoor air
+  temperature of every dwelling at once.
+
+  The recursion is solved in blocks of days: within a block, the running mean
+  of each day is the running mean at the start of the block decayed by alpha
+  per day plus the weighted daily means of the block so far, which is a
+  single matrix product for all dwellings.
+
+  Arguments:
+      daily_mean (npt.NDArray[np.float64]): The daily mean outdoor air temperature [degreeC], of shape (dwellings, days), without missing days.
+      alpha (float): The weight of the running mean of the previous day.
+      initial_running_mean (npt.ArrayLike | None): The running mean of the first day, of shape (dwellings,), default the daily mean of the first day.
+      block_days (int): The number of days per matrix product.
+
+  Returns:
+      npt.NDArray[np.float64]: The running mean outdoor air temperature [degreeC], of shape (dwellings, days).
+  """
+  daily_mean = np.asarray(daily_mean, dtype=np.float64)
+  nb_days = daily_mean.shape[-1]
+  running_mean = np.empty_like(daily_mean)
+  if not nb_days:
+    return running_mean
+  block_days = min(block_days, nb_days)
+  lags = np.subtract.outer(np.arange(block_days), np.arange(block_days))
+  # weight of the daily mean of day j in the running mean of day i of a block
+  weights = np.where(lags > 0, (1 - alpha) * alpha**np.maximum(lags - 1, 0),
+                     0.0)
+  decays = alpha**np.arange(block_days)
+  if initial_running_mean is None:
+    start_running_mean = daily_mean[..., 0]
+  else:
+    start_running_mean = np.broadcast_to(
+        np.asarray(initial_running_mean, dtype=np.float64),
+        daily_mean.shape[:-1])
+  for start in range(0, nb_days, block_days):
+    block = daily_mean[..., start:start + block_days]
+    size = block.shape[-1]
+    block_running_mean = block @ weights[:size, :size].T + (
+        start_running_mean[..., np.newaxis] * decays[:size])
+    running_mean[..., start:start + size] = block_running_mean
+    start_running_mean = (1 - alpha) * block[..., -1] + (
+        alpha * block_running_mean[..., -1])
+  return running_mean
+
+
+def get_maximum_temperature(
+    running_mean: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+  """Get the maximum acceptable operative temperature of TM52 of each day.
+
+  Arguments:
+      running_mean (npt.NDArray[np.float64]): The running mean outdoor air temperature [degreeC], of shape (dwellings, days).
+
+  Returns:
+      npt.NDArray[np.float64]: The maximum acceptable temperature [degreeC], of shape (dwellings, days).
+  """
+  return COMFORT_SLOPE * running_mean + MAXIMUM_TEMPERATURE_INTERCEPT
+
+
+def get_exceedance(
+    operative_temperature: npt.NDArray[np.float64],
+    maximum_temperature: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+  """Get the hourly exceedance of the maximum acceptable temperature, rounded
+  to the nearest degree with the halves rounded up as in TM52.
+
+  Arguments:
+      operative_temperature (npt.NDArray[np.float64]): The operative temperature [degreeC], of shape (dwellings, hours).
+      maximum_temperature (npt.NDArray[np.float64]): The maximum acceptable temperature [degreeC], of shape (dwellings, days).
+
+  Returns:
+      npt.NDArray[np.float64]: The exceedance [degreeC], of shape (dwellings, hours), NaN where the temperature is missing.
+  """
+  difference = _to_days(operative_temperature) - maximum_temperature[
+      ..., np.newaxis]
+  return np.floor(difference + 0.5).reshape(operative_temperature.shape)
+
+
+def assess_criterion_a(
+    exceedance: npt.NDArray[np.float64],
+    occupied_hours: npt.ArrayLike | None = None
+) -> tuple[npt.NDArray[np.int64], npt.NDArray[np.float64],
+           npt.NDArray[np.bool_]]:
+  """Assess the TM59 Criterion A, the TM52 Criterion 1, of every dwelling: the
+  hours with an exceedance of at least 1 degC should be no more than 3 % of
+  the occupied hours.
+
+  Arguments:
+      exceedance (npt.NDArray[np.float64]): The hourly exceedance [degreeC], of shape (dwellings, hours).
+      occupied_hours (npt.ArrayLike | None): The occupied flag of each hour of the day, of shape (24,), default all hours.
+
+  Returns:
+      tuple[npt.NDArray[np.int64], npt.NDArray[np.float64], npt.NDArray[np.bool_]]: The hours of exceedance, their percentage of the occupied hours and whether the criterion is met, of shape (dwellings,).
+  """
+  is_occupied = _get_occupied(exceedance, occupied_hours)
+  nb_hours = ((exceedance >= CRITERION_A_EXCEEDANCE)
+              & is_occupied).sum(axis=-1)
+  nb_occupied_hours = (np.isfinite(exceedance) & is_occupied).sum(axis=-1)
+  with np.errstate(invalid='ignore', divide='ignore'):
+    percentage = nb_hours / nb_occupied_hours * 100
+  return nb_hours, percentage, percentage <= CRITERION_A_PERCENTAGE
+
+
+def assess_criterion_b(
+    bedroom_temperature: npt.NDArray[np.float64],
+    night_hours: npt.ArrayLike | None = None
+) -> tuple[npt.NDArray[np.int64], npt.NDArray[np.bool_]]:
+  """Assess the TM59 Criterion B of every dwelling: the bedroom should be
+  above 26 degC for no more than 1 % of the annual night hours, i.e. 32 hours
+  for the 9 hours from 22:00 to 07:00.
+
+  Arguments:
+      bedroom_temperature (npt.NDArray[np.float64]): The operative temperature of the bedroom [degreeC], of shape (dwellings, hours).
+      night_hours (npt.ArrayLike | None): The night flag of each hour of the day, of shape (24,), default get_night_hours.
+
+  Returns:
+      tuple[npt.NDArray[np.int64], npt.NDArray[np.bool_]]: The night hours above 26 degC and whether the criterion is met, of shape (dwellings,).
+  """
+  if night_hours is None:
+    night_hours = get_night_hours()
+  night_hours = np.asarray(night_hours, dtype=bool)
+  is_night = _get_occupied(bedroom_temperature, night_hours)
+  nb_hours = ((bedroom_temperature > CRITERION_B_TEMPERATURE)
+              & is_night).sum(axis=-1)
+  nb_annual_night_hours = DAYS_PER_YEAR * night_hours.sum()
+  return nb_hours, nb_hours <= (CRITERION_B_PERCENTAGE / 100 *
+                                nb_annual_night_hours)
+
+
+def get_daily_weighted_exceedance(
+    exceedance: npt.NDArray[np.float64],
+    occupied_hours: npt.ArrayLike | None = None) -> npt.NDArray[np.float64]:
+  """Get the daily weighted exceedance of TM52 Criterion 2, the sum of the
+  positive hourly exceedances of the occupied hours of each day.
+
+  Arguments:
+      exceedance (npt.NDArray[np.float64]): The hourly exceedance [degreeC], of shape (dwellings, hours).
+      occupied_hours (npt.ArrayLike | None): The occupied flag of each hour of the day, of shape (24,), default all hours.
+
+  Returns:
+      npt.NDArray[np.float64]: The daily weighted exceedance [degreeC hours], of shape (dwellings, days).
+  """
+  weighted = np.where(
+      _get_occupied(exceedance, occupied_hours) & (exceedance > 0), exceedance,
+      0.0)
+  return _to_days(weighted).sum(axis=-1)
+
+
+def assess_daily_weighted_exceedance(
+    daily_weighted_exceedance: npt.NDArray[np.float64]
+) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.int64],
+           npt.NDArray[np.bool_]]:
+  """Assess the TM52 Criterion 2 of every dwelling: the daily weighted
+  exceedance should be no more than 6 degC hours on any day.
+
+  Arguments:
+      daily_weighted_exceedance (npt.NDArray[np.float64]): The daily weighted exceedance [degreeC hours], of shape (dwellings, days).
+
+  Returns:
+      tuple[npt.NDArray[np.float64], npt.NDArray[np.int64], npt.NDArray[np.bool_]]: The maximum daily weighted exceedance, the number of days above 6 and whether the criterion is met, of shape (dwellings,).
+  """
+  maximum = daily_weighted_exceedance.max(axis=-1, initial=0.0)
+  nb_days = (daily_weighted_exceedance
+             > MAXIMUM_DAILY_WEIGHTED_EXCEEDANCE).sum(axis=-1)
+  return maximum, nb_days, nb_days == 0
+
+
+def _to_days(
+    hourly_values: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+  """View hourly values of shape (dwellings, hours) as (dwellings, days, 24)."""
+  hourly_values = np.asarray(hourly_values)
+  if hourly_values.shape[-1] % HOURS_PER_DAY:
+    raise ValueError(
+        f'{hourly_values.shape[-1]} hours is not a whole number of days')
+  return hourly_values.reshape(*hourly_values.shape[:-1], -1, HOURS_PER_DAY)
+
+
+def _get_occupied(
+    hourly_values: npt.NDArray[np.float64],
+    occupied_hours: npt.ArrayLike | None) -> npt.NDArray[np.bool_]:
+  """Broadcast the occupied flag of each hour of the day to the shape of the
+  hourly values, all hours being occupied by default."""
+  if occupied_hours is None:
+    return np.ones(hourly_values.shape, dtype=bool)
+  is_occupied = np.broadcast_to(np.asarray(occupied_hours, dtype=bool),
+                                _to_days(hourly_values).shape)
+  return is_occupied.reshape(hourly_values.shape)
@@ -0,0 +1,690 @@
+"""Process-wide store that loads each dataset once and serves it to the pages.
+
+Datasets are rebuilt only when one of their source files changes (checked on
+the file modification time, then confirmed with a content hash), when a new
+long term batch run completes, when one of the datasets they depend on
+changes or when one of their .env parameters changes. New measured rows can
+also be appended to a running store: only the rows of the areas they belong
+to are merged into the datasets taking them and rebuilt in the datasets
+depending on them. The frames handed out are read-only shallow copies: new
+columns can be added to them but the cached values cannot be modified in
+place."""
+import hashlib
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, TypedDict
+
+import numpy as np
+import pandas as pd
+from numpy import typing as npt
+
+from . import batch_runner, enums, instrumentation, loader, schema
+
+
+@dataclass(frozen=True)
+class DatasetSpec:
+  """Describes how a dataset is built and what invalidates it.
+
+  Attributes:
+      build (Callable[..., pd.DataFrame]): The function building the dataset, called with the frames of `depends_on`.
+      sources (tuple[str, ...]): The .env variables holding the paths of the source files.
+      source_version (Callable[[], str] | None): The function returning the version of the data the build function reads besides the source files, if any.
+      depends_on (tuple[enums.Dataset, ...]): The datasets the build function takes as inputs.
+      parameters (tuple[str, ...]): The .env variables the build function reads.
+      area_column (str | None): The column or index level to partition the dataset by, if any.
+      append (Callable[[pd.DataFrame, pd.DataFrame], pd.DataFrame] | None): The function merging appended rows of one area into the rows of the area, called with the rows of the area and the rows appended to the area so far, the latest row of each index value, if the dataset takes appended rows. Merging the same rows again must not change the result.
+      per_area (bool): Whether the rows of an area are built from the rows of the same area of the inputs only, so they can be rebuilt area by area."""
+  build: Callable[..., pd.DataFrame]
+  sources: tuple[str, ...] = ()
+  source_version: Callable[[], str] | None = None
+  depends_on: tuple[enums.Dataset, ...] = ()
+  parameters: tuple[str, ...] = ()
+  area_column: str | None = None
+  append: Callable[[pd.DataFrame, pd.DataFrame], pd.DataFrame] | None = None
+  per_area: bool = False
+
+
+@dataclass(frozen=True)
+class DatasetEntry:
+  """A built dataset and the version it was built from.
+
+  Attributes:
+      frame (pd.DataFrame): The read-only dataset, sorted by area when partitioned.
+      version (str): The hash of the sources, dependencies and parameters.
+      partitions (dict[int, slice]): The positional block of rows of each area."""
+  frame: pd.DataFrame
+  version: str
+  partitions: dict[int, slice]
+
+
+class AreaKey(TypedDict):
+  """The key of the rows of one area of a dataset, small enough to be kept
+  in a dcc.Store in place of the rows themselves.
+
+  Attributes:
+      dataset (str): The partitioned dataset.
+      version (str): The version of the dataset when the key was made, to detect the keys served another version.
+      area_id (int): The area id."""
+  dataset: str
+  version: str
+  area_id: int
+
+
+DATASET_SPECS: dict[enums.Dataset, DatasetSpec] = {
+    enums.Dataset.SIMULATION:
+    DatasetSpec(build=loader.get_dummy_simulation_data,
+                sources=('SIMULATION_DATA_PATH', ),
+                area_column=schema.SimulationData.AREA_ID,
+                append=loader.append_measured_simulation_data),
+    enums.Dataset.SIMULATION_ERRORS:
+    DatasetSpec(build=loader.get_simulation_errors,
+                depends_on=(enums.Dataset.SIMULATION, ),
+                area_column=schema.SimulationErrors.AREA_ID,
+                per_area=True),
+    enums.Dataset.SHORT_TERM_FORECAST:
+    DatasetSpec(build=loader.get_dummy_forecasted_data,
+                sources=('SIMULATION_DATA_PATH', ),
+                parameters=('THERMAL_RESISTANCE', 'THERMAL_CAPACITANCE',
+                            'ENSEMBLE_MEMBERS', 'ENSEMBLE_OAT_STD',
+                            'ENSEMBLE_OAT_AUTOCORRELATION',
+                            'ENSEMBLE_PARAMETER_STD', 'ENSEMBLE_SEED'),
+                area_column=schema.ShortTermForecastData.AREA_ID,
+                append=loader.append_measured_forecast_data),
+    enums.Dataset.SHORT_TERM_OVERHEATING_TABLE:
+    DatasetSpec(build=loader.get_short_term_overheating_table,
+                depends_on=(enums.Dataset.SHORT_TERM_FORECAST, ),
+                parameters=('THRESHOLD_OVERHEATING_IAT', ),
+                area_column=schema.ShortTermForecastData.AREA_ID,
+                per_area=True),
+    enums.Dataset.LONG_TERM_OVERHEATING_HOURS:
+    DatasetSpec(build=batch_runner.get_overheating_hours_per_year,
+                sources=('LONG_TERM_SIMULATION_DATA_PATH', ),
+                source_version=batch_runner.get_latest_run_version,
+                parameters=batch_runner.PARAMETERS,
+                area_column=schema.LongTermForecastOutputs.AREA_ID,
+                append=loader.append_measured_overheating_hours),
+    enums.Dataset.LONG_TERM_OVERHEATING_PERCT:
+    DatasetSpec(build=loader.get_overheating_perct_from_hours,
+                depends_on=(enums.Dataset.LONG_TERM_OVERHEATING_HOURS, ),
+                area_column=schema.LongTermForecastOutputs.AREA_ID,
+                per_area=True),
+    enums.Dataset.LONG_TERM_OVERHEATING_TABLE:
+    DatasetSpec(build=loader.get_overheating_table,
+                depends_on=(enums.Dataset.LONG_TERM_OVERHEATING_PERCT, ),
+                parameters=('THRESHOLD_OVERHEATING_PERCENTAGE',
+                            'THRESHOLD_NIGHT_OVERHEATING_PERCENTAGE'),
+                area_column=schema.OverheatingTable.AREA_ID,
+                per_area=True),
+}
+
+
+class DataStore:
+  """Memoizes the datasets described by a set of specs.
+
+  By default a dataset is rebuilt by the first call after its version
+  changed. Once serve_stale is set, the built datasets are served as they are
+  without checking their version, and only refresh rebuilds them, so a
+  background thread can rebuild a dataset while the previous version keeps
+  being served and then swap it in.
+
+  Args:
+      specs (dict[enums.Dataset, DatasetSpec]): The specs of the datasets, each after the datasets it depends on.
+      measured_data_path (str | None): The .env variable holding the path of the csv file the appended measured rows are written to, so they are appended again after a restart, if any."""
+
+  def __init__(self,
+               specs: dict[enums.Dataset, DatasetSpec],
+               measured_data_path: str | None = None) -> None:
+    self._specs = specs
+    self._entries: dict[enums.Dataset, DatasetEntry] = {}
+    self._file_hashes: dict[Path, tuple[tuple[int, int], str]] = {}
+    self._measured_data_path = measured_data_path
+    # the rows appended to each area, one row per index value, replayed when
+    # a dataset is rebuilt, and a running hash of every append; loaded from
+    # the measured data file on first use
+    self._appended: dict[int, pd.DataFrame] | None = None
+    self._appended_digest = ''
+    self._lock = threading.RLock()
+    self.serve_stale = False
+
+  @property
+  def datasets(self) -> list[enums.Dataset]:
+    """The datasets of the store, each after the datasets it depends on."""
+    return list(self._specs)
+
+  def get_frame(self, dataset: enums.Dataset) -> pd.DataFrame:
+    """Returns a read-only view of the dataset, building it if needed.
+
+    Args:
+        dataset (enums.Dataset): The dataset to return.
+
+    Returns:
+        pd.DataFrame: The dataset."""
+    return self._get_entry(dataset).frame.copy(deep=False)
+
+  def get_area_frame(self, dataset: enums.Dataset,
+                     area_id: int) -> pd.DataFrame:
+    """Returns a read-only view of the rows of one area of a partitioned
+    dataset. The rows are a contiguous block so no mask is evaluated.
+
+    Args:
+        dataset (enums.Dataset): The partitioned dataset.
+        area_id (int): The area id.
+
+    Returns:
+        pd.DataFrame: The rows of the area, empty if the area is unknown."""
+    entry = self._get_entry(dataset)
+    rows = entry.partitions.get(area_id, slice(0, 0))
+    return entry.frame.iloc[rows].copy(deep=False)
+
+  def get_area_ids(self, dataset: enums.Dataset) -> list[int]:
+    """Returns the sorted area ids of a partitioned dataset.
+
+    Args:
+        dataset (enums.Dataset): The partitioned dataset.
+
+    Returns:
+        list[int]: The area ids."""
+    return list(self._get_entry(dataset).partitions)
+
+  def get_area_matrix(
+      self, dataset: enums.Dataset,
+      column: str) -> tuple[list[int], pd.Index, npt.NDArray[np.float64]]:
+    """Returns one column of a partitioned dataset as a matrix with one row
+    per area. When all areas share the same index, as for simulated fleets,
+    the matrix is a reshape of the column; otherwise the areas are aligned
+    on the union of their indexes and missing values are NaN.
+
+    Args:
+        dataset (enums.Dataset): The partitioned dataset.
+        column (str): The column to return.
+
+    Returns:
+        tuple[list[int], pd.Index, npt.NDArray[np.float64]]: The area ids, the
+        shared index and the values, of shape (areas, index)."""
+    entry = self._get_entry(dataset)
+    area_column = self._specs[dataset].area_column
+    area_ids = list(entry.partitions)
+    values = entry.frame[column].to_numpy(dtype=np.float64)
+    indexes = [
+        _drop_area_level(entry.frame.index[rows], area_column)
+        for rows in entry.partitions.values()
+    ]
+    if not indexes:
+      return area_ids, entry.frame.index[:0], np.empty((0, 0))
+    if all(index.equals(indexes[0]) for index in indexes[1:]):
+      # the blocks are contiguous and sorted by area, so a reshape is enough
+      return area_ids, indexes[0], values.reshape(len(area_ids),
+                                                  len(indexes[0]))
+    matrix = pd.DataFrame({
+        area_id: pd.Series(values[rows], index=index)
+        for (area_id, rows), index in zip(entry.partitions.items(), indexes)
+    })
+    return area_ids, matrix.index, matrix.to_numpy(dtype=np.float64).T
+
+  def get_version(self, dataset: enums.Dataset) -> str:
+    """Returns the version of the dataset served, without building it.
+
+    Args:
+        dataset (enums.Dataset): The dataset.
+
+    Returns:
+        str: The version of the dataset."""
+    entry = self._entries.get(dataset)
+    if entry is not None and self.serve_stale:
+      return entry.version
+    with self._lock:
+      return self._compute_version(dataset)
+
+  def refresh(self, dataset: enums.Dataset) -> bool:
+    """Rebuilds the dataset if its version changed and swaps it in. The
+    previous version is served while the dataset is rebuilt when serve_stale
+    is set.
+
+    Args:
+        dataset (enums.Dataset): The dataset to refresh.
+
+    Returns:
+        bool: Whether the dataset was rebuilt."""
+    with self._lock:
+      version = self._compute_version(dataset)
+      entry = self._entries.get(dataset)
+      if entry is not None and entry.version == version:
+        return False
+      self._entries[dataset] = self._build_entry(dataset, version)
+      return True
+
+  def append(self, rows: pd.DataFrame, area_column: str) -> list[int]:
+    """Appends new rows to the datasets taking them and updates the datasets
+    depending on them. Only the rows of the areas of the new rows are merged
+    or rebuilt, the other areas are left as they are. A dataset that is not
+    built, was out of date or cannot be rebuilt area by area is dropped and
+    rebuilt on its next use. The rows are kept: the datasets taking them
+    merge every row appended so far to the areas of the new rows, and again
+    whenever they are rebuilt from their sources. A row appended again for
+    the same index value of an area replaces the previous one.
+
+    Args:
+        rows (pd.DataFrame): The new rows.
+        area_column (str): The column of the rows holding the area ids.
+
+    Returns:
+        list[int]: The sorted ids of the areas updated."""
+    area_ids = sorted(int(area_id) for area_id in pd.unique(rows[area_column]))
+    with self._lock:
+      current = {
+          dataset
+          for dataset, entry in self._entries.items()
+          if entry.version == self._compute_version(dataset)
+      }
+      self._merge_appended(rows, area_column)
+      self._write_measured_data(rows)
+      changed: set[enums.Dataset] = set()
+      for dataset, spec in self._specs.items():
+        if spec.append is None and not changed.intersection(spec.depends_on):
+          continue
+        changed.add(dataset)
+        entry = self._entries.pop(dataset, None)
+        if entry is None or dataset not in current:
+          continue
+        if spec.append is not None:
+          frame, partitions = self._append_rows(
+              dataset, entry.frame, entry.partitions,
+              self._get_appended_rows(area_ids))
+        elif spec.per_area and all(dep in self._entries
+                                   for dep in spec.depends_on):
+          built, built_partitions = partition_frame(
+              spec.build(*[
+                  self._get_areas_rows(dep, area_ids)
+                  for dep in spec.depends_on
+              ]), spec.area_column)
+          frame, partitions = replace_area_rows(
+              entry.frame, entry.partitions, {
+                  area_id: built.iloc[built_partitions.get(
+                      area_id, slice(0, 0))]
+                  for area_id in area_ids
+              })
+        else:
+          continue
+        self._entries[dataset] = DatasetEntry(freeze_frame(frame),
+                                              self._compute_version(dataset),
+                                              partitions)
+    return area_ids
+
+  def clear(self) -> None:
+    """Drops every cached dataset. The appended rows are kept."""
+    with self._lock:
+      self._entries.clear()
+      self._file_hashes.clear()
+
+  def _get_entry(self, dataset: enums.Dataset) -> DatasetEntry:
+    entry = self._entries.get(dataset)
+    if entry is not None and self.serve_stale:
+      instrumentation.count_cache('dataset', True)
+      return entry
+    with self._lock:
+      version = self._compute_version(dataset)
+      entry = self._entries.get(dataset)
+      is_stale = entry is None or (entry.version != version
+                                   and not self.serve_stale)
+      instrumentation.count_cache('dataset', not is_stale)
+      if is_stale:
+        entry = self._build_entry(dataset, version)
+        self._entries[dataset] = entry
+      return entry
+
+  def _build_entry(self, dataset: enums.Dataset, version: str) -> DatasetEntry:
+    spec = self._specs[dataset]
+    inputs = [self.get_frame(dep) for dep in spec.depends_on]
+    frame = spec.build(*inputs)
+    partitions: dict[int, slice] = {}
+    if spec.area_column is not None:
+      frame, partitions = partition_frame(frame, spec.area_column)
+    if spec.append is not None:
+      frame, partitions = self._append_rows(dataset, frame, partitions,
+                                            self._get_appended_rows())
+    return DatasetEntry(freeze_frame(frame), version, partitions)
+
+  def _append_rows(
+      self, dataset: enums.Dataset, frame: pd.DataFrame,
+      partitions: dict[int, slice], appended_rows: dict[int, pd.DataFrame]
+  ) -> tuple[pd.DataFrame, dict[int, slice]]:
+    append = self._specs[dataset].append
+    return replace_area_rows(
+        frame, partitions, {
+            area_id:
+            append(frame.iloc[partitions.get(area_id, slice(0, 0))], area_rows)
+            for area_id, area_rows in appended_rows.items()
+        })
+
+  def _get_appended_rows(self,
+                         area_ids: list[int] | None = None
+                         ) -> dict[int, pd.DataFrame]:
+    """Returns the rows appended so far to each area, or to the given areas
+    only."""
+    appended = self._get_appended()
+    if area_ids is None:
+      area_ids = sorted(appended)
+    return {
+        area_id: appended[area_id]
+        for area_id in area_ids if area_id in appended
+    }
+
+  def _get_appended(self) -> dict[int, pd.DataFrame]:
+    if self._appended is None:
+      with self._lock:
+        if self._appended is None:
+          self._appended = {}
+          path = self._get_measured_data_path()
+          if path is not None and path.exists():
+            self._merge_appended(loader.load_measured_data_from_csv(path),
+                                 schema.MeasuredData.AREA_ID)
+    return self._appended
+
+  def _merge_appended(self, rows: pd.DataFrame, area_column: str) -> None:
+    """Merges new rows into the rows appended to their areas, the new rows
+    replacing the rows of the same index value, and updates the running hash
+    of the appended rows."""
+    appended = self._get_appended()
+    for area_id, area_rows in rows.groupby(area_column, sort=True):
+      previous = appended.get(int(area_id))
+      if previous is not None:
+        area_rows = pd.concat([previous, area_rows])
+      area_rows = area_rows[~area_rows.index.duplicated(keep='last')]
+      appended[int(area_id)] = area_rows.sort_index()
+    self._appended_digest = hashlib.sha256(
+        self._appended_digest.encode() +
+        pd.util.hash_pandas_object(rows).to_numpy().tobytes()).hexdigest()
+
+  def _write_measured_data(self, rows: pd.DataFrame) -> None:
+    """Appends new rows to the measured data file, if any."""
+    path = self._get_measured_data_path()
+    if path is None:
+      return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    rows.to_csv(path, mode='a', header=not path.exists())
+
+  def _get_measured_data_path(self) -> Path | None:
+    if self._measured_data_path is None:
+      return None
+    return Path(os.getenv(self._measured_data_path))
+
+  def _get_areas_rows(self, dataset: enums.Dataset,
+                      area_ids: list[int]) -> pd.DataFrame:
+    entry = self._entries[dataset]
+    positions = [
+        np.arange(rows.start, rows.stop) for area_id in area_ids
+        if (rows := entry.partitions.get(area_id)) is not None
+    ]
+    return entry.frame.iloc[np.concatenate(positions) if positions else []]
+
+  def _compute_version(self, dataset: enums.Dataset) -> str:
+    spec = self._specs[dataset]
+    digest = hashlib.sha256(dataset.encode())
+    for env_var in spec.sources:
+      digest.update(self._hash_file(Path(os.getenv(env_var))).encode())
+    if spec.source_version is not None:
+      digest.update(spec.source_version().encode())
+    for dep in spec.depends_on:
+      digest.update(self._compute_version(dep).encode())
+    for env_var in spec.parameters:
+      digest.update(f'{env_var}={os.getenv(env_var)}'.encode())
+    if spec.append is not None:
+      self._get_appended()
+      digest.update(self._appended_digest.encode())
+    return digest.hexdigest()
+
+  def _hash_file(self, path: Path) -> str:
+    """Returns the content hash of a file, only re-reading it when its
+    modification time or size changed since the last call."""
+    stat = path.stat()
+    file_stat = (stat.st_mtime_ns, stat.st_size)
+    cached = self._file_hashes.get(path)
+    instrumentation.count_cache('file_hash', cached is not None
+                                and cached[0] == file_stat)
+    if cached is not None and cached[0] == file_stat:
+      return cached[1]
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+      for block in iter(lambda: file.read(1 << 20), b''):
+        digest.update(block)
+    self._file_hashes[path] = (file_stat, digest.hexdigest())
+    return digest.hexdigest()
+
+
+def freeze_frame(dataf: pd.DataFrame) -> pd.DataFrame:
+  """Returns a copy of the dataframe whose column arrays are read-only.
+
+  Args:
+      dataf (pd.DataFrame): The dataframe to freeze.
+
+  Returns:
+      pd.DataFrame: The read-only dataframe."""
+  columns = {}
+  for col in dataf.columns:
+    values = dataf[col].to_numpy(copy=True)
+    values.flags.writeable = False
+    columns[col] = values
+  return pd.DataFrame(columns, index=dataf.index, copy=False)
+
+
+def partition_frame(dataf: pd.DataFrame,
+                    area_column: str) -> tuple[pd.DataFrame, dict[int, slice]]:
+  """Sorts the dataframe by area, keeping the order of the rows within each
+  area, and returns the positional block of rows of each area.
+
+  Args:
+      dataf (pd.DataFrame): The dataframe to partition.
+      area_column (str): The column or index level holding the area ids.
+
+  Returns:
+      tuple[pd.DataFrame, dict[int, slice]]: The sorted dataframe and the block of each area."""
+  if area_column in dataf.columns:
+    area_ids = dataf[area_column].to_numpy()
+  else:
+    area_ids = dataf.index.get_level_values(area_column).to_numpy()
+  order = np.argsort(area_ids, kind='stable')
+  area_ids = area_ids[order]
+  dataf = dataf.iloc[order]
+  starts = np.flatnonzero(np.r_[True, area_ids[1:] != area_ids[:-1]])
+  stops = np.r_[starts[1:], len(area_ids)]
+  partitions = {
+      int(area_ids[start]): slice(int(start), int(stop))
+      for start, stop in zip(starts, stops)
+  }
+  return dataf, partitions
+
+
+def replace_area_rows(
+    dataf: pd.DataFrame, partitions: dict[int, slice],
+    area_rows: dict[int,
+                    pd.DataFrame]) -> tuple[pd.DataFrame, dict[int, slice]]:
+  """Replaces the rows of some areas of a partitioned dataframe, keeping the
+  areas sorted. The runs of consecutive areas left as they are are copied as
+  single blocks.
+
+  Args:
+      dataf (pd.DataFrame): The dataframe partitioned by area.
+      partitions (dict[int, slice]): The positional block of rows of each area.
+      area_rows (dict[int, pd.DataFrame]): The new rows of each replaced or added area.
+
+  Returns:
+      tuple[pd.DataFrame, dict[int, slice]]: The new dataframe and the block of each area."""
+  blocks: list[pd.DataFrame] = []
+  new_partitions: dict[int, slice] = {}
+  run: slice | None = None
+  nb_rows = 0
+  for area_id in sorted(set(partitions) | set(area_rows)):
+    new_rows = area_rows.get(area_id)
+    if new_rows is None:
+      rows = partitions[area_id]
+      if run is not None and run.stop == rows.start:
+        run = slice(run.start, rows.stop)
+      else:
+        if run is not None:
+          blocks.append(dataf.iloc[run])
+        run = rows
+      length = rows.stop - rows.start
+    else:
+      if run is not None:
+        blocks.append(dataf.iloc[run])
+        run = None
+      blocks.append(new_rows)
+      length = len(new_rows.index)
+    if length:
+      new_partitions[area_id] = slice(nb_rows, nb_rows + length)
+    nb_rows += length
+  if run is not None:
+    blocks.append(dataf.iloc[run])
+  if not blocks:
+    return dataf, new_partitions
+  return pd.concat(blocks), new_partitions
+
+
+def _drop_area_level(index: pd.Index, area_column: str) -> pd.Index:
+  if index.nlevels > 1 and area_column in index.names:
+    return index.droplevel(area_column)
+  return index
+
+
+_STORE = DataStore(DATASET_SPECS, 'MEASURED_DATA_PATH')
+
+
+def get_store() -> DataStore:
+  """Returns the process-wide store.
+
+  Returns:
+      DataStore: The store serving the pages."""
+  return _STORE
+
+
+def set_store(store: DataStore) -> None:
+  """Replaces the process-wide store, e.g. by a store of synthetic fleets to
+  benchmark the pages.
+
+  Args:
+      store (DataStore): The store serving the pages."""
+  global _STORE  # pylint: disable=global-statement
+  _STORE = store
+
+
+def get_frame(dataset: enums.Dataset) -> pd.DataFrame:
+  """Returns a read-only view of a dataset from the process-wide store.
+
+  Args:
+      dataset (enums.Dataset): The dataset to return.
+
+  Returns:
+      pd.DataFrame: The dataset."""
+  dataf = _STORE.get_frame(dataset)
+  instrumentation.add_rows(len(dataf.index))
+  return dataf
+
+
+def get_version(dataset: enums.Dataset) -> str:
+  """Returns the current version of a dataset from the process-wide store.
+
+  Args:
+      dataset (enums.Dataset): The dataset.
+
+  Returns:
+      str: The version of the dataset."""
+  return _STORE.get_version(dataset)
+
+
+def get_area_frame(dataset: enums.Dataset, area_id: int) -> pd.DataFrame:
+  """Returns a read-only view of the rows of one area of a partitioned
+  dataset from the process-wide store.
+
+  Args:
+      dataset (enums.Dataset): The partitioned dataset.
+      area_id (int): The area id.
+
+  Returns:
+      pd.DataFrame: The rows of the area."""
+  dataf = _STORE.get_area_frame(dataset, area_id)
+  instrumentation.add_rows(len(dataf.index))
+  return dataf
+
+
+def get_area_ids(dataset: enums.Dataset) -> list[int]:
+  """Returns the sorted area ids of a partitioned dataset from the
+  process-wide store.
+
+  Args:
+      dataset (enums.Dataset): The partitioned dataset.
+
+  Returns:
+      list[int]: The area ids."""
+  return _STORE.get_area_ids(dataset)
+
+
+def get_area_matrix(
+    dataset: enums.Dataset,
+    column: str) -> tuple[list[int], pd.Index, npt.NDArray[np.float64]]:
+  """Returns one column of a partitioned dataset from the process-wide store
+  as a matrix with one row per area.
+
+  Args:
+      dataset (enums.Dataset): The partitioned dataset.
+      column (str): The column to return.
+
+  Returns:
+      tuple[list[int], pd.Index, npt.NDArray[np.float64]]: The area ids, the
+      shared index and the values, of shape (areas, index)."""
+  return _STORE.get_area_matrix(dataset, column)
+
+
+def append_measured_data(measured: pd.DataFrame) -> list[int]:
+  """Appends new hourly measured indoor air temperatures to the process-wide
+  store, updating the simulation errors, the short term horizon counts and
+  the long term aggregates of the measured areas only.
+
+  Args:
+      measured (pd.DataFrame): The measured data, see schema.MeasuredData.
+
+  Returns:
+      list[int]: The sorted ids of the areas updated.
+
+  Raises:
+      ValueError: If some of the areas are not in the simulation data."""
+  unknown_ids = set(measured[schema.MeasuredData.AREA_ID]) - set(
+      get_area_ids(enums.Dataset.SIMULATION))
+  if unknown_ids:
+    raise ValueError(f'Unknown {schema.MeasuredData.AREA_ID}s: '
+                     f'{sorted(int(area_id) for area_id in unknown_ids)}')
+  return _STORE.append(measured, schema.MeasuredData.AREA_ID)
+
+
+def make_area_key(dataset: enums.Dataset, area_id: int) -> AreaKey:
+  """Returns the key of the rows of one area of a partitioned dataset.
+
+  Args:
+      dataset (enums.Dataset): The partitioned dataset.
+      area_id (int): The area id.
+
+  Returns:
+      AreaKey: The key to keep in a dcc.Store."""
+  return {
+      'dataset': str(dataset),
+      'version': get_version(dataset),
+      'area_id': int(area_id)
+  }
+
+
+def get_area_frame_from_key(key: AreaKey) -> pd.DataFrame:
+  """Returns the rows of one area of a dataset from its key, from the current
+  version of the dataset. A key made from an earlier version of the dataset
+  is counted as a miss of the area_key cache, as the rows served are not the
+  rows the key was made for.
+
+  Args:
+      key (AreaKey): The key made by make_area_key.
+
+  Returns:
+      pd.DataFrame: The rows of the area."""
+  dataset = enums.Dataset(key['dataset'])
+  instrumentation.count_cache('area_key',
+                              key['version'] == get_version(dataset))
+  return get_area_frame(dataset, key['area_id'])
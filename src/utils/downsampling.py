@@ -0,0 +1,123 @@
+"""This file collates the methods to downsample the time series before they are plotted"""
+import os
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from numpy import typing as npt
+
+
+def get_max_plot_points() -> int:
+  """ Returns the maximum number of points per trace from .env, default 2000.
+
+  Returns:
+      int: The maximum number of points per trace."""
+  return int(os.getenv('MAX_PLOT_POINTS', '2000'))
+
+
+def minmax_indices(values: npt.NDArray[np.float64],
+                   nb_buckets: int) -> npt.NDArray[np.int64]:
+  """Select the positions to plot with per-bucket min/max downsampling.
+
+  The series are split into nb_buckets buckets of consecutive points, and the
+  position of the minimum and of the maximum of every series in every bucket
+  is kept, with the first and last points. Every peak, and thus every hour
+  above the overheating threshold in a bucket, is kept as the bucket maximum.
+  The positions are shared by all series so they can be drawn on the same x.
+
+  Arguments:
+      values (npt.NDArray[np.float64]): The series, of shape (series, points).
+      nb_buckets (int): The number of buckets.
+
+  Returns:
+      npt.NDArray[np.int64]: The sorted positions to keep.
+  """
+  nb_series, nb_points = values.shape
+  bucket_size = int(np.ceil(nb_points / max(nb_buckets, 1)))
+  if bucket_size <= 1:
+    return np.arange(nb_points)
+  nb_buckets = int(np.ceil(nb_points / bucket_size))
+  padding = nb_buckets * bucket_size - nb_points
+  nan_values = np.isnan(values)
+  buckets_max = np.pad(np.where(nan_values, -np.inf, values),
+                       ((0, 0), (0, padding)),
+                       constant_values=-np.inf).reshape(
+                           nb_series, nb_buckets, bucket_size)
+  buckets_min = np.pad(np.where(nan_values, np.inf, values),
+                       ((0, 0), (0, padding)),
+                       constant_values=np.inf).reshape(nb_series, nb_buckets,
+                                                       bucket_size)
+  bucket_starts = np.arange(nb_buckets) * bucket_size
+  positions = np.concatenate([
+      (buckets_max.argmax(axis=2) + bucket_starts).ravel(),
+      (buckets_min.argmin(axis=2) + bucket_starts).ravel(),
+      [0, nb_points - 1],
+  ])
+  return np.unique(np.minimum(positions, nb_points - 1))
+
+
+def downsample_frame(dataf: pd.DataFrame,
+                     max_points: int | None = None) -> pd.DataFrame:
+  """Downsample the numeric columns of a frame to at most max_points rows
+  with min/max downsampling, the first and last rows included. Frames already
+  small enough are returned as is.
+
+  Arguments:
+      dataf (pd.DataFrame): The frame to downsample.
+      max_points (int | None): The maximum number of rows, default MAX_PLOT_POINTS from .env.
+
+  Returns:
+      pd.DataFrame: The downsampled frame.
+  """
+  if max_points is None:
+    max_points = get_max_plot_points()
+  if len(dataf.index) <= max_points:
+    return dataf
+  values = dataf.select_dtypes('number').to_numpy(dtype=np.float64).T
+  # a minimum and a maximum per series and bucket, plus the first and last
+  # rows; at least one bucket even if max_points is too small for it
+  nb_buckets = max((max_points - 2) // (2 * max(values.shape[0], 1)), 1)
+  return dataf.iloc[minmax_indices(values, nb_buckets)]
+
+
+def get_x_range(relayout_data: dict[str, Any] | None) -> list[Any] | None:
+  """Get the zoomed x axis range from the relayoutData of a dcc.Graph.
+
+  Arguments:
+      relayout_data (dict[str, Any] | None): The relayoutData of the graph.
+
+  Returns:
+      list[Any] | None: The start and end of the x axis, None if not zoomed.
+  """
+  if not relayout_data or relayout_data.get('xaxis.autorange'):
+    return None
+  if 'xaxis.range[0]' in relayout_data and 'xaxis.range[1]' in relayout_data:
+    return [relayout_data['xaxis.range[0]'], relayout_data['xaxis.range[1]']]
+  return relayout_data.get('xaxis.range')
+
+
+def filter_x_range(dataf: pd.DataFrame,
+                   x_range: list[Any] | None) -> pd.DataFrame:
+  """Keep the rows of a time-indexed frame within a zoomed x axis range.
+
+  Arguments:
+      dataf (pd.DataFrame): The frame, with a sorted DatetimeIndex.
+      x_range (list[Any] | None): The start and end of the x axis, as displayed by plotly.
+
+  Returns:
+      pd.DataFrame: The rows within the range, all rows if x_range is None.
+  """
+  if x_range is None:
+    return dataf
+  start, end = (_to_index_timezone(pd.Timestamp(x), dataf.index.tz)
+                for x in x_range)
+  first, last = dataf.index.searchsorted([start, end], side='left')
+  # keep one point either side so the lines reach the edges of the graph
+  return dataf.iloc[max(first - 1, 0):last + 1]
+
+
+def _to_index_timezone(timestamp: pd.Timestamp, tz: Any) -> pd.Timestamp:
+  # plotly drops the UTC offset and displays the wall time of the index
+  if timestamp.tzinfo is None:
+    return timestamp.tz_localize(tz)
+  return timestamp.tz_convert(tz)
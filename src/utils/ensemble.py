@@ -0,0 +1,149 @@
+"""Monte Carlo ensemble forecaster of the indoor and outdoor air temperatures.
+
+Every member of the ensemble perturbs the outdoor air temperature forecast
+with AR(1) noise and the resistance and capacitance of the dwelling with
+log-normal noise, and runs the 1R1C thermal model. The indoor air temperature
+of a member is the baseline forecast plus the difference between the
+perturbed and unperturbed thermal model responses, so the ensemble spreads
+around the baseline. The percentiles are taken along the ensemble axis."""
+import os
+from dataclasses import dataclass
+
+import numpy as np
+from numpy import typing as npt
+
+from . import thermal_model
+
+PERCENTILES = (10, 50, 90)
+# number of (member, dwelling, hour) values simulated at once
+BLOCK_CELLS = 2**23
+
+
+@dataclass(frozen=True)
+class EnsembleSettings:
+  """The size and the perturbations of the ensemble.
+
+  Attributes:
+      nb_members (int): The number of members.
+      oat_std (float): The standard deviation of the outdoor air temperature noise [degreeC].
+      oat_autocorrelation (float): The hour-to-hour autocorrelation of the outdoor air temperature noise.
+      parameter_std (float): The standard deviation of the log of the resistance and capacitance.
+      seed (int): The seed of the random generator."""
+  nb_members: int = 200
+  oat_std: float = 1.5
+  oat_autocorrelation: float = 0.95
+  parameter_std: float = 0.1
+  seed: int = 0
+
+
+def get_ensemble_settings() -> EnsembleSettings:
+  """Get the ensemble settings from ENSEMBLE_MEMBERS, ENSEMBLE_OAT_STD,
+  ENSEMBLE_OAT_AUTOCORRELATION, ENSEMBLE_PARAMETER_STD and ENSEMBLE_SEED in
+  .env.
+
+  Returns:
+      EnsembleSettings: The ensemble settings.
+  """
+  default = EnsembleSettings()
+  return EnsembleSettings(
+      nb_members=int(os.getenv('ENSEMBLE_MEMBERS', default.nb_members)),
+      oat_std=float(os.getenv('ENSEMBLE_OAT_STD', default.oat_std)),
+      oat_autocorrelation=float(
+          os.getenv('ENSEMBLE_OAT_AUTOCORRELATION',
+                    default.oat_autocorrelation)),
+      parameter_std=float(
+          os.getenv('ENSEMBLE_PARAMETER_STD', default.parameter_std)),
+      seed=int(os.getenv('ENSEMBLE_SEED', default.seed)))
+
+
+def ar1_noise(rng: np.random.Generator, shape: tuple[int, ...], std: float,
+              autocorrelation: float) -> npt.NDArray[np.float64]:
+  """Draw stationary AR(1) noise along the last axis.
+
+  Arguments:
+      rng (np.random.Generator): The random generator.
+      shape (tuple[int, ...]): The shape of the noise, hours last.
+      std (float): The standard deviation of the noise.
+      autocorrelation (float): The autocorrelation between consecutive hours.
+
+  Returns:
+      npt.NDArray[np.float64]: The noise.
+  """
+  # time-major so every step reads and writes one contiguous row
+  innovations = rng.standard_normal((shape[-1], ) + shape[:-1]) * std
+  innovations[1:] *= np.sqrt(1 - autocorrelation**2)
+  noise = np.empty_like(innovations)
+  noise[0] = innovations[0]
+  for k in range(1, len(noise)):
+    noise[k] = autocorrelation * noise[k - 1] + innovations[k]
+  return np.moveaxis(noise, 0, -1)
+
+
+def forecast_percentiles(
+    outdoor_temperature: npt.NDArray[np.float64],
+    heat_gains: npt.NDArray[np.float64],
+    baseline_temperature: npt.NDArray[np.float64],
+    resistance: npt.ArrayLike,
+    capacitance: npt.ArrayLike,
+    settings: EnsembleSettings | None = None,
+    percentiles: tuple[float, ...] = PERCENTILES
+) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+  """Forecast the percentiles of the outdoor and indoor air temperatures of
+  dwellings with a Monte Carlo ensemble of 1R1C thermal model runs.
+
+  The dwellings are simulated in blocks of at most BLOCK_CELLS values, each
+  block drawing from its own generator seeded from the settings, so the
+  memory is bounded and the forecast is reproducible.
+
+  Arguments:
+      outdoor_temperature (npt.NDArray[np.float64]): The outdoor air temperature forecast [degreeC], of shape (dwellings, hours).
+      heat_gains (npt.NDArray[np.float64]): The heating output and internal and solar gains [kW], of shape (dwellings, hours).
+      baseline_temperature (npt.NDArray[np.float64]): The indoor air temperature forecast [degreeC], of shape (dwellings, hours).
+      resistance (npt.ArrayLike): The resistance R of each dwelling [K/kW], of shape (dwellings,).
+      capacitance (npt.ArrayLike): The capacitance C of each dwelling [kWh/K], of shape (dwellings,).
+      settings (EnsembleSettings | None): The ensemble settings, default from .env.
+      percentiles (tuple[float, ...]): The percentiles to return.
+
+  Returns:
+      tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]: The percentiles of the outdoor and of the indoor air temperatures, each of shape (percentiles, dwellings, hours).
+  """
+  if settings is None:
+    settings = get_ensemble_settings()
+  resistance = np.asarray(resistance, dtype=np.float64)
+  capacitance = np.asarray(capacitance, dtype=np.float64)
+  nb_dwellings, nb_hours = outdoor_temperature.shape
+  nb_members = settings.nb_members
+  block_size = max(1, BLOCK_CELLS // (nb_members * nb_hours))
+  oat_percentiles = np.empty((len(percentiles), nb_dwellings, nb_hours))
+  iat_percentiles = np.empty((len(percentiles), nb_dwellings, nb_hours))
+  for start in range(0, nb_dwellings, block_size):
+    block = slice(start, min(start + block_size, nb_dwellings))
+    rng = np.random.default_rng([settings.seed, start])
+    oat = outdoor_temperature[block]
+    gains = heat_gains[block]
+    baseline = baseline_temperature[block]
+    members_shape = (nb_members, ) + oat.shape
+    members_oat = oat + ar1_noise(rng, members_shape, settings.oat_std,
+                                  settings.oat_autocorrelation)
+    parameter_noise = np.exp(
+        rng.standard_normal(
+            (2, nb_members, len(oat))) * settings.parameter_std)
+    members_response = thermal_model.simulate_1r1c(
+        members_oat.reshape(-1, nb_hours),
+        np.broadcast_to(gains, members_shape).reshape(-1, nb_hours),
+        (resistance[block] * parameter_noise[0]).ravel(),
+        (capacitance[block] * parameter_noise[1]).ravel(),
+        np.broadcast_to(baseline[:, 0], members_shape[:2]).ravel())
+    response = thermal_model.simulate_1r1c(oat, gains, resistance[block],
+                                           capacitance[block], baseline[:, 0])
+    members_iat = baseline + (members_response.reshape(members_shape) -
+                              response)
+    oat_percentiles[:, block] = np.percentile(members_oat,
+                                              percentiles,
+                                              axis=0,
+                                              method='linear')
+    iat_percentiles[:, block] = np.percentile(members_iat,
+                                              percentiles,
+                                              axis=0,
+                                              method='linear')
+  return oat_percentiles, iat_percentiles
@@ -3,3 +3,13 @@ from enum import StrEnum
 
 class PlotType(StrEnum):
     LINE_PLOT = 'line-plot'
+
+
+class Dataset(StrEnum):
+    SIMULATION = 'simulation'
+    SIMULATION_ERRORS = 'simulation-errors'
+    SHORT_TERM_FORECAST = 'short-term-forecast'
+    SHORT_TERM_OVERHEATING_TABLE = 'short-term-overheating-table'
+    LONG_TERM_OVERHEATING_HOURS = 'long-term-overheating-hours'
+    LONG_TERM_OVERHEATING_PERCT = 'long-term-overheating-percentage'
+    LONG_TERM_OVERHEATING_TABLE = 'long-term-overheating-table'
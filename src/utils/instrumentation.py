@@ -0,0 +1,313 @@
+"""Instrumentation of the callbacks, loader stages and caches of the app.
+
+The wall time, rows read and response payload of every Dash callback, the
+wall time and output rows of every loader stage and the hits and misses of
+every cache are kept in process-wide metrics and rendered in the Prometheus
+text format by the /metrics route. The rows of a callback are those of the
+frames it reads from the data store and the row model during its request.
+
+When PROFILE_SLOW_REQUESTS_SECONDS is set in .env, every request runs under
+cProfile and the profile of the requests slower than that many seconds is
+dumped to PROFILE_DIR, to be opened with pstats or snakeviz.
+
+Only the standard library is imported, so the app starts without loading the
+datasets' stack."""
+from __future__ import annotations
+
+import contextvars
+import cProfile
+import functools
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                    10.0, 30.0)
+
+_LOCK = threading.Lock()
+_Function = TypeVar('_Function', bound=Callable[..., Any])
+
+
+class Summary:
+  """The sum and count of the observations of a metric per label values."""
+  kind = 'summary'
+
+  def __init__(self, name: str, documentation: str,
+               label_names: tuple[str, ...]) -> None:
+    self.name = name
+    self.documentation = documentation
+    self.label_names = label_names
+    self._sums: dict[tuple[str, ...], float] = {}
+    self._counts: dict[tuple[str, ...], int] = {}
+
+  def observe(self, labels: tuple[str, ...], value: float) -> None:
+    """Adds an observation.
+
+    Args:
+        labels (tuple[str, ...]): The label values, in the order of label_names.
+        value (float): The observed value."""
+    with _LOCK:
+      self._sums[labels] = self._sums.get(labels, 0.0) + value
+      self._counts[labels] = self._counts.get(labels, 0) + 1
+
+  def collect(self) -> list[str]:
+    """Returns the lines of the metric in the Prometheus text format."""
+    lines = [
+        f'# HELP {self.name} {self.documentation}',
+        f'# TYPE {self.name} {self.kind}'
+    ]
+    with _LOCK:
+      for labels in sorted(self._counts):
+        lines.extend(self._collect_labels(labels))
+    return lines
+
+  def clear(self) -> None:
+    """Drops every observation."""
+    with _LOCK:
+      self._sums.clear()
+      self._counts.clear()
+
+  def _collect_labels(self, labels: tuple[str, ...]) -> list[str]:
+    label_text = _format_labels(self.label_names, labels)
+    return [
+        f'{self.name}_sum{label_text} {self._sums[labels]!r}',
+        f'{self.name}_count{label_text} {self._counts[labels]}'
+    ]
+
+
+class Histogram(Summary):
+  """The sum, count and cumulative bucket counts of the observations of a
+  metric per label values."""
+  kind = 'histogram'
+
+  def __init__(self,
+               name: str,
+               documentation: str,
+               label_names: tuple[str, ...],
+               buckets: tuple[float, ...] = DURATION_BUCKETS) -> None:
+    super().__init__(name, documentation, label_names)
+    self.buckets = buckets
+    self._bucket_counts: dict[tuple[str, ...], list[int]] = {}
+
+  def observe(self, labels: tuple[str, ...], value: float) -> None:
+    super().observe(labels, value)
+    with _LOCK:
+      counts = self._bucket_counts.setdefault(labels, [0] * len(self.buckets))
+      for i, upper_bound in enumerate(self.buckets):
+        if value <= upper_bound:
+          counts[i] += 1
+
+  def clear(self) -> None:
+    super().clear()
+    with _LOCK:
+      self._bucket_counts.clear()
+
+  def _collect_labels(self, labels: tuple[str, ...]) -> list[str]:
+    lines = []
+    for upper_bound, count in zip(self.buckets, self._bucket_counts[labels]):
+      label_text = _format_labels(self.label_names + ('le', ),
+                                  labels + (repr(upper_bound), ))
+      lines.append(f'{self.name}_bucket{label_text} {count}')
+    label_text = _format_labels(self.label_names + ('le', ),
+                                labels + ('+Inf', ))
+    lines.append(f'{self.name}_bucket{label_text} {self._counts[labels]}')
+    return lines + super()._collect_labels(labels)
+
+
+class Counter(Summary):
+  """The running total of a metric per label values."""
+  kind = 'counter'
+
+  def inc(self, labels: tuple[str, ...], amount: float = 1) -> None:
+    """Adds to the total.
+
+    Args:
+        labels (tuple[str, ...]): The label values, in the order of label_names.
+        amount (float): The amount to add."""
+    self.observe(labels, amount)
+
+  def _collect_labels(self, labels: tuple[str, ...]) -> list[str]:
+    label_text = _format_labels(self.label_names, labels)
+    return [f'{self.name}_total{label_text} {self._sums[labels]!r}']
+
+
+CALLBACK_DURATION = Histogram('dash_callback_duration_seconds',
+                              'Wall time of the Dash callbacks.',
+                              ('callback', 'output'))
+CALLBACK_ROWS = Summary(
+    'dash_callback_rows',
+    'Rows read from the data store and the row model by the Dash callbacks.',
+    ('callback', 'output'))
+CALLBACK_PAYLOAD = Summary('dash_callback_payload_bytes',
+                           'Response payload of the Dash callbacks.',
+                           ('callback', 'output'))
+STAGE_DURATION = Histogram('loader_stage_duration_seconds',
+                           'Wall time of the loader stages.', ('stage', ))
+STAGE_ROWS = Summary('loader_stage_rows', 'Output rows of the loader stages.',
+                     ('stage', ))
+CACHE_REQUESTS = Counter('cache_requests', 'Lookups of the caches.',
+                         ('cache', 'result'))
+METRICS = (CALLBACK_DURATION, CALLBACK_ROWS, CALLBACK_PAYLOAD, STAGE_DURATION,
+           STAGE_ROWS, CACHE_REQUESTS)
+
+# the rows read during the current request, None outside of a request
+_REQUEST_ROWS = contextvars.ContextVar[list[int] | None]('request_rows',
+                                                         default=None)
+
+
+@dataclass
+class RequestTrace:
+  """The measurements of a request in progress.
+
+  Attributes:
+      start (float): The perf_counter at the start of the request.
+      rows (list[int]): The rows read so far, in a single item list.
+      profiler (cProfile.Profile | None): The profiler of the request, if slow requests are profiled."""
+  start: float
+  rows: list[int] = field(default_factory=lambda: [0])
+  profiler: cProfile.Profile | None = None
+
+
+def start_request() -> RequestTrace:
+  """Starts measuring a request, and profiling it when
+  PROFILE_SLOW_REQUESTS_SECONDS is set in .env.
+
+  Returns:
+      RequestTrace: The measurements of the request, to pass to end_request."""
+  trace = RequestTrace(start=time.perf_counter())
+  _REQUEST_ROWS.set(trace.rows)
+  if os.getenv('PROFILE_SLOW_REQUESTS_SECONDS'):
+    trace.profiler = cProfile.Profile()
+    trace.profiler.enable()
+  return trace
+
+
+def end_request(trace: RequestTrace, name: str, callback: str | None,
+                output: str | None, payload_bytes: int) -> float:
+  """Stops measuring a request, records it when it ran a callback and dumps
+  its profile when it was slower than PROFILE_SLOW_REQUESTS_SECONDS.
+
+  Args:
+      trace (RequestTrace): The measurements of the request.
+      name (str): The name of the request in the profile file name.
+      callback (str | None): The name of the callback run, if any.
+      output (str | None): The output of the callback run, if any.
+      payload_bytes (int): The size of the response.
+
+  Returns:
+      float: The wall time of the request [s]."""
+  duration = time.perf_counter() - trace.start
+  _REQUEST_ROWS.set(None)
+  if callback is not None:
+    labels = (callback, output or '')
+    CALLBACK_DURATION.observe(labels, duration)
+    CALLBACK_ROWS.observe(labels, trace.rows[0])
+    CALLBACK_PAYLOAD.observe(labels, payload_bytes)
+  if trace.profiler is not None:
+    trace.profiler.disable()
+    if duration >= float(os.getenv('PROFILE_SLOW_REQUESTS_SECONDS')):
+      dump_profile(trace.profiler, name, duration)
+  return duration
+
+
+def dump_profile(profiler: cProfile.Profile, name: str,
+                 duration: float) -> Path:
+  """Dumps the profile of a slow request to PROFILE_DIR.
+
+  Args:
+      profiler (cProfile.Profile): The profiler of the request.
+      name (str): The name of the request.
+      duration (float): The wall time of the request [s].
+
+  Returns:
+      Path: The profile file."""
+  profile_dir = Path(os.getenv('PROFILE_DIR', 'profiles'))
+  profile_dir.mkdir(parents=True, exist_ok=True)
+  path = profile_dir / (f'{datetime.now():%Y%m%dT%H%M%S%f}_'
+                        f'{re.sub(r"[^A-Za-z0-9_.-]+", "_", name)}_'
+                        f'{duration * 1000:.0f}ms.prof')
+  profiler.dump_stats(path)
+  logger.info('Slow request %s took %.2f s, profile dumped to %s', name,
+              duration, path)
+  return path
+
+
+def add_rows(nb_rows: int) -> None:
+  """Adds rows read to the current request, if any.
+
+  Args:
+      nb_rows (int): The number of rows read."""
+  rows = _REQUEST_ROWS.get()
+  if rows is not None:
+    rows[0] += nb_rows
+
+
+def count_cache(cache: str, hit: bool) -> None:
+  """Counts a lookup of a cache.
+
+  Args:
+      cache (str): The name of the cache.
+      hit (bool): Whether the value was found in the cache."""
+  CACHE_REQUESTS.inc((cache, 'hit' if hit else 'miss'))
+
+
+def stage(function: _Function) -> _Function:
+  """Decorates a loader function to record its wall time and the rows of the
+  frame it returns, under its module and name, e.g. loader.get_overheating_df.
+
+  Args:
+      function (_Function): The loader function.
+
+  Returns:
+      _Function: The recorded function."""
+
+  labels = (f'{function.__module__.rsplit(".", 1)[-1]}.{function.__name__}', )
+
+  @functools.wraps(function)
+  def recorded(*args: Any, **kwargs: Any) -> Any:
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    STAGE_DURATION.observe(labels, time.perf_counter() - start)
+    if hasattr(result, 'index'):
+      STAGE_ROWS.observe(labels, len(result.index))
+    return result
+
+  return recorded  # type: ignore[return-value]
+
+
+def render_metrics() -> str:
+  """Renders every metric in the Prometheus text format.
+
+  Returns:
+      str: The metrics."""
+  lines = []
+  for metric in METRICS:
+    lines.extend(metric.collect())
+  return '\n'.join(lines) + '\n'
+
+
+def clear_metrics() -> None:
+  """Drops the observations of every metric."""
+  for metric in METRICS:
+    metric.clear()
+
+
+def _format_labels(label_names: tuple[str, ...], labels: tuple[str,
+                                                               ...]) -> str:
+  """Formats label values as {name="value",...}, escaped as in the Prometheus
+  text format."""
+  pairs = []
+  for label_name, label in zip(label_names, labels):
+    escaped = label.replace('\\', r'\\').replace('"',
+                                                 r'\"').replace('\n', r'\n')
+    pairs.append(f'{label_name}="{escaped}"')
+  return '{' + ','.join(pairs) + '}'
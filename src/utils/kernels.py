@@ -0,0 +1,48 @@
+"""This file collates the NumPy-vectorized kernels used to flag and format the overheating results"""
+import numpy as np
+from numpy import typing as npt
+
+
+def flag_above_threshold(values: npt.ArrayLike,
+                         threshold: float,
+                         inclusive: bool = False) -> npt.NDArray[np.int64]:
+  """Flag the values above a threshold with 1 and the others, including NaNs, with 0.
+
+  Arguments:
+      values (npt.ArrayLike): The values to be flagged.
+      threshold (float): The threshold value.
+      inclusive (bool): Whether values equal to the threshold are flagged.
+
+  Returns:
+      npt.NDArray[np.int64]: The flags.
+  """
+  values = np.asarray(values, dtype=np.float64)
+  if inclusive:
+    return (values >= threshold).astype(np.int64)
+  return (values > threshold).astype(np.int64)
+
+
+def format_risk_of_overheating(
+    risk_percentages: npt.ArrayLike) -> npt.NDArray[np.object_]:
+  """Format risks of overheating given in percentage of summers as text,
+  e.g. 25 becomes '1 out of 4 summers' and 0 becomes 'None'.
+
+  Each distinct risk is formatted once and broadcast back to the input, as
+  the number of distinct values is bounded by the number of projected years.
+
+  Arguments:
+      risk_percentages (npt.ArrayLike): The risks of overheating [%].
+
+  Returns:
+      npt.NDArray[np.object_]: The risks as text.
+  """
+  risks = np.asarray(risk_percentages, dtype=np.float64) / 100
+  unique_risks, inverse = np.unique(risks, return_inverse=True)
+  with np.errstate(divide='ignore'):
+    nb_summers = 1 / unique_risks
+  labels = np.array([
+      'None' if risk == 0 else f'1 out of {summers:.0f} summers'
+      for risk, summers in zip(unique_risks, nb_summers)
+  ],
+                    dtype=object)
+  return labels[inverse.reshape(risks.shape)]
@@ -0,0 +1,66 @@
+"""Deferred imports of the heavy dependencies of the pages.
+
+Dash sends the callback graph to the browser once, when the app is first
+loaded, so the page modules and their callbacks are registered at start-up.
+Their heavy dependencies (pandas, plotly, dash_ag_grid, e2sviz, ...) are
+bound to module proxies instead, which import the real module on first
+attribute access, i.e. the first time a route using them is displayed or one
+of their callbacks runs. The page modules use `from __future__ import
+annotations` so their type hints do not trigger the imports. The time taken
+by every deferred import is logged and kept in IMPORT_TIMES."""
+import importlib
+import logging
+import sys
+import threading
+import time
+import types
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+IMPORT_TIMES: dict[str, float] = {}
+_LOCK = threading.Lock()
+
+
+class LazyModule(types.ModuleType):
+  """Proxy importing a module on first attribute access."""
+
+  def __init__(self, name: str) -> None:
+    super().__init__(name)
+    self._module: types.ModuleType | None = None
+
+  def __getattr__(self, attribute: str) -> Any:
+    return getattr(self._load(), attribute)
+
+  def __dir__(self) -> list[str]:
+    return dir(self._load())
+
+  def _load(self) -> types.ModuleType:
+    module = self.__dict__['_module']
+    if module is None:
+      with _LOCK:
+        module = self.__dict__['_module']
+        if module is None:
+          already_imported = self.__name__ in sys.modules
+          start = time.perf_counter()
+          module = importlib.import_module(self.__name__)
+          if not already_imported:
+            IMPORT_TIMES[self.__name__] = time.perf_counter() - start
+            logger.info('Deferred import of %s took %.3f s', self.__name__,
+                        IMPORT_TIMES[self.__name__])
+        self.__dict__['_module'] = module
+    return module
+
+
+def lazy_module(name: str) -> types.ModuleType:
+  """Returns a proxy of a module that imports it on first use. The module is
+  returned as is if it was already imported.
+
+  Args:
+      name (str): The absolute name of the module, e.g. 'plotly.express'.
+
+  Returns:
+      types.ModuleType: The module or its proxy."""
+  if name in sys.modules:
+    return sys.modules[name]
+  return LazyModule(name)
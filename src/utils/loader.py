@@ -1,8 +1,7 @@
 import os
 from pathlib import Path
-from typing import Any
+from typing import IO, Any, Iterator
 
-import icecream as ic
 import numpy as np
 import pandas as pd
 from e2sviz.data import standard_data_process as sdp
@@ -10,7 +9,12 @@ from e2sviz.structure import enums as viz_enums
 from e2sviz.structure import viz_schema
 from numpy import typing as npt
 
-from . import schema
+from . import (calibration, columnar_cache, comfort_criteria, ensemble,
+               instrumentation, kernels, loss_functions, schema, thermal_model)
+
+# the number of indoor air temperature thresholds per degreeC of the long term
+# what-if, i.e. a threshold every 0.1 degreeC
+IAT_THRESHOLDS_PER_DEGREE = 10
 
 
 def load_data_from_csv(path: Path) -> pd.DataFrame:
@@ -25,26 +29,36 @@ def load_data_from_csv(path: Path) -> pd.DataFrame:
   return df
 
 
-def get_dummy_simulation_data() -> pd.DataFrame:
+@instrumentation.stage
+def get_dummy_simulation_data(
+    area_ids: list[int] | None = None) -> pd.DataFrame:
   """ Loads the simulation data  for nb dwellings.
   
+  Args:
+      area_ids (list[int] | None): The Area_IDs of the dwellings to create, default the nb dwellings.
+  
   Returns:
       pd.DataFrame: The simulation data for nb dwellings."""
   dataf = load_simulation_data()
-  return duplicates_dummy_simulation_data(dataf)
+  return duplicates_dummy_simulation_data(dataf, area_ids)
 
 
-def duplicates_dummy_simulation_data(org_dataf: pd.DataFrame) -> pd.DataFrame:
+def duplicates_dummy_simulation_data(
+    org_dataf: pd.DataFrame,
+    area_ids: list[int] | None = None) -> pd.DataFrame:
   """ Duplicates the simulation data for nb dwellings. nb = 3. 
   
   Args:
       org_dataf (pd.DataFrame): The original simulation data.
+      area_ids (list[int] | None): The Area_IDs of the dwellings to create, default the nb dwellings.
       
   Returns:
       pd.DataFrame: The duplicated simulation data for nb dwellings."""
   nb_dwellings = 3
+  if area_ids is None:
+    area_ids = list(range(nb_dwellings))
   frames = []
-  for i in range(nb_dwellings):
+  for i in area_ids:
     copy_simulation_df = org_dataf.copy()
     copy_simulation_df[schema.SimulationData.AREA_ID] = i
     copy_simulation_df[
@@ -54,15 +68,250 @@ def duplicates_dummy_simulation_data(org_dataf: pd.DataFrame) -> pd.DataFrame:
   return pd.concat(frames)
 
 
+def load_measured_data_from_csv(path: Path | IO[str]) -> pd.DataFrame:
+  """ Loads new hourly measured indoor air temperatures from a csv file, with
+    the datetime as first column and the Area_ID and measured indoor air
+    temperature columns.
+  
+  Args:
+      path (Path | IO[str]): The path to the csv file or the csv file itself.
+  
+  Returns:
+      pd.DataFrame: The measured data.
+
+  Raises:
+      ValueError: If the file is not a csv file with the required columns, parseable datetimes, integer Area_IDs and numeric temperatures."""
+  dataf = pd.read_csv(path, index_col=0)
+  columns = [schema.MeasuredData.AREA_ID, schema.MeasuredData.MEASURED_IAT]
+  missing_columns = [
+      column for column in columns if column not in dataf.columns
+  ]
+  if missing_columns:
+    raise ValueError(f'Missing columns: {missing_columns}')
+  try:
+    dataf.index = pd.to_datetime(dataf.index, format="%Y-%m-%d %H:%M:%S%z")
+  except (TypeError, ValueError) as error:
+    raise ValueError(
+        f'Unparseable {schema.MeasuredData.DATETIME}: {str(error).splitlines()[0]}'
+    ) from error
+  dataf.index.name = schema.MeasuredData.DATETIME
+  try:
+    return dataf[columns].astype({
+        schema.MeasuredData.AREA_ID: np.int64,
+        schema.MeasuredData.MEASURED_IAT: np.float64
+    })
+  except (TypeError, ValueError) as error:
+    raise ValueError(f'Invalid values: {error}') from error
+
+
+def append_measured_simulation_data(area_df: pd.DataFrame,
+                                    measured_df: pd.DataFrame) -> pd.DataFrame:
+  """ Merges new measured indoor air temperatures of a dwelling into its
+    simulation data. The measured values of existing hours are replaced and
+    new hours are added, without simulated values.
+  
+  Args:
+      area_df (pd.DataFrame): The simulation data of the dwelling.
+      measured_df (pd.DataFrame): Every measured data of the dwelling appended so far.
+  
+  Returns:
+      pd.DataFrame: The simulation data of the dwelling with the measured data."""
+  measured_iat = _get_measured_iat(measured_df)
+  dataf = area_df.reindex(area_df.index.union(measured_iat.index))
+  dataf[schema.SimulationData.MEASURED_IAT] = measured_iat.reindex(
+      dataf.index).fillna(dataf[schema.SimulationData.MEASURED_IAT])
+  dataf[schema.SimulationData.AREA_ID] = measured_df[
+      schema.MeasuredData.AREA_ID].iloc[0]
+  return dataf.astype(area_df.dtypes)
+
+
+@instrumentation.stage
+def get_simulation_errors(dataf: pd.DataFrame) -> pd.DataFrame:
+  """ Calculate the RMSE, MAE, MSE, bias and CV(RMSE) between the predicted
+    and measured indoor air temperatures of every dwelling at once, over the
+    hours with both values. The hours of each dwelling are laid out as a row
+    of a (dwellings, hours) matrix, padded with NaN.
+  
+  Args:
+      dataf (pd.DataFrame): The simulation data.
+  
+  Returns:
+      pd.DataFrame: The errors of each dwelling, indexed by Area_ID."""
+  area_ids, (predicted, measured) = _get_area_matrices(dataf, [
+      dataf[schema.SimulationData.PREDICTED_IAT],
+      dataf[schema.SimulationData.MEASURED_IAT]
+  ])
+  errors = loss_functions.calculate_error_metrics(predicted, measured)
+  return pd.DataFrame(
+      {
+          schema.SimulationErrors.RMSE: errors['RMSE'],
+          schema.SimulationErrors.MAE: errors['MAE'],
+          schema.SimulationErrors.MSE: errors['MSE'],
+          schema.SimulationErrors.BIAS: errors['Bias'],
+          schema.SimulationErrors.CV_RMSE: errors['CV(RMSE)'],
+      },
+      index=pd.Index(area_ids, name=schema.SimulationErrors.AREA_ID))
+
+
+@instrumentation.stage
+def get_calibrated_parameters(dataf: pd.DataFrame) -> pd.DataFrame:
+  """ Fit the resistance and capacitance of the 1R1C thermal model of every
+    dwelling at once to its measured indoor air temperature, starting from
+    the default parameters, and calculate the errors of the calibrated model
+    over the measured hours.
+  
+  Args:
+      dataf (pd.DataFrame): The simulation data, with the outdoor air temperature, gains, heating output and measured indoor air temperature of each dwelling.
+  
+  Returns:
+      pd.DataFrame: The resistance, capacitance, RMSE, MAE, MSE, bias and CV(RMSE) of each dwelling, indexed by Area_ID."""
+  area_ids, (oat, gains,
+             measured) = _get_area_matrices(dataf, [
+                 dataf[schema.SimulationData.OAT],
+                 thermal_model.get_heat_gains(dataf),
+                 dataf[schema.SimulationData.MEASURED_IAT]
+             ])
+  parameters = thermal_model.get_default_parameters(list(area_ids))
+  resistance, capacitance = calibration.calibrate_1r1c(
+      oat, gains, measured,
+      parameters[schema.ThermalModelParameters.RESISTANCE],
+      parameters[schema.ThermalModelParameters.CAPACITANCE])
+  simulated = thermal_model.simulate_1r1c(
+      oat,
+      gains,
+      resistance,
+      capacitance,
+      calibration.get_initial_temperature(measured),
+      first_hour=calibration.get_first_measured_hour(measured))
+  errors = loss_functions.calculate_error_metrics(simulated, measured)
+  return pd.DataFrame(
+      {
+          schema.ThermalModelParameters.RESISTANCE: resistance,
+          schema.ThermalModelParameters.CAPACITANCE: capacitance,
+          schema.SimulationErrors.RMSE: errors['RMSE'],
+          schema.SimulationErrors.MAE: errors['MAE'],
+          schema.SimulationErrors.MSE: errors['MSE'],
+          schema.SimulationErrors.BIAS: errors['Bias'],
+          schema.SimulationErrors.CV_RMSE: errors['CV(RMSE)'],
+      },
+      index=pd.Index(area_ids, name=schema.ThermalModelParameters.AREA_ID))
+
+
+@instrumentation.stage
+def simulate_indoor_air_temperature(
+    dataf: pd.DataFrame,
+    weather: pd.DataFrame,
+    parameters: pd.DataFrame | None = None) -> pd.DataFrame:
+  """ Simulate the indoor air temperature of every dwelling at once with the
+    1R1C thermal model, driven by the outdoor air temperature of the weather
+    data and the gains and heating output of the simulation data, from the
+    first modelled indoor air temperature of each dwelling.
+  
+  Args:
+      dataf (pd.DataFrame): The simulation data, with the gains, heating output, modelled indoor air temperature and Area_ID of each dwelling.
+      weather (pd.DataFrame): The hourly weather data, indexed by datetime.
+      parameters (pd.DataFrame | None): The resistance and capacitance, indexed by Area_ID, default from .env.
+  
+  Returns:
+      pd.DataFrame: The simulated indoor air temperature and the Area_ID of each row of the simulation data, NaN from an hour missing in the weather data on."""
+  oat = weather[schema.WeatherData.OAT].reindex(dataf.index)
+  area_codes, area_ids, positions = _get_area_positions(dataf)
+  oat, gains, modelled = _scatter_area_matrices(area_codes, positions, [
+      oat,
+      thermal_model.get_heat_gains(dataf),
+      dataf[schema.SimulationData.PREDICTED_IAT]
+  ])
+  if parameters is None:
+    parameters = thermal_model.get_default_parameters(list(area_ids))
+  parameters = parameters.loc[area_ids]
+  simulated = thermal_model.simulate_1r1c(
+      oat, gains, parameters[schema.ThermalModelParameters.RESISTANCE],
+      parameters[schema.ThermalModelParameters.CAPACITANCE], modelled[:, 0])
+  return pd.DataFrame(
+      {
+          schema.SimulationData.PREDICTED_IAT: simulated[area_codes,
+                                                         positions],
+          schema.SimulationData.AREA_ID: dataf[schema.SimulationData.AREA_ID],
+      },
+      index=dataf.index)
+
+
+def _get_area_matrices(
+    dataf: pd.DataFrame, columns: list[pd.Series]
+) -> tuple[pd.Index, list[npt.NDArray[np.float64]]]:
+  """ Lay out the hours of each dwelling as a row of a (dwellings, hours)
+    matrix per column, padded with NaN.
+  
+  Args:
+      dataf (pd.DataFrame): The data, with the Area_ID column.
+      columns (list[pd.Series]): The columns to lay out, aligned with the data.
+  
+  Returns:
+      tuple[pd.Index, list[npt.NDArray[np.float64]]]: The sorted Area_IDs and a matrix per column."""
+  area_codes, area_ids, positions = _get_area_positions(dataf)
+  return area_ids, _scatter_area_matrices(area_codes, positions, columns)
+
+
+def _get_area_positions(
+    dataf: pd.DataFrame
+) -> tuple[npt.NDArray[np.intp], pd.Index, npt.NDArray[np.intp]]:
+  """ Get the row and column of each row of the data in the (dwellings, hours)
+    matrices.
+  
+  Args:
+      dataf (pd.DataFrame): The data, with the Area_ID column.
+  
+  Returns:
+      tuple[npt.NDArray[np.intp], pd.Index, npt.NDArray[np.intp]]: The code of the Area_ID of each row, the sorted Area_IDs and the position of each row among the rows of its dwelling."""
+  area_codes, area_ids = pd.factorize(dataf[schema.SimulationData.AREA_ID],
+                                      sort=True)
+  positions = dataf.groupby(area_codes).cumcount().to_numpy()
+  return area_codes, area_ids, positions
+
+
+def _scatter_area_matrices(
+    area_codes: npt.NDArray[np.intp], positions: npt.NDArray[np.intp],
+    columns: list[pd.Series]) -> list[npt.NDArray[np.float64]]:
+  """ Lay out columns as (dwellings, hours) matrices padded with NaN.
+  
+  Args:
+      area_codes (npt.NDArray[np.intp]): The code of the Area_ID of each row.
+      positions (npt.NDArray[np.intp]): The position of each row among the rows of its dwelling.
+      columns (list[pd.Series]): The columns to lay out.
+  
+  Returns:
+      list[npt.NDArray[np.float64]]: A matrix per column."""
+  shape = (area_codes.max(initial=-1) + 1,
+           positions.max() + 1 if len(positions) else 0)
+  matrices = []
+  for column in columns:
+    matrix = np.full(shape, np.nan)
+    matrix[area_codes, positions] = column
+    matrices.append(matrix)
+  return matrices
+
+
+@instrumentation.stage
 def load_simulation_data() -> pd.DataFrame:
-  """ Loads simulation data from src/data folder. 
+  """ Loads simulation data from src/data folder, from the columnar cache
+    unless the csv file changed since it was cached. 
   
   Returns:
       pd.DataFrame: The simulation data."""
   path_simulation_data = Path(os.getenv("SIMULATION_DATA_PATH"))
-  simulation_df = load_data_from_csv(path_simulation_data)
-  simulation_df = simulation_data_prep(simulation_df)
-  return simulation_df
+  return columnar_cache.load_or_build(path_simulation_data,
+                                      load_prepared_data_from_csv)
+
+
+def load_prepared_data_from_csv(path: Path) -> pd.DataFrame:
+  """ Loads simulation data from a csv file and prepares it with e2sViz.
+  
+  Args:
+      path (Path): The path to the csv file.
+  
+  Returns:
+      pd.DataFrame: The prepared simulation data."""
+  return simulation_data_prep(load_data_from_csv(path))
 
 
 def simulation_data_prep(dataf: pd.DataFrame) -> pd.DataFrame:
@@ -170,18 +419,23 @@ def simulation_data_meta() -> dict[str, dict[str, Any]]:
   return metadata_dict
 
 
-def duplicates_dummy_forecasted_data(org_dataf: pd.DataFrame) -> pd.DataFrame:
+def duplicates_dummy_forecasted_data(
+    org_dataf: pd.DataFrame,
+    area_ids: list[int] | None = None) -> pd.DataFrame:
   """ Similar to duplicates_dummy_simulation_data, duplicates the forecasted 
         data for nb dwellings. nb = 3. 
   
   Args:
       org_dataf (pd.DataFrame): The original forecasted data.
+      area_ids (list[int] | None): The Area_IDs of the dwellings to create, default the nb dwellings.
   
   Returns:
       pd.DataFrame: The duplicated forecasted data for nb dwellings."""
   nb_dwellings = 3
+  if area_ids is None:
+    area_ids = list(range(nb_dwellings))
   frames = []
-  for i in range(nb_dwellings):
+  for i in area_ids:
     copy_simulation_df = org_dataf.copy()
     copy_simulation_df = copy_simulation_df * i
     copy_simulation_df[schema.ShortTermForecastData.AREA_ID] = i
@@ -189,47 +443,302 @@ def duplicates_dummy_forecasted_data(org_dataf: pd.DataFrame) -> pd.DataFrame:
   return pd.concat(frames)
 
 
-def get_dummy_forecasted_data() -> pd.DataFrame:
-  """ Loads the forecasted data for nb dwellings. 
+@instrumentation.stage
+def get_dummy_forecasted_data(
+    area_ids: list[int] | None = None) -> pd.DataFrame:
+  """ Forecasts the 10th, 50th and 90th percentiles of the indoor and outdoor
+    air temperatures with a Monte Carlo ensemble around the simulation data,
+    then duplicates them for nb dwellings. 
+  
+  Args:
+      area_ids (list[int] | None): The Area_IDs of the dwellings to create, default the nb dwellings.
   
   Returns:
       pd.DataFrame: The forecasted data for nb dwellings."""
   org_dataf: pd.DataFrame = load_simulation_data()
+  parameters = thermal_model.get_default_parameters([0])
+  oat_percentiles, iat_percentiles = ensemble.forecast_percentiles(
+      org_dataf[schema.SimulationData.OAT].to_numpy(
+          dtype=np.float64)[np.newaxis],
+      thermal_model.get_heat_gains(org_dataf).to_numpy(
+          dtype=np.float64)[np.newaxis],
+      org_dataf[schema.SimulationData.PREDICTED_IAT].to_numpy(
+          dtype=np.float64)[np.newaxis],
+      parameters[schema.ThermalModelParameters.RESISTANCE],
+      parameters[schema.ThermalModelParameters.CAPACITANCE],
+      percentiles=(50, 90, 10))
   forecast_df = pd.DataFrame(index=org_dataf.index)
+  for column, values in zip([
+      schema.ShortTermForecastData.PREDICTED_IAT_50,
+      schema.ShortTermForecastData.PREDICTED_IAT_90,
+      schema.ShortTermForecastData.PREDICTED_IAT_10
+  ], iat_percentiles[:, 0]):
+    forecast_df[column] = values
+  for column, values in zip([
+      schema.ShortTermForecastData.FORECASTED_OAT_50,
+      schema.ShortTermForecastData.FORECASTED_OAT_90,
+      schema.ShortTermForecastData.FORECASTED_OAT_10
+  ], oat_percentiles[:, 0]):
+    forecast_df[column] = values
+  return duplicates_dummy_forecasted_data(forecast_df, area_ids)
+
+
+def append_measured_forecast_data(area_df: pd.DataFrame,
+                                  measured_df: pd.DataFrame) -> pd.DataFrame:
+  """ Merges new measured indoor air temperatures of a dwelling into its
+    forecast: the percentiles of the forecasted hours that have been measured
+    are replaced by the measured value. Measured hours outside of the forecast
+    are ignored.
+  
+  Args:
+      area_df (pd.DataFrame): The forecasted data of the dwelling.
+      measured_df (pd.DataFrame): Every measured data of the dwelling appended so far.
+  
+  Returns:
+      pd.DataFrame: The forecasted data of the dwelling with the measured data."""
+  measured_iat = _get_measured_iat(measured_df).reindex(area_df.index)
+  is_measured = measured_iat.notna().to_numpy()
+  dataf = area_df.copy(deep=False)
+  for column in (schema.ShortTermForecastData.PREDICTED_IAT_10,
+                 schema.ShortTermForecastData.PREDICTED_IAT_50,
+                 schema.ShortTermForecastData.PREDICTED_IAT_90):
+    dataf[column] = np.where(is_measured, measured_iat, area_df[column])
+  return dataf.astype(area_df.dtypes)
+
+
+@instrumentation.stage
+def get_short_term_overheating_table(
+    forecast_df: pd.DataFrame) -> pd.DataFrame:
+  """ Get the number of overheating hours of each dwelling over the forecast
+    horizons, from the upper limit of the forecasted indoor air temperature.
+
+  Args:
+      forecast_df (pd.DataFrame): The forecasted data of all dwellings.
+
+  Returns:
+      pd.DataFrame: The number of overheating hours of each dwelling per horizon, indexed by Area_ID."""
+  overheating_hours = assess_overheating_hours(
+      forecast_df[schema.ShortTermForecastData.PREDICTED_IAT_90]).to_frame()
+  overheating_hours[schema.ShortTermForecastData.AREA_ID] = forecast_df[
+      schema.ShortTermForecastData.AREA_ID]
+  return get_overheating_df(overheating_hours)
+
+
+@instrumentation.stage
+def get_overheating_df(overheating_hours: pd.DataFrame) -> pd.DataFrame:
+  """ Create a dataframe with the number of overheating hours for each dwelling
+    over the next 1, 7, 14, 30, 60, 90 and 180 days. All dwellings and horizons
+    are computed in one pass: the flags are sorted by dwelling and time, summed
+    cumulatively and every horizon is located with a single search.
+  
+  Args:
+      overheating_hours (pd.DataFrame): The dataframe with the number of overheating hours.
+      
+  Returns:
+      pd.DataFrame: The dataframe with the number of overheating hours for each dwelling, indexed by Area_ID."""
+  intervals: list[int] = [1, 7, 14, 30, 60, 90, 180]  #number of days
+  area_codes, list_areas = pd.factorize(
+      overheating_hours[schema.ShortTermForecastData.AREA_ID])
+  timestamps = overheating_hours.index.asi8
+  flags = overheating_hours[
+      schema.ShortTermForecastData.OVERHEATING_FLAG].to_numpy()
+  code_steps = np.diff(area_codes)
+  if not np.all((code_steps > 0) | (
+      (code_steps == 0) & (np.diff(timestamps) >= 0))):
+    order = np.lexsort((timestamps, area_codes))
+    area_codes, timestamps, flags = (area_codes[order], timestamps[order],
+                                     flags[order])
+  cumsum_overheating_hours = np.r_[0, flags.cumsum()]
+
+  area_range = np.arange(len(list_areas))
+  starts = np.searchsorted(area_codes, area_range, side='left')
+  stops = np.searchsorted(area_codes, area_range, side='right')
+  horizons = np.array([pd.Timedelta(days=i).value for i in intervals])
+  time_horizons = timestamps[starts][:, np.newaxis] + horizons
+  # keyed by dwelling then by the number of horizons reached since the first
+  # hour of the dwelling, so the keys are sorted and one search locates the
+  # first hour at or past every horizon of every dwelling
+  nb_reached = np.searchsorted(horizons,
+                               timestamps - timestamps[starts][area_codes],
+                               side='right')
+  nb_keys = len(intervals) + 1
+  keys = area_codes * nb_keys + nb_reached
+  positions = np.searchsorted(
+      keys, area_range[:, np.newaxis] * nb_keys + np.arange(1, nb_keys))
+  nb_hours = (cumsum_overheating_hours[positions] -
+              cumsum_overheating_hours[starts][:, np.newaxis])
+  in_range = time_horizons <= timestamps[stops - 1][:, np.newaxis]
+
+  overheating_df = pd.DataFrame(
+      np.where(in_range, nb_hours, np.nan),
+      index=pd.Index(list_areas, name=schema.ShortTermForecastData.AREA_ID),
+      columns=[f'Next {i} day(s)' for i in intervals])
+  complete_cols = overheating_df.columns[in_range.all(axis=0)]
+  return overheating_df.astype({col: nb_hours.dtype for col in complete_cols})
+
 
-  iat_std = org_dataf[schema.SimulationData.PREDICTED_IAT].std()
-  forecast_df[schema.ShortTermForecastData.PREDICTED_IAT_50] = org_dataf[
-      schema.SimulationData.PREDICTED_IAT].values
-  forecast_df[schema.ShortTermForecastData.PREDICTED_IAT_90] = org_dataf[
-      schema.SimulationData.PREDICTED_IAT].values + 1 * iat_std
-  forecast_df[schema.ShortTermForecastData.PREDICTED_IAT_10] = org_dataf[
-      schema.SimulationData.PREDICTED_IAT].values - 1 * iat_std
-
-  oat_std = org_dataf[schema.SimulationData.OAT].std()
-  forecast_df[schema.ShortTermForecastData.FORECASTED_OAT_50] = org_dataf[
-      schema.SimulationData.OAT].values
-  forecast_df[schema.ShortTermForecastData.FORECASTED_OAT_90] = org_dataf[
-      schema.SimulationData.OAT].values + 1 * oat_std
-  forecast_df[schema.ShortTermForecastData.FORECASTED_OAT_10] = org_dataf[
-      schema.SimulationData.OAT].values - 1 * oat_std
-  return duplicates_dummy_forecasted_data(forecast_df)
-
-
-def get_dummy_longterm_data() -> pd.DataFrame:
-  """ Loads the long term simulation data for nb dwellings. 
-  
-  Returns:
-      pd.DataFrame: The long term simulation data for nb dwellings."""
-  lt_sim_path = os.getenv('LONG_TERM_SIMULATION_DATA_PATH')
-  dataf = pd.read_csv(Path(lt_sim_path), index_col=0)
-  dataf = simulation_data_prep(dataf)
-  dataf = duplicates_dummy_forecasted_data(dataf)
-  filt = (dataf.index.month >= 5) & (dataf.index.month <= 9)
-  dataf = dataf[filt]
-  dataf.index.name = schema.LongTermForecastData.DATETIME
+def assess_overheating_hours(iat_values: pd.Series) -> pd.Series:
+  """ Assess the number of overheating hours based on the indoor air temperature 
+    and overheating threshold value. 
+    
+    Args:
+        iat_values (pd.Series): The indoor air temperature values.
+    
+    Returns:
+        pd.Series: The number of overheating hours."""
+  threshold_iat = float(os.getenv('THRESHOLD_OVERHEATING_IAT'))
+  return pd.Series(kernels.flag_above_threshold(iat_values, threshold_iat),
+                   index=iat_values.index,
+                   name=schema.ShortTermForecastData.OVERHEATING_FLAG)
+
+
+def load_weather_data() -> pd.DataFrame:
+  """ Loads the hourly weather data of WEATHER_DATA_PATH, from the columnar
+    cache unless the csv file changed since it was cached.
+  
+  Returns:
+      pd.DataFrame: The weather data, indexed by datetime."""
+  return columnar_cache.load_or_build(Path(os.getenv('WEATHER_DATA_PATH')),
+                                      load_weather_data_from_csv)
+
+
+def load_weather_data_from_csv(path: Path) -> pd.DataFrame:
+  """ Loads weather data from a csv file, with the datetime as first column.
+  
+  Args:
+      path (Path): The path to the csv file.
+  
+  Returns:
+      pd.DataFrame: The weather data, indexed by datetime."""
+  dataf = load_data_from_csv(path)
+  dataf.index = pd.to_datetime(dataf.index, format="%Y-%m-%d %H:%M:%S%z")
   return dataf
 
 
+def load_longterm_simulation_data() -> pd.DataFrame:
+  """ Loads the long term simulation data of LONG_TERM_SIMULATION_DATA_PATH,
+    from the columnar cache unless the csv file changed since it was cached.
+  
+  Returns:
+      pd.DataFrame: The prepared long term simulation data."""
+  return columnar_cache.load_or_build(
+      Path(os.getenv('LONG_TERM_SIMULATION_DATA_PATH')),
+      load_prepared_data_from_csv)
+
+
+def get_dummy_longterm_overheating_hours() -> pd.DataFrame:
+  """ Streams the long term simulation data for nb dwellings and aggregates it
+    into overheating and night overheating hours per dwelling and year. 
+  
+  Returns:
+      pd.DataFrame: The overheating and night overheating hours per dwelling and year."""
+  lt_sim_path = Path(os.getenv('LONG_TERM_SIMULATION_DATA_PATH'))
+  return stream_overheating_hours_per_year(lt_sim_path)
+
+
+@instrumentation.stage
+def stream_overheating_hours_per_year(
+    path: Path,
+    chunksize: int | None = None,
+    area_ids: list[int] | None = None) -> pd.DataFrame:
+  """ Reads a long term simulation csv file in chunks of rows and accumulates
+    the overheating and night overheating hours per dwelling and year.
+
+    The chunks are sliced from the memory-mapped columnar cache of the file
+    when it is warm, and parsed and prepared from the csv file otherwise.
+    Each chunk is duplicated for nb dwellings, filtered to May to September
+    and reduced to its hour sums and counts before the next chunk is read, so
+    the peak memory depends on the chunk size and not on the length of the
+    projection. The result is the same as get_overheating_hours_per_year on
+    the whole file, as sums and counts add up across chunks.
+  
+  Args:
+      path (Path): The path to the csv file.
+      chunksize (int | None): The number of rows per chunk, default LONG_TERM_CHUNK_SIZE from .env.
+      area_ids (list[int] | None): The Area_IDs of the dwellings to create, default the nb dwellings.
+  
+  Returns:
+      pd.DataFrame: The overheating and night overheating hours per dwelling and year."""
+  if chunksize is None:
+    chunksize = int(os.getenv('LONG_TERM_CHUNK_SIZE', '100000'))
+  hours_per_year = None
+  for chunk in _read_prepared_chunks(path, chunksize):
+    chunk = chunk[(chunk.index.month >= 5) & (chunk.index.month <= 9)]
+    if chunk.empty:
+      continue
+    # the temperatures are counted as cached, so a cold and a warm cache
+    # give the same hours
+    chunk = duplicates_dummy_forecasted_data(
+        chunk[[schema.LongTermForecastData.PREDICTED_IAT]].astype(np.float32),
+        area_ids)
+    chunk.index.name = schema.LongTermForecastData.DATETIME
+    chunk_hours = get_overheating_hours_per_year(chunk)
+    if hours_per_year is None:
+      hours_per_year = chunk_hours
+    else:
+      # a year spanning two chunks gets the sums and counts of both
+      hours_per_year = hours_per_year.add(chunk_hours, fill_value=0).astype(
+          chunk_hours.dtypes)
+  return hours_per_year
+
+
+def _read_prepared_chunks(path: Path,
+                          chunksize: int) -> Iterator[pd.DataFrame]:
+  cached = columnar_cache.load_if_cached(path)
+  if cached is not None:
+    for start in range(0, len(cached.index), chunksize):
+      yield cached.iloc[start:start + chunksize]
+    return
+  with pd.read_csv(path, index_col=0, chunksize=chunksize) as reader:
+    for chunk in reader:
+      yield simulation_data_prep(chunk)
+
+
+def append_measured_overheating_hours(
+    area_hours: pd.DataFrame, measured_df: pd.DataFrame) -> pd.DataFrame:
+  """ Recounts the overheating and night overheating hours per year of a
+    dwelling for the years of its measured indoor air temperatures, from May
+    to September. The measured hours replace the simulated hours of
+    LONG_TERM_SIMULATION_DATA_PATH at the same timestamps and the measured
+    hours without simulation are added, so an hour appended twice is counted
+    once. The other years are left as they are.
+  
+  Args:
+      area_hours (pd.DataFrame): The overheating and night overheating hours per year of the dwelling.
+      measured_df (pd.DataFrame): Every measured data of the dwelling appended so far.
+  
+  Returns:
+      pd.DataFrame: The overheating and night overheating hours per year of the dwelling with the measured hours."""
+  measured_iat = _get_measured_iat(measured_df)
+  measured_iat = measured_iat[(measured_iat.index.month >= 5)
+                              & (measured_iat.index.month <= 9)]
+  if measured_iat.empty:
+    return area_hours
+  area_id = measured_df[schema.MeasuredData.AREA_ID].iloc[0]
+  years = measured_iat.index.year.unique()
+  simulated = load_longterm_simulation_data()
+  simulated = simulated.loc[simulated.index.year.isin(years)
+                            & (simulated.index.month >= 5) &
+                            (simulated.index.month <= 9),
+                            [schema.LongTermForecastData.PREDICTED_IAT]]
+  simulated_iat = duplicates_dummy_forecasted_data(
+      simulated, [area_id])[schema.LongTermForecastData.PREDICTED_IAT]
+  iat = measured_iat.combine_first(simulated_iat.astype(np.float64))
+  dataf = pd.DataFrame(
+      {
+          schema.LongTermForecastData.PREDICTED_IAT: iat,
+          schema.LongTermForecastData.AREA_ID: area_id,
+      },
+      index=iat.index.rename(schema.LongTermForecastData.DATETIME))
+  years_hours = get_overheating_hours_per_year(dataf)
+  if area_hours.empty:
+    return years_hours
+  other_years = ~area_hours.index.get_level_values(
+      schema.LongTermForecastOutputs.YEAR).isin(years)
+  return pd.concat([area_hours[other_years],
+                    years_hours]).sort_index().astype(area_hours.dtypes)
+
+
 def identify_overheating_hours(dataf: pd.DataFrame) -> pd.DataFrame:
   """Identify overheating hours based on a threshold and return the dataframe with the overheating flag.
   
@@ -241,24 +750,24 @@ def identify_overheating_hours(dataf: pd.DataFrame) -> pd.DataFrame:
   threshold_iat = float(os.getenv('THRESHOLD_OVERHEATING_IAT'))
   night_start_hour = int(os.getenv('NIGHT_START_HOUR'))
   night_end_hour = int(os.getenv('NIGHT_END_HOUR'))
-  ic.ic(threshold_iat, night_start_hour, night_end_hour)
   filt_hours = ((dataf.index.hour >= night_start_hour) |
                 (dataf.index.hour <= night_end_hour))
-  filt_threshold = (dataf[schema.LongTermForecastData.PREDICTED_IAT]
-                    >= threshold_iat)
-  filt = filt_hours & filt_threshold
-  dataf[schema.LongTermForecastOutputs.OVERHEATING_FLAG] = 0
-  dataf[schema.LongTermForecastOutputs.NIGHT_OVERHEATING_FLAG] = 0
-  dataf.loc[~filt_hours,
-            schema.LongTermForecastOutputs.NIGHT_OVERHEATING_FLAG] = np.nan
-  dataf.loc[filt, schema.LongTermForecastOutputs.NIGHT_OVERHEATING_FLAG] = 1
-  dataf.loc[filt_threshold,
-            schema.LongTermForecastOutputs.OVERHEATING_FLAG] = 1
+  overheating_flag = kernels.flag_above_threshold(
+      dataf[schema.LongTermForecastData.PREDICTED_IAT],
+      threshold_iat,
+      inclusive=True)
+  dataf[schema.LongTermForecastOutputs.OVERHEATING_FLAG] = overheating_flag
+  dataf[schema.LongTermForecastOutputs.NIGHT_OVERHEATING_FLAG] = np.where(
+      filt_hours, overheating_flag, np.nan)
   return dataf
 
 
+@instrumentation.stage
 def get_overheating_hours_per_year(dataf: pd.DataFrame) -> pd.DataFrame:
   """Get the total number of overheating and night overheating hours per year.
+    The hours at or above each indoor air temperature threshold of
+    get_iat_thresholds are counted as well, one column per threshold next to
+    the sum and count of each, see get_overheating_hours_at_threshold.
   
   Args:
       dataf (pd.DataFrame): The dataframe to be used.
@@ -267,12 +776,12 @@ def get_overheating_hours_per_year(dataf: pd.DataFrame) -> pd.DataFrame:
       pd.DataFrame: The dataframe with the total number of overheating and night overheating hours per year.
   """
   dataf = identify_overheating_hours(dataf)
-  temp_results_df = dataf.groupby(
-      [schema.LongTermForecastData.AREA_ID, dataf.index.year]).agg({
-          schema.LongTermForecastOutputs.OVERHEATING_FLAG: ['sum', 'count'],
-          schema.LongTermForecastOutputs.NIGHT_OVERHEATING_FLAG:
-          ['sum', 'count']
-      })
+  groups = dataf.groupby(
+      [schema.LongTermForecastData.AREA_ID, dataf.index.year])
+  temp_results_df = groups.agg({
+      schema.LongTermForecastOutputs.OVERHEATING_FLAG: ['sum', 'count'],
+      schema.LongTermForecastOutputs.NIGHT_OVERHEATING_FLAG: ['sum', 'count']
+  })
 
   temp_results_df = temp_results_df.rename(
       columns={
@@ -285,7 +794,187 @@ def get_overheating_hours_per_year(dataf: pd.DataFrame) -> pd.DataFrame:
       schema.LongTermForecastData.DATETIME:
       schema.LongTermForecastOutputs.YEAR
   })
-  return temp_results_df
+  thresholds = get_iat_thresholds()
+  labels = [get_threshold_label(x) for x in thresholds]
+  hours_cols = [
+      schema.LongTermForecastOutputs.OVERHEATING_HOURS,
+      schema.LongTermForecastOutputs.NIGHT_OVERHEATING_HOURS
+  ]
+  hours_above = count_hours_above_thresholds(
+      dataf[schema.LongTermForecastData.PREDICTED_IAT].to_numpy(),
+      groups.ngroup().to_numpy(), len(temp_results_df.index), thresholds, [
+          None, dataf[schema.LongTermForecastOutputs.NIGHT_OVERHEATING_FLAG].
+          notna().to_numpy()
+      ])
+  return pd.concat([temp_results_df] + [
+      pd.DataFrame(counts,
+                   index=temp_results_df.index,
+                   columns=pd.MultiIndex.from_product([[hours_col], labels]))
+      for hours_col, counts in zip(hours_cols, hours_above)
+  ],
+                   axis=1)
+
+
+def get_iat_thresholds() -> npt.NDArray[np.float64]:
+  """Get the indoor air temperature thresholds of the long term what-if,
+    IAT_THRESHOLDS_PER_DEGREE per degreeC from THRESHOLD_OVERHEATING_IAT_MIN
+    to THRESHOLD_OVERHEATING_IAT_MAX in .env.
+  
+  Returns:
+      npt.NDArray[np.float64]: The thresholds [degreeC]."""
+  first = round(
+      float(os.getenv('THRESHOLD_OVERHEATING_IAT_MIN', '20')) *
+      IAT_THRESHOLDS_PER_DEGREE)
+  last = round(
+      float(os.getenv('THRESHOLD_OVERHEATING_IAT_MAX', '35')) *
+      IAT_THRESHOLDS_PER_DEGREE)
+  return np.arange(first, last + 1) / IAT_THRESHOLDS_PER_DEGREE
+
+
+def get_threshold_label(threshold: float) -> str:
+  """Get the column label of the hours at or above an indoor air temperature
+    threshold.
+  
+  Args:
+      threshold (float): The threshold [degreeC].
+  
+  Returns:
+      str: The label, e.g. '26.0'."""
+  return f'{threshold:.1f}'
+
+
+def count_hours_above_thresholds(
+    iat_values: npt.NDArray[np.floating], group_codes: npt.NDArray[np.int64],
+    nb_groups: int, thresholds: npt.NDArray[np.float64],
+    selections: list[npt.NDArray[np.bool_] | None]
+) -> list[npt.NDArray[np.uint16]]:
+  """Count the hours at or above each threshold of each group of hours from a
+    histogram of the values, with a bin per threshold: the hours at or above
+    a threshold are the reversed cumulative sum of the histogram. NaN values
+    are never counted. The values are binned once for all selections.
+  
+  Args:
+      iat_values (npt.NDArray[np.floating]): The indoor air temperatures [degreeC].
+      group_codes (npt.NDArray[np.int64]): The group of each value, from 0 to nb_groups - 1.
+      nb_groups (int): The number of groups.
+      thresholds (npt.NDArray[np.float64]): The thresholds, IAT_THRESHOLDS_PER_DEGREE per degreeC.
+      selections (list[npt.NDArray[np.bool_] | None]): The values to count, None for all of them, e.g. the night hours.
+  
+  Returns:
+      list[npt.NDArray[np.uint16]]: The hours at or above each threshold of each selection, of shape (groups, thresholds)."""
+  nb_bins = len(thresholds) + 1
+  # bin 0 holds the values under the first threshold and the NaNs, bin i the
+  # values from threshold i - 1, and the last bin all values from the last one
+  bins = np.multiply(iat_values, IAT_THRESHOLDS_PER_DEGREE, dtype=np.float64)
+  np.floor(bins, out=bins)
+  bins -= round(thresholds[0] * IAT_THRESHOLDS_PER_DEGREE) - 1
+  np.fmax(bins, 0, out=bins)
+  np.minimum(bins, nb_bins - 1, out=bins)
+  flat_bins = group_codes * nb_bins
+  np.add(flat_bins, bins, out=flat_bins, casting='unsafe')
+  del bins
+  hours_above = []
+  for selection in selections:
+    histograms = np.bincount(
+        flat_bins if selection is None else flat_bins[selection],
+        minlength=nb_groups * nb_bins).reshape(nb_groups, nb_bins)
+    # a year has at most 8784 hours
+    hours_above.append(
+        np.cumsum(histograms[:, :0:-1], axis=1)[:, ::-1].astype(np.uint16))
+  return hours_above
+
+
+def get_overheating_hours_at_threshold(dataf: pd.DataFrame,
+                                       threshold: float) -> pd.DataFrame:
+  """Get the overheating and night overheating hours per year for another
+    indoor air temperature threshold than THRESHOLD_OVERHEATING_IAT, looked up
+    in the hours at or above each threshold counted by
+    get_overheating_hours_per_year, without going through the hourly data
+    again.
+  
+  Args:
+      dataf (pd.DataFrame): The overheating and night overheating hours per year.
+      threshold (float): The threshold, one of get_iat_thresholds [degreeC].
+  
+  Returns:
+      pd.DataFrame: The overheating and night overheating hours per year at the threshold, as returned by get_overheating_hours_per_year without the thresholds."""
+  label = get_threshold_label(threshold)
+  columns = {}
+  for hours_col in [
+      schema.LongTermForecastOutputs.OVERHEATING_HOURS,
+      schema.LongTermForecastOutputs.NIGHT_OVERHEATING_HOURS
+  ]:
+    columns[(hours_col, 'sum')] = dataf[(hours_col, label)]
+    columns[(hours_col, 'count')] = dataf[(hours_col, 'count')]
+  return pd.DataFrame(columns)
+
+
+@instrumentation.stage
+def get_comfort_criteria_per_year(dataf: pd.DataFrame) -> pd.DataFrame:
+  """Assess the TM59 Criteria A and B and the TM52 daily weighted exceedance
+    of every dwelling and year at once, see comfort_criteria. The hours of
+    each dwelling and year are laid out as a row of a (dwellings x years,
+    hours) matrix from the midnight of its first day, padded with NaN, and the
+    night hours of Criterion B are NIGHT_START_HOUR to NIGHT_END_HOUR from
+    .env.
+
+  Args:
+      dataf (pd.DataFrame): The hourly long term data, with the indoor and outdoor air temperatures of each dwelling.
+
+  Returns:
+      pd.DataFrame: The hours, percentages and pass flags of the criteria of each dwelling and year."""
+  groups = dataf.groupby(
+      [dataf[schema.LongTermForecastData.AREA_ID], dataf.index.year])
+  row_codes = groups.ngroup().to_numpy()
+  days = pd.Series(dataf.index.normalize())
+  first_days = pd.DatetimeIndex(days.groupby(row_codes).transform('min'))
+  positions = ((dataf.index - first_days) // pd.Timedelta(hours=1)).to_numpy()
+  nb_hours = -(-(positions.max() + 1) // comfort_criteria.HOURS_PER_DAY
+               ) * comfort_criteria.HOURS_PER_DAY if len(positions) else 0
+  matrices = []
+  for column in [
+      schema.LongTermForecastData.PREDICTED_IAT,
+      schema.LongTermForecastData.FORECASTED_OAT
+  ]:
+    matrix = np.full((groups.ngroups, nb_hours), np.nan)
+    matrix[row_codes, positions] = dataf[column]
+    matrices.append(matrix)
+  iat, oat = matrices
+  running_mean = comfort_criteria.get_running_mean(
+      comfort_criteria.get_daily_mean(oat))
+  exceedance = comfort_criteria.get_exceedance(
+      iat, comfort_criteria.get_maximum_temperature(running_mean))
+  a_hours, a_perct, a_pass = comfort_criteria.assess_criterion_a(exceedance)
+  b_hours, b_pass = comfort_criteria.assess_criterion_b(
+      iat,
+      comfort_criteria.get_night_hours(int(os.getenv('NIGHT_START_HOUR')),
+                                       int(os.getenv('NIGHT_END_HOUR'))))
+  max_weighted, weighted_days, weighted_pass = (
+      comfort_criteria.assess_daily_weighted_exceedance(
+          comfort_criteria.get_daily_weighted_exceedance(exceedance)))
+  return pd.DataFrame(
+      {
+          schema.ComfortCriteriaOutputs.CRITERION_A_HOURS:
+          a_hours,
+          schema.ComfortCriteriaOutputs.CRITERION_A_PERCT:
+          a_perct,
+          schema.ComfortCriteriaOutputs.CRITERION_A_PASS:
+          a_pass,
+          schema.ComfortCriteriaOutputs.CRITERION_B_HOURS:
+          b_hours,
+          schema.ComfortCriteriaOutputs.CRITERION_B_PASS:
+          b_pass,
+          schema.ComfortCriteriaOutputs.MAX_DAILY_WEIGHTED_EXCEEDANCE:
+          max_weighted,
+          schema.ComfortCriteriaOutputs.DAILY_WEIGHTED_EXCEEDANCE_DAYS:
+          weighted_days,
+          schema.ComfortCriteriaOutputs.DAILY_WEIGHTED_EXCEEDANCE_PASS:
+          weighted_pass,
+      },
+      index=groups.size().index.rename([
+          schema.ComfortCriteriaOutputs.AREA_ID,
+          schema.ComfortCriteriaOutputs.YEAR
+      ]))
 
 
 def get_overheating_perct_per_year(dataf: pd.DataFrame) -> pd.DataFrame:
@@ -296,7 +985,20 @@ def get_overheating_perct_per_year(dataf: pd.DataFrame) -> pd.DataFrame:
       
   Returns:
       pd.DataFrame: The dataframe with the percentage of overheating and night overheating hours per year."""
-  dataf = get_overheating_hours_per_year(dataf)
+  return get_overheating_perct_from_hours(
+      get_overheating_hours_per_year(dataf))
+
+
+@instrumentation.stage
+def get_overheating_perct_from_hours(dataf: pd.DataFrame) -> pd.DataFrame:
+  """Get the percentage of overheating and night overheating hours per year from
+    the sums and counts returned by get_overheating_hours_per_year.
+  
+  Args:
+      dataf (pd.DataFrame): The overheating and night overheating hours per year.
+      
+  Returns:
+      pd.DataFrame: The dataframe with the percentage of overheating and night overheating hours per year."""
   percentage_results_df = pd.DataFrame(index=dataf.index)
   percentage_results_df[schema.LongTermForecastOutputs.
                         OVERHEATING_PERCT] = get_ratio_groupby_col(
@@ -318,25 +1020,25 @@ def get_overheating_summary_results(dataf: pd.DataFrame) -> pd.DataFrame:
   
   Returns:
       pd.DataFrame: The dataframe with the overheating and night overheating flags."""
-  # ic.ic(os.getenv('THRESHOLD_OVERHEATING_PERCENTAGE'))
   threshold_percentage = float(os.getenv('THRESHOLD_OVERHEATING_PERCENTAGE'))
   threshold_night_percentage = float(
       os.getenv('THRESHOLD_NIGHT_OVERHEATING_PERCENTAGE'))
 
+  overheating_flag = kernels.flag_above_threshold(
+      dataf[schema.LongTermForecastOutputs.OVERHEATING_PERCT],
+      threshold_percentage)
+  night_overheating_flag = kernels.flag_above_threshold(
+      dataf[schema.LongTermForecastOutputs.NIGHT_OVERHEATING_PERCT],
+      threshold_night_percentage)
   summary_results_df = pd.DataFrame(index=dataf.index)
-  filt = (dataf[schema.LongTermForecastOutputs.OVERHEATING_PERCT]
-          > threshold_percentage)
-  summary_results_df[schema.LongTermForecastOutputs.OVERHEATING_FLAG] = 0
-  summary_results_df.loc[filt,
-                         schema.LongTermForecastOutputs.OVERHEATING_FLAG] = 1
-  filt = (dataf[schema.LongTermForecastOutputs.NIGHT_OVERHEATING_PERCT]
-          > threshold_night_percentage)
-  summary_results_df[schema.LongTermForecastOutputs.NIGHT_OVERHEATING_FLAG] = 0
-  summary_results_df.loc[
-      filt, schema.LongTermForecastOutputs.NIGHT_OVERHEATING_FLAG] = 1
+  summary_results_df[
+      schema.LongTermForecastOutputs.OVERHEATING_FLAG] = overheating_flag
+  summary_results_df[schema.LongTermForecastOutputs.
+                     NIGHT_OVERHEATING_FLAG] = night_overheating_flag
   return summary_results_df
 
 
+@instrumentation.stage
 def get_overheating_table(dataf: pd.DataFrame) -> pd.DataFrame:
   """Get an overheating summary results per year and return a table with the percentage of overheating and night overheating hours for all years.
   
@@ -379,19 +1081,12 @@ def transform_overheating_table_from_float_to_text(
   Returns:
       pd.DataFrame: The dataframe with the overheating table transformed from float to text.
   """
-
-  def risk_overheating_text(x: float) -> str:
-    if x == 0:
-      return 'None'
-    else:
-      return f'1 out of {1/x:.0f} summers'
-
-  dataf[schema.OverheatingTable.FUTURE_OVERHEATING_RISK] = dataf[
-      schema.OverheatingTable.FUTURE_OVERHEATING_RISK].apply(
-          lambda x: risk_overheating_text(x / 100))
-  dataf[schema.OverheatingTable.FUTURE_NIGHT_OVERHEATING_RISK] = dataf[
-      schema.OverheatingTable.FUTURE_NIGHT_OVERHEATING_RISK].apply(
-          lambda x: risk_overheating_text(x / 100))
+  dataf[schema.OverheatingTable.
+        FUTURE_OVERHEATING_RISK] = kernels.format_risk_of_overheating(
+            dataf[schema.OverheatingTable.FUTURE_OVERHEATING_RISK])
+  dataf[schema.OverheatingTable.
+        FUTURE_NIGHT_OVERHEATING_RISK] = kernels.format_risk_of_overheating(
+            dataf[schema.OverheatingTable.FUTURE_NIGHT_OVERHEATING_RISK])
   return dataf
 
 
@@ -411,3 +1106,10 @@ def get_ratio_groupby_col(target_col: str,
   total_nb_hours: npt.NDArray[np.float64] = dataf.loc[:, idx[target_col,
                                                              'count']].values
   return nb / total_nb_hours
+
+
+def _get_measured_iat(measured_df: pd.DataFrame) -> pd.Series:
+  # the last of the values measured for the same hour is kept
+  measured_iat = measured_df[schema.MeasuredData.MEASURED_IAT]
+  measured_iat = measured_iat[~measured_iat.index.duplicated(keep='last')]
+  return measured_iat.sort_index()
@@ -1,6 +1,9 @@
 """This file collates the various methods to calculate the error between the simulated and mesaured data"""
+from dataclasses import dataclass
+
 import numpy as np
 import pandas as pd
+from numpy import typing as npt
 
 
 def calculate_mae(predicted: pd.Series, actual: pd.Series) -> float:
@@ -51,3 +54,120 @@ def calculate_mse(predicted: pd.Series, actual: pd.Series) -> float:
       float: The mean square error.
   """
   return np.mean((predicted - actual)**2)
+
+
+@dataclass
+class ErrorAccumulator:
+  """Accumulates the error between predicted and actual values in one pass,
+  so the MAE, RMSE and MSE of records too long to hold at once can be
+  computed chunk by chunk, and accumulators of different chunks or processes
+  can be merged.
+
+  The values are reduced along their last axis: 1-D chunks accumulate a
+  single error, chunks of shape (dwellings, hours) accumulate one error per
+  dwelling. The hours where either value is NaN are skipped.
+
+  Attributes:
+      count (npt.ArrayLike): The number of values accumulated.
+      sum_abs_error (npt.ArrayLike): The sum of the absolute errors.
+      sum_squared_error (npt.ArrayLike): The sum of the squared errors.
+      sum_error (npt.ArrayLike): The sum of the errors, predicted minus actual.
+      sum_actual (npt.ArrayLike): The sum of the actual values.
+  """
+  count: npt.ArrayLike = 0
+  sum_abs_error: npt.ArrayLike = 0.0
+  sum_squared_error: npt.ArrayLike = 0.0
+  sum_error: npt.ArrayLike = 0.0
+  sum_actual: npt.ArrayLike = 0.0
+
+  def update(self, predicted: npt.ArrayLike,
+             actual: npt.ArrayLike) -> 'ErrorAccumulator':
+    """Accumulate the errors of a chunk of values.
+
+    Arguments:
+        predicted (npt.ArrayLike): The predicted values.
+        actual (npt.ArrayLike): The actual (measured) values, aligned with the predicted values.
+
+    Returns:
+        ErrorAccumulator: The accumulator itself.
+    """
+    actual = np.asarray(actual, dtype=np.float64)
+    error = np.subtract(predicted, actual, dtype=np.float64)
+    is_valid = ~np.isnan(error)
+    error[~is_valid] = 0.0
+    self.count = self.count + is_valid.sum(axis=-1)
+    self.sum_actual = self.sum_actual + np.where(is_valid, actual,
+                                                 0.0).sum(axis=-1)
+    self.sum_error = self.sum_error + error.sum(axis=-1)
+    self.sum_squared_error = self.sum_squared_error + np.einsum(
+        '...i,...i->...', error, error)
+    self.sum_abs_error = self.sum_abs_error + np.abs(error,
+                                                     out=error).sum(axis=-1)
+    return self
+
+  def merge(self, other: 'ErrorAccumulator') -> 'ErrorAccumulator':
+    """Merge the errors accumulated by another accumulator.
+
+    Arguments:
+        other (ErrorAccumulator): The other accumulator.
+
+    Returns:
+        ErrorAccumulator: A new accumulator holding the errors of both.
+    """
+    return ErrorAccumulator(self.count + other.count,
+                            self.sum_abs_error + other.sum_abs_error,
+                            self.sum_squared_error + other.sum_squared_error,
+                            self.sum_error + other.sum_error,
+                            self.sum_actual + other.sum_actual)
+
+  @property
+  def mae(self) -> npt.ArrayLike:
+    """The mean absolute error, NaN without values."""
+    return self._mean(self.sum_abs_error)
+
+  @property
+  def mse(self) -> npt.ArrayLike:
+    """The mean square error, NaN without values."""
+    return self._mean(self.sum_squared_error)
+
+  @property
+  def rmse(self) -> npt.ArrayLike:
+    """The root mean square error, NaN without values."""
+    return np.sqrt(self.mse)
+
+  @property
+  def bias(self) -> npt.ArrayLike:
+    """The mean error, predicted minus actual, NaN without values."""
+    return self._mean(self.sum_error)
+
+  @property
+  def cv_rmse(self) -> npt.ArrayLike:
+    """The coefficient of variation of the RMSE, the RMSE divided by the mean
+    actual value, in %."""
+    return self.rmse / self._mean(self.sum_actual) * 100
+
+  def _mean(self, total: npt.ArrayLike) -> npt.ArrayLike:
+    with np.errstate(divide='ignore', invalid='ignore'):
+      return np.divide(total, self.count)
+
+
+def calculate_error_metrics(
+    predicted: npt.NDArray[np.float64],
+    actual: npt.NDArray[np.float64]) -> dict[str, npt.NDArray[np.float64]]:
+  """Calculate the RMSE, MAE, MSE, bias and CV(RMSE) of many series at once.
+
+  Arguments:
+      predicted (npt.NDArray[np.float64]): The predicted values, of shape (dwellings, hours).
+      actual (npt.NDArray[np.float64]): The actual (measured) values, of shape (dwellings, hours), NaN where not measured.
+
+  Returns:
+      dict[str, npt.NDArray[np.float64]]: The RMSE, MAE, MSE, bias and CV(RMSE) [%] of each dwelling, of shape (dwellings,).
+  """
+  accumulator = ErrorAccumulator().update(predicted, actual)
+  return {
+      'RMSE': accumulator.rmse,
+      'MAE': accumulator.mae,
+      'MSE': accumulator.mse,
+      'Bias': accumulator.bias,
+      'CV(RMSE)': accumulator.cv_rmse,
+  }
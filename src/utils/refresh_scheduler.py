@@ -0,0 +1,91 @@
+"""Background thread keeping the datasets of the store up to date.
+
+The thread checks the versions of the datasets at a fixed interval, which
+rehashes SIMULATION_DATA_PATH and LONG_TERM_SIMULATION_DATA_PATH only when
+their modification time or size changed and looks up the latest completed
+long term batch run, and rebuilds the datasets whose sources, batch run,
+dependencies or .env parameters changed. Meanwhile the store keeps
+serving the previous version, and the rebuilt dataset is swapped in at once,
+so the callbacks never wait on the data preparation."""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+
+from . import lazy_import
+
+# imported by the thread so the app starts without loading the datasets' stack
+data_store = lazy_import.lazy_module('utils.data_store')
+
+logger = logging.getLogger(__name__)
+
+
+class RefreshScheduler(threading.Thread):
+  """Daemon thread refreshing the datasets of a store."""
+
+  def __init__(self, interval: float) -> None:
+    super().__init__(name='dataset-refresh', daemon=True)
+    self.interval = interval
+    self._stopped = threading.Event()
+
+  @property
+  def store(self) -> data_store.DataStore:
+    """The process-wide store."""
+    return data_store.get_store()
+
+  def run(self) -> None:
+    """Serves the previous version of the datasets while they are rebuilt and
+    refreshes them until stopped, the first time after one interval so the
+    app starts without loading the datasets' stack. Until then the datasets
+    are built by the first page using them."""
+    if self._stopped.wait(self.interval):
+      return
+    self.store.serve_stale = True
+    while not self._stopped.is_set():
+      self.refresh_all()
+      self._stopped.wait(self.interval)
+
+  def refresh_all(self) -> None:
+    """Refreshes every dataset, each after the datasets it depends on. A
+    failing rebuild is logged and the previous version kept."""
+    for dataset in self.store.datasets:
+      start = time.perf_counter()
+      try:
+        rebuilt = self.store.refresh(dataset)
+      except Exception:  # pylint: disable=broad-except
+        logger.exception('Refreshing %s failed, serving the previous version',
+                         dataset)
+        continue
+      if rebuilt:
+        logger.info('Rebuilt %s in %.2f s', dataset,
+                    time.perf_counter() - start)
+
+  def stop(self) -> None:
+    """Stops the thread after the current refresh."""
+    self._stopped.set()
+
+
+def get_refresh_interval() -> float:
+  """Returns the refresh interval from DATA_REFRESH_SECONDS in .env, default
+  60; 0 disables the background refresh.
+
+  Returns:
+      float: The refresh interval [s]."""
+  return float(os.getenv('DATA_REFRESH_SECONDS', '60'))
+
+
+def start_refresh_scheduler() -> RefreshScheduler | None:
+  """Starts refreshing the process-wide store in the background, serving the
+  previous version of the datasets while they are rebuilt, from one interval
+  after the start.
+
+  Returns:
+      RefreshScheduler | None: The started thread, None if disabled in .env."""
+  interval = get_refresh_interval()
+  if interval <= 0:
+    return None
+  scheduler = RefreshScheduler(interval)
+  scheduler.start()
+  return scheduler
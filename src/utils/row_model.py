@@ -0,0 +1,205 @@
+"""Server-side rows of the AgGrid tables, for the infinite row model.
+
+The grids only hold the rows in view. When the user scrolls, sorts or filters
+a grid, it requests the block of rows it needs together with its sort and
+filter models, and the rows are filtered, sorted and sliced from the table
+kept in the data store, so the browser never receives the whole table."""
+import threading
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+from numpy import typing as npt
+
+from . import common_functions, data_store, enums, instrumentation
+
+# the column holding the Area_IDs of the tables, sent to the grids as area strings
+INDEX_COLUMN = 'index'
+# the number of rows of a block requested by the grids
+BLOCK_SIZE = 100
+ROW_HEIGHT = 42
+HEADER_HEIGHT = 49
+
+NUMBER_FILTERS: dict[str, Callable[..., npt.NDArray[np.bool_]]] = {
+    'equals':
+    lambda values, value, _: values == value,
+    'notEqual':
+    lambda values, value, _: values != value,
+    'lessThan':
+    lambda values, value, _: values < value,
+    'lessThanOrEqual':
+    lambda values, value, _: values <= value,
+    'greaterThan':
+    lambda values, value, _: values > value,
+    'greaterThanOrEqual':
+    lambda values, value, _: values >= value,
+    'inRange':
+    lambda values, value, value_to: (values > value) & (values < value_to),
+    'blank':
+    lambda values, *_: np.isnan(values),
+    'notBlank':
+    lambda values, *_: ~np.isnan(values),
+}
+TEXT_FILTERS: dict[str, Callable[[pd.Series, str], pd.Series]] = {
+    'contains': lambda values, text: values.str.contains(text, regex=False),
+    'notContains':
+    lambda values, text: ~values.str.contains(text, regex=False),
+    'equals': lambda values, text: values == text,
+    'notEqual': lambda values, text: values != text,
+    'startsWith': lambda values, text: values.str.startswith(text),
+    'endsWith': lambda values, text: values.str.endswith(text),
+    'blank': lambda values, _: values == '',
+    'notBlank': lambda values, _: values != '',
+}
+
+_DISPLAY_FRAMES: dict[enums.Dataset, tuple[str, pd.DataFrame]] = {}
+_LOCK = threading.Lock()
+
+
+def get_display_frame(dataset: enums.Dataset) -> pd.DataFrame:
+  """Returns a table of the data store with its Area_ID index moved to an
+  INDEX_COLUMN. The table is kept until the dataset changes.
+
+  Args:
+      dataset (enums.Dataset): The table, indexed by Area_ID.
+
+  Returns:
+      pd.DataFrame: The table with a positional index."""
+  key = data_store.get_version(dataset)
+  cached = _DISPLAY_FRAMES.get(dataset)
+  instrumentation.count_cache('display_frame', cached is not None
+                              and cached[0] == key)
+  if cached is not None and cached[0] == key:
+    return cached[1]
+  dataf = to_display_frame(data_store.get_frame(dataset))
+  with _LOCK:
+    _DISPLAY_FRAMES[dataset] = (key, dataf)
+  return dataf
+
+
+def to_display_frame(dataf: pd.DataFrame) -> pd.DataFrame:
+  """Moves the Area_ID index of a table to an INDEX_COLUMN. The Area_IDs are
+  kept as integers, so the areas sort by number, and formatted as area
+  strings in the rows sent to the grid only.
+
+  Args:
+      dataf (pd.DataFrame): The table, indexed by Area_ID.
+
+  Returns:
+      pd.DataFrame: The table with a positional index."""
+  return dataf.reset_index(names=INDEX_COLUMN)
+
+
+def get_rows(dataset: enums.Dataset, request: dict[str,
+                                                   Any]) -> dict[str, Any]:
+  """Answers the getRowsRequest of an AgGrid using the infinite row model.
+
+  Args:
+      dataset (enums.Dataset): The table shown by the grid, indexed by Area_ID.
+      request (dict[str, Any]): The startRow, endRow, sortModel and filterModel of the request.
+
+  Returns:
+      dict[str, Any]: The rowData of the requested block and the rowCount of the filtered table."""
+  return get_frame_rows(get_display_frame(dataset), request)
+
+
+def get_frame_rows(dataf: pd.DataFrame, request: dict[str,
+                                                      Any]) -> dict[str, Any]:
+  """Answers the getRowsRequest of an AgGrid using the infinite row model
+  from a table that is not a dataset of the data store.
+
+  Args:
+      dataf (pd.DataFrame): The table shown by the grid, see to_display_frame.
+      request (dict[str, Any]): The startRow, endRow, sortModel and filterModel of the request.
+
+  Returns:
+      dict[str, Any]: The rowData of the requested block, with the area strings in INDEX_COLUMN, and the rowCount of the filtered table."""
+  instrumentation.add_rows(len(dataf.index))
+  dataf = filter_rows(dataf, request.get('filterModel') or {})
+  dataf = sort_rows(dataf, request.get('sortModel') or [])
+  rows = dataf.iloc[request['startRow']:request['endRow']]
+  rows = rows.assign(
+      **{INDEX_COLUMN: common_functions.get_list_area_str(rows[INDEX_COLUMN])})
+  return {
+      'rowData': rows.fillna('NaN').to_dict('records'),
+      'rowCount': len(dataf.index)
+  }
+
+
+def filter_rows(dataf: pd.DataFrame,
+                filter_model: dict[str, dict[str, Any]]) -> pd.DataFrame:
+  """Filters a table with the filter model of an AgGrid. The INDEX_COLUMN
+  is filtered on the area strings shown by the grid.
+
+  Args:
+      dataf (pd.DataFrame): The table.
+      filter_model (dict[str, dict[str, Any]]): The filter of each filtered column.
+
+  Returns:
+      pd.DataFrame: The rows passing all the filters."""
+  if not filter_model:
+    return dataf
+  mask = np.ones(len(dataf.index), dtype=bool)
+  for column, column_filter in filter_model.items():
+    values = dataf[column]
+    if column == INDEX_COLUMN:
+      values = pd.Series(common_functions.get_list_area_str(values),
+                         index=values.index)
+    mask &= _get_filter_mask(values, column_filter)
+  return dataf[mask]
+
+
+def sort_rows(dataf: pd.DataFrame,
+              sort_model: list[dict[str, str]]) -> pd.DataFrame:
+  """Sorts a table with the sort model of an AgGrid. The blank values are
+  sorted last.
+
+  Args:
+      dataf (pd.DataFrame): The table.
+      sort_model (list[dict[str, str]]): The colId and sort direction of each sorted column, by priority.
+
+  Returns:
+      pd.DataFrame: The sorted table."""
+  if not sort_model:
+    return dataf
+  return dataf.sort_values(
+      by=[sort['colId'] for sort in sort_model],
+      ascending=[sort['sort'] == 'asc' for sort in sort_model],
+      kind='stable',
+      na_position='last')
+
+
+def get_grid_style(nb_rows: int, max_visible_rows: int = 10) -> dict[str, str]:
+  """Returns the style of a grid showing up to max_visible_rows rows. The
+  infinite row model does not support the autoHeight layout, so the height is
+  fixed.
+
+  Args:
+      nb_rows (int): The number of rows of the table.
+      max_visible_rows (int): The number of rows visible without scrolling.
+
+  Returns:
+      dict[str, str]: The style of the grid."""
+  height = HEADER_HEIGHT + ROW_HEIGHT * max(1, min(nb_rows, max_visible_rows))
+  return {'height': f'{height}px'}
+
+
+def _get_filter_mask(values: pd.Series,
+                     column_filter: dict[str, Any]) -> npt.NDArray[np.bool_]:
+  if 'operator' in column_filter:
+    conditions = column_filter.get('conditions') or [
+        column_filter['condition1'], column_filter['condition2']
+    ]
+    masks = [_get_filter_mask(values, condition) for condition in conditions]
+    if column_filter['operator'] == 'AND':
+      return np.logical_and.reduce(masks)
+    return np.logical_or.reduce(masks)
+  if column_filter.get('filterType') == 'text':
+    # the text filters of AgGrid are case insensitive
+    text = str(column_filter.get('filter') or '').lower()
+    return TEXT_FILTERS[column_filter['type']](values.astype(str).str.lower(),
+                                               text).to_numpy(dtype=bool)
+  numbers = pd.to_numeric(values, errors='coerce').to_numpy(dtype=np.float64)
+  return NUMBER_FILTERS[column_filter['type']](numbers,
+                                               column_filter.get('filter'),
+                                               column_filter.get('filterTo'))
@@ -6,6 +6,13 @@ class SimulationData:
     PREDICTED_IAT = 'Average_indoor_air_temperature_(degreeC)'
     MEASURED_IAT = 'Measured_average_indoor_air_temperature_(degreeC)'
     OAT = 'Outdoor_air_temperature_(degreeC)'
+    HEATING_OUTPUT = 'Heating_output_(kW)'
+    SOLAR_RADIATION = 'Solar_radiation_(W/m2)'
+    SOLAR_GAINS = 'Solar_gains_(kW)'
+    OCCUPANCY_GAINS = 'Occupancy_gains_(kW)'
+    APPLIANCES_GAINS = 'Appliances_gains_(kW)'
+    TOTAL_GAINS = 'Total_gains_(kW)'
+    INFILTRATION_GAINS = 'Infiltration_gains_(kW)'
     AREA_ID = 'Area_ID'
     AREA_NAME = 'Area_Name'
 
@@ -36,6 +43,29 @@ class HistoricalData:
     AREA_ID = 'Area_ID'
 
 
+class MeasuredData:
+    DATETIME = 'Datetime'
+    MEASURED_IAT = 'Measured_average_indoor_air_temperature_(degreeC)'
+    AREA_ID = 'Area_ID'
+
+
+class WeatherData:
+    DATETIME = 'Date'
+    GLOBAL_RADIATION = 'Global Radiation (W/m2)'
+    DIFFUSE_RADIATION = 'Diffuse Radiation (W/m2)'
+    CLOUD_COVER = 'Cloud Cover (0-1)'
+    OAT = 'Outdoor_air_temperature_(degreeC)'
+    HUMIDITY = 'Humidity (%)'
+    WIND_SPEED = 'Wind Speed (m/s)'
+    WIND_DIRECTION = 'Wind Direction (deg)'
+
+
+class ThermalModelParameters:
+    AREA_ID = 'Area_ID'
+    RESISTANCE = 'Resistance_(K/kW)'
+    CAPACITANCE = 'Capacitance_(kWh/K)'
+
+
 ## RESULTS SCHEMAS
 
 
@@ -50,6 +80,28 @@ class LongTermForecastOutputs:
     AREA_ID = 'Area_ID'
 
 
+class ComfortCriteriaOutputs:
+    AREA_ID = 'Area_ID'
+    YEAR = 'Year'
+    CRITERION_A_HOURS = 'TM59_Criterion_A_hours'
+    CRITERION_A_PERCT = 'TM59_Criterion_A_percentage'
+    CRITERION_A_PASS = 'TM59_Criterion_A_pass'
+    CRITERION_B_HOURS = 'TM59_Criterion_B_hours'
+    CRITERION_B_PASS = 'TM59_Criterion_B_pass'
+    MAX_DAILY_WEIGHTED_EXCEEDANCE = 'TM52_Max_daily_weighted_exceedance'
+    DAILY_WEIGHTED_EXCEEDANCE_DAYS = 'TM52_Daily_weighted_exceedance_days'
+    DAILY_WEIGHTED_EXCEEDANCE_PASS = 'TM52_Criterion_2_pass'
+
+
+class SimulationErrors:
+    AREA_ID = 'Area_ID'
+    RMSE = 'RMSE'
+    MAE = 'MAE'
+    MSE = 'MSE'
+    BIAS = 'Bias'
+    CV_RMSE = 'CV(RMSE)'
+
+
 class OverheatingTable:
     AREA_NAME = 'Area_Name'
     AREA_ID = 'Area_ID'
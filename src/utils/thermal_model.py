@@ -0,0 +1,137 @@
+"""This file holds the 1R1C thermal model used to simulate the indoor air temperature of many dwellings at once.
+
+The dwelling is a single thermal capacitance C [kWh/K] connected to the outdoor
+air through a single resistance R [K/kW], which covers both the fabric and the
+infiltration losses, and heated by the heating output and the solar, occupancy
+and appliances gains [kW]:
+
+    C dT/dt = (T_out - T) / R + Q
+
+Over a time step where T_out and Q are held at their values at the end of the
+step the equation has the exact solution
+
+    T[k] = T_eq[k] + (T[k-1] - T_eq[k]) * exp(-dt / (R C)),  T_eq = T_out + R Q
+
+which is applied to all dwellings at once, stored as arrays of shape
+(dwellings, hours)."""
+import os
+
+import numpy as np
+import pandas as pd
+from numpy import typing as npt
+
+from . import enums, schema
+
+
+def simulate_1r1c(outdoor_temperature: npt.NDArray[np.float64],
+                  heat_gains: npt.NDArray[np.float64],
+                  resistance: npt.ArrayLike,
+                  capacitance: npt.ArrayLike,
+                  initial_temperature: npt.ArrayLike,
+                  timestep_hours: float = 1.0,
+                  first_hour: npt.ArrayLike = 0) -> npt.NDArray[np.float64]:
+  """Simulate the indoor air temperature of N dwellings with the 1R1C model,
+  from the initial temperature at the first hour of each dwelling.
+
+  Arguments:
+      outdoor_temperature (npt.NDArray[np.float64]): The outdoor air temperature [degreeC], of shape (dwellings, hours).
+      heat_gains (npt.NDArray[np.float64]): The heating output and internal and solar gains [kW], of shape (dwellings, hours).
+      resistance (npt.ArrayLike): The resistance R of each dwelling [K/kW], of shape (dwellings,).
+      capacitance (npt.ArrayLike): The capacitance C of each dwelling [kWh/K], of shape (dwellings,).
+      initial_temperature (npt.ArrayLike): The indoor air temperature of each dwelling at the first hour [degreeC].
+      timestep_hours (float): The time step [h].
+      first_hour (npt.ArrayLike): The hour of each dwelling the simulation starts from, of shape (dwellings,).
+
+  Returns:
+      npt.NDArray[np.float64]: The indoor air temperature [degreeC], of shape (dwellings, hours), NaN before the first hour.
+  """
+  resistance = np.asarray(resistance, dtype=np.float64)
+  capacitance = np.asarray(capacitance, dtype=np.float64)
+  decay = np.exp(-timestep_hours / (resistance * capacitance))
+  # time-major so every step reads and writes one contiguous row
+  equilibrium_temperature = np.ascontiguousarray(
+      (outdoor_temperature + resistance[:, np.newaxis] * heat_gains).T)
+  indoor_temperature = np.empty_like(equilibrium_temperature)
+  first_hour = np.asarray(first_hour)
+  last_first_hour = first_hour.max(initial=0)
+  indoor_temperature[0] = np.where(first_hour == 0, initial_temperature,
+                                   np.nan)
+  for k in range(1, len(indoor_temperature)):
+    indoor_temperature[k] = equilibrium_temperature[k] + decay * (
+        indoor_temperature[k - 1] - equilibrium_temperature[k])
+    if k <= last_first_hour:
+      indoor_temperature[k] = np.where(first_hour == k, initial_temperature,
+                                       indoor_temperature[k])
+  return indoor_temperature.T
+
+
+def get_heat_gains(dataf: pd.DataFrame) -> pd.Series:
+  """Get the heat input of the 1R1C model from simulation data: the heating
+  output plus the solar, occupancy and appliances gains.
+
+  Arguments:
+      dataf (pd.DataFrame): The simulation data.
+
+  Returns:
+      pd.Series: The heat gains [kW].
+  """
+  return (dataf[schema.SimulationData.TOTAL_GAINS] +
+          dataf[schema.SimulationData.HEATING_OUTPUT])
+
+
+def get_default_parameters(area_ids: list[int]) -> pd.DataFrame:
+  """Get the default resistance and capacitance of dwellings, from
+  THERMAL_RESISTANCE and THERMAL_CAPACITANCE in .env.
+
+  Arguments:
+      area_ids (list[int]): The Area_IDs of the dwellings.
+
+  Returns:
+      pd.DataFrame: The resistance and capacitance, indexed by Area_ID.
+  """
+  nb_areas = len(area_ids)
+  return pd.DataFrame(
+      {
+          schema.ThermalModelParameters.RESISTANCE:
+          np.full(nb_areas, float(os.getenv('THERMAL_RESISTANCE', '5.1'))),
+          schema.ThermalModelParameters.CAPACITANCE:
+          np.full(nb_areas, float(os.getenv('THERMAL_CAPACITANCE', '11.9'))),
+      },
+      index=pd.Index(area_ids, name=schema.ThermalModelParameters.AREA_ID))
+
+
+def simulate_dataset(dataset: enums.Dataset,
+                     parameters: pd.DataFrame | None = None) -> pd.DataFrame:
+  """Simulate the indoor air temperature of every dwelling of a dataset of
+  the process-wide store, starting from the first modelled temperature.
+
+  Arguments:
+      dataset (enums.Dataset): The dataset holding the inputs of the dwellings.
+      parameters (pd.DataFrame | None): The resistance and capacitance, indexed by Area_ID, default from .env.
+
+  Returns:
+      pd.DataFrame: The simulated indoor air temperature, one column per Area_ID.
+  """
+  # imported here as the store builds its datasets with the loader, which
+  # imports this module through the ensemble
+  from . import data_store  # pylint: disable=import-outside-toplevel
+  area_ids, index, outdoor_temperature = data_store.get_area_matrix(
+      dataset, schema.SimulationData.OAT)
+  _, _, total_gains = data_store.get_area_matrix(
+      dataset, schema.SimulationData.TOTAL_GAINS)
+  _, _, heating_output = data_store.get_area_matrix(
+      dataset, schema.SimulationData.HEATING_OUTPUT)
+  _, _, modelled_temperature = data_store.get_area_matrix(
+      dataset, schema.SimulationData.PREDICTED_IAT)
+  if parameters is None:
+    parameters = get_default_parameters(area_ids)
+  parameters = parameters.loc[area_ids]
+  indoor_temperature = simulate_1r1c(
+      outdoor_temperature, total_gains + heating_output,
+      parameters[schema.ThermalModelParameters.RESISTANCE],
+      parameters[schema.ThermalModelParameters.CAPACITANCE],
+      modelled_temperature[:, 0])
+  return pd.DataFrame(indoor_temperature.T,
+                      index=index,
+                      columns=pd.Index(area_ids,
+                                       name=schema.SimulationData.AREA_ID))
@@ -0,0 +1,72 @@
+"""Calibration of the 1R1C thermal model against synthetic measurements."""
+import numpy as np
+import pytest
+
+from utils import calibration, thermal_model
+
+RESISTANCE = np.array([4.0, 7.5, 2.5])
+CAPACITANCE = np.array([26.0, 29.0, 15.0])
+NB_HOURS = 24 * 21
+
+
+def make_inputs() -> tuple[np.ndarray, np.ndarray]:
+  rng = np.random.default_rng(0)
+  hours = np.arange(NB_HOURS)
+  oat = (12 + 6 * np.sin(2 * np.pi * hours / 24) +
+         rng.normal(0, 1, (len(RESISTANCE), NB_HOURS)))
+  gains = np.clip(rng.normal(1.0, 0.8, (len(RESISTANCE), NB_HOURS)), 0, None)
+  return oat, gains
+
+
+def test_calibrate_1r1c_recovers_parameters():
+  oat, gains = make_inputs()
+  measured = thermal_model.simulate_1r1c(oat, gains, RESISTANCE, CAPACITANCE,
+                                         20.0)
+  resistance, capacitance = calibration.calibrate_1r1c(
+      oat, gains, measured, 5.1, 11.9,
+      calibration.CalibrationSettings(tolerance=1e-8))
+  np.testing.assert_allclose(resistance, RESISTANCE, rtol=1e-4)
+  np.testing.assert_allclose(capacitance, CAPACITANCE, rtol=1e-4)
+
+
+def test_calibrate_1r1c_recovers_parameters_measured_partway():
+  oat, gains = make_inputs()
+  first_hour = np.array([48, 0, 100])
+  measured = thermal_model.simulate_1r1c(oat, gains, RESISTANCE, CAPACITANCE,
+                                         [30.0, 20.0, 15.0], 1.0, first_hour)
+  measured[1, :48] = np.nan
+  first_hour[1] = 48
+  resistance, capacitance = calibration.calibrate_1r1c(
+      oat, gains, measured, 5.1, 11.9,
+      calibration.CalibrationSettings(tolerance=1e-8))
+  np.testing.assert_array_equal(calibration.get_first_measured_hour(measured),
+                                first_hour)
+  np.testing.assert_allclose(resistance, RESISTANCE, rtol=1e-4)
+  np.testing.assert_allclose(capacitance, CAPACITANCE, rtol=1e-4)
+
+
+def test_calibrate_1r1c_skips_unmeasured_dwelling():
+  oat, gains = make_inputs()
+  measured = thermal_model.simulate_1r1c(oat, gains, RESISTANCE, CAPACITANCE,
+                                         20.0)
+  measured[1] = np.nan
+  resistance, capacitance = calibration.calibrate_1r1c(oat, gains, measured,
+                                                       5.1, 11.9)
+  assert (resistance[1], capacitance[1]) == (5.1, 11.9)
+  assert np.isnan(calibration.get_initial_temperature(measured)[1])
+
+
+@pytest.mark.parametrize('max_iterations', [0, 1])
+def test_calibrate_1r1c_never_increases_loss(max_iterations):
+  oat, gains = make_inputs()
+  measured = thermal_model.simulate_1r1c(oat, gains, RESISTANCE, CAPACITANCE,
+                                         20.0)
+  settings = calibration.CalibrationSettings(max_iterations=max_iterations)
+  resistance, capacitance = calibration.calibrate_1r1c(oat, gains, measured,
+                                                       5.1, 11.9, settings)
+  simulated = thermal_model.simulate_1r1c(oat, gains, resistance, capacitance,
+                                          20.0)
+  default = thermal_model.simulate_1r1c(oat, gains, np.full(3, 5.1),
+                                        np.full(3, 11.9), 20.0)
+  assert np.all(((simulated - measured)**2).sum(
+      axis=-1) <= ((default - measured)**2).sum(axis=-1))
@@ -0,0 +1,98 @@
+"""CIBSE TM52 and TM59 overheating criteria."""
+import numpy as np
+import pytest
+
+from utils import comfort_criteria
+
+
+def naive_running_mean(daily_mean: np.ndarray, alpha: float,
+                       initial_running_mean: float) -> np.ndarray:
+  running_mean = [initial_running_mean]
+  for day in range(1, len(daily_mean)):
+    running_mean.append((1 - alpha) * daily_mean[day - 1] +
+                        alpha * running_mean[-1])
+  return np.array(running_mean)
+
+
+@pytest.mark.parametrize('block_days', [1, 7, 128, 1000])
+@pytest.mark.parametrize('initial_running_mean', [None, 15.0])
+def test_blocked_running_mean_equals_recursion(block_days,
+                                               initial_running_mean):
+  daily_mean = np.random.default_rng(0).normal(15, 4, (3, 153))
+  running_mean = comfort_criteria.get_running_mean(
+      daily_mean,
+      initial_running_mean=initial_running_mean,
+      block_days=block_days)
+  for i in range(3):
+    initial = (daily_mean[i, 0]
+               if initial_running_mean is None else initial_running_mean)
+    np.testing.assert_allclose(running_mean[i],
+                               naive_running_mean(daily_mean[i], 0.8, initial),
+                               rtol=1e-12)
+
+
+def test_daily_mean_skips_missing_hours_and_fills_missing_days():
+  hourly = np.repeat([[np.nan, 10.0, np.nan, 14.0]], 24, axis=1)
+  hourly[0, 24] = np.nan
+  hourly[0, 25] = 40.0
+  daily_mean = comfort_criteria.get_daily_mean(hourly)
+  np.testing.assert_allclose(daily_mean,
+                             [[(10.0 * 22 + 40.0) / 23] * 3 + [14.0]])
+
+
+def test_exceedance_rounds_halves_up():
+  operative_temperature = np.full((1, 24), 30.0)
+  operative_temperature[0, :4] = [30.5, 29.5, 30.49, 28.6]
+  exceedance = comfort_criteria.get_exceedance(operative_temperature,
+                                               np.array([[30.0]]))
+  np.testing.assert_array_equal(exceedance[0, :5], [1.0, 0.0, 0.0, -1.0, 0.0])
+
+
+def test_criterion_a_counts_occupied_hours_of_exceedance():
+  exceedance = np.zeros((2, 48))
+  # dwelling 0: 2 hours of exceedance out of 48, 4.2 %
+  exceedance[0, [5, 40]] = [1.0, 3.0]
+  # dwelling 1: 1 hour of exceedance out of 46 measured hours, 2.2 %
+  exceedance[1, [5, 6]] = [2.0, 0.0]
+  exceedance[1, [7, 8]] = np.nan
+  nb_hours, percentage, is_met = comfort_criteria.assess_criterion_a(
+      exceedance)
+  np.testing.assert_array_equal(nb_hours, [2, 1])
+  np.testing.assert_allclose(percentage, [2 / 48 * 100, 1 / 46 * 100])
+  np.testing.assert_array_equal(is_met, [False, True])
+  occupied_hours = np.arange(24) >= 8
+  nb_hours, percentage, _ = comfort_criteria.assess_criterion_a(
+      exceedance, occupied_hours)
+  np.testing.assert_array_equal(nb_hours, [1, 0])
+  np.testing.assert_allclose(percentage, [1 / 32 * 100, 0.0])
+
+
+@pytest.mark.parametrize('nb_hot_nights, is_met', [(32, True), (33, False)])
+def test_criterion_b_counts_night_hours_above_26(nb_hot_nights, is_met):
+  nb_days = 153
+  bedroom = np.full((1, nb_days * 24), 26.0)
+  night_hours = np.flatnonzero(
+      np.tile(comfort_criteria.get_night_hours(), nb_days))
+  bedroom[0, night_hours[:nb_hot_nights]] = 26.5
+  # hot afternoons do not count
+  bedroom[0, np.arange(nb_days) * 24 + 15] = 35.0
+  nb_hours, met = comfort_criteria.assess_criterion_b(bedroom)
+  assert nb_hours[0] == nb_hot_nights
+  assert met[0] == is_met
+
+
+def test_daily_weighted_exceedance_sums_positive_exceedances():
+  exceedance = np.zeros((1, 48))
+  exceedance[0, :4] = [2.0, 3.0, -4.0, 2.0]
+  exceedance[0, 30] = 1.0
+  daily_weighted_exceedance = comfort_criteria.get_daily_weighted_exceedance(
+      exceedance)
+  np.testing.assert_array_equal(daily_weighted_exceedance, [[7.0, 1.0]])
+  maximum, nb_days, is_met = comfort_criteria.assess_daily_weighted_exceedance(
+      daily_weighted_exceedance)
+  assert (maximum[0], nb_days[0], is_met[0]) == (7.0, 1, False)
+
+
+def test_partial_days_are_rejected():
+  with pytest.raises(ValueError):
+    comfort_criteria.get_daily_mean(np.zeros((1, 30)))
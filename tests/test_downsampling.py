@@ -0,0 +1,60 @@
+"""Min/max downsampling of the plotted time series."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import downsampling
+
+
+@pytest.mark.parametrize('nb_points, nb_buckets', [(1000, 10), (1001, 7),
+                                                   (50, 100)])
+def test_minmax_indices_keeps_extrema_of_every_bucket(nb_points, nb_buckets):
+  rng = np.random.default_rng(0)
+  values = rng.normal(size=(2, nb_points))
+  positions = downsampling.minmax_indices(values, nb_buckets)
+  bucket_size = int(np.ceil(nb_points / nb_buckets))
+  assert np.all(np.diff(positions) > 0)
+  assert positions[0] == 0 and positions[-1] == nb_points - 1
+  for start in range(0, nb_points, bucket_size):
+    bucket = values[:, start:start + bucket_size]
+    kept = values[:, positions[(positions >= start)
+                               & (positions < start + bucket_size)]]
+    np.testing.assert_array_equal(kept.max(axis=1), bucket.max(axis=1))
+    np.testing.assert_array_equal(kept.min(axis=1), bucket.min(axis=1))
+
+
+def test_minmax_indices_ignores_nan():
+  values = np.array([[np.nan, 1.0, 5.0, np.nan, -2.0, 0.0, np.nan, np.nan]])
+  positions = downsampling.minmax_indices(values, 2)
+  assert {2, 4} <= set(positions)
+
+
+def test_downsample_frame_keeps_peaks_and_small_frames():
+  index = pd.date_range('2024-06-01', periods=5000, freq='h', tz='UTC')
+  dataf = pd.DataFrame({'iat': np.sin(np.arange(5000) / 50)}, index=index)
+  dataf.iloc[1234, 0] = 40.0
+  downsampled = downsampling.downsample_frame(dataf, max_points=200)
+  assert len(downsampled.index) <= 200
+  assert downsampled['iat'].max() == 40.0
+  assert downsampled['iat'].min() == dataf['iat'].min()
+  assert len(downsampling.downsample_frame(dataf.iloc[:200], 200)) == 200
+
+
+def test_filter_x_range_keeps_one_point_either_side():
+  index = pd.date_range('2024-06-01', periods=48, freq='h', tz='UTC')
+  dataf = pd.DataFrame({'iat': np.arange(48.0)}, index=index)
+  zoomed = downsampling.filter_x_range(
+      dataf, ['2024-06-01 10:30:00', '2024-06-01 20:30:00'])
+  assert zoomed.index[0] == index[10] and zoomed.index[-1] == index[21]
+  assert downsampling.filter_x_range(dataf.iloc[:0],
+                                     ['2024-06-01', '2024-06-02']).empty
+  assert downsampling.filter_x_range(dataf, None) is dataf
+
+
+@pytest.mark.parametrize('nb_series, max_points', [(1, 1000), (1, 999),
+                                                   (2, 1000), (3, 50)])
+def test_downsample_frame_returns_at_most_max_points(nb_series, max_points):
+  rng = np.random.default_rng(1)
+  index = pd.date_range('2024-06-01', periods=10000, freq='h', tz='UTC')
+  dataf = pd.DataFrame(rng.normal(size=(10000, nb_series)), index=index)
+  assert len(downsampling.downsample_frame(dataf, max_points)) <= max_points
@@ -0,0 +1,53 @@
+"""Equivalence of the NumPy kernels with the Series.apply implementations they
+replaced."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import kernels
+
+VALUES = pd.Series([np.nan, -1.0, 0.0, 25.9, 26.0, 26.0001, 31.5, np.inf])
+
+
+def legacy_risk_overheating_text(x: float) -> str:
+  if x == 0:
+    return 'None'
+  else:
+    return f'1 out of {1/x:.0f} summers'
+
+
+@pytest.mark.parametrize('threshold', [0.0, 26.0, 30.0])
+def test_flag_above_threshold_matches_apply(threshold):
+  expected = VALUES.apply(lambda x: 1 if x > threshold else 0)
+  flags = kernels.flag_above_threshold(VALUES, threshold)
+  np.testing.assert_array_equal(flags, expected.to_numpy())
+  assert flags.dtype == np.int64
+
+
+@pytest.mark.parametrize('threshold', [0.0, 26.0, 30.0])
+def test_flag_above_threshold_inclusive_matches_mask(threshold):
+  expected = pd.Series(0, index=VALUES.index)
+  expected.loc[VALUES >= threshold] = 1
+  np.testing.assert_array_equal(
+      kernels.flag_above_threshold(VALUES, threshold, inclusive=True),
+      expected.to_numpy())
+
+
+def test_flag_above_threshold_keeps_shape():
+  values = np.arange(12.0).reshape(3, 4)
+  assert kernels.flag_above_threshold(values, 5).shape == (3, 4)
+
+
+def test_format_risk_of_overheating_matches_apply():
+  risks = pd.Series([0.0, 25.0, 100.0, 12.5, 25.0, 3.0, 0.0, 60.0])
+  expected = risks.apply(lambda x: legacy_risk_overheating_text(x / 100))
+  np.testing.assert_array_equal(kernels.format_risk_of_overheating(risks),
+                                expected.to_numpy())
+
+
+def test_format_risk_of_overheating_nan():
+  # the legacy formatting gives 1 out of nan summers for NaN risks
+  labels = kernels.format_risk_of_overheating([np.nan, 50.0])
+  assert list(labels) == [
+      legacy_risk_overheating_text(np.nan), '1 out of 2 summers'
+  ]
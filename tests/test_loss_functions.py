@@ -0,0 +1,93 @@
+"""Error metrics between the simulated and measured indoor air temperatures."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import loss_functions
+
+
+@pytest.fixture
+def values() -> tuple[np.ndarray, np.ndarray]:
+  rng = np.random.default_rng(0)
+  actual = rng.normal(22, 3, (4, 240))
+  predicted = actual + rng.normal(0.5, 1, (4, 240))
+  actual[rng.random(actual.shape) < 0.1] = np.nan
+  predicted[rng.random(predicted.shape) < 0.05] = np.nan
+  actual[3] = np.nan
+  return predicted, actual
+
+
+def get_metrics(
+    accumulator: loss_functions.ErrorAccumulator) -> dict[str, np.ndarray]:
+  return {
+      name: getattr(accumulator, name)
+      for name in ('mae', 'mse', 'rmse', 'bias', 'cv_rmse')
+  }
+
+
+@pytest.mark.parametrize('split', [[120], [1, 100, 239], [60, 120, 180]])
+def test_merged_chunks_equal_single_pass(values, split):
+  predicted, actual = values
+  single_pass = loss_functions.ErrorAccumulator().update(predicted, actual)
+  merged = loss_functions.ErrorAccumulator()
+  for predicted_chunk, actual_chunk in zip(np.split(predicted, split, axis=1),
+                                           np.split(actual, split, axis=1)):
+    merged = merged.merge(loss_functions.ErrorAccumulator().update(
+        predicted_chunk, actual_chunk))
+  np.testing.assert_array_equal(merged.count, single_pass.count)
+  for name, metric in get_metrics(merged).items():
+    np.testing.assert_allclose(metric,
+                               get_metrics(single_pass)[name],
+                               rtol=1e-12,
+                               err_msg=name)
+
+
+def test_updates_equal_single_pass(values):
+  predicted, actual = values
+  single_pass = loss_functions.ErrorAccumulator().update(predicted, actual)
+  updated = loss_functions.ErrorAccumulator()
+  for start in range(0, 240, 50):
+    updated.update(predicted[:, start:start + 50], actual[:, start:start + 50])
+  for name, metric in get_metrics(updated).items():
+    np.testing.assert_allclose(metric,
+                               get_metrics(single_pass)[name],
+                               rtol=1e-12,
+                               err_msg=name)
+
+
+def test_nan_hours_are_skipped(values):
+  predicted, actual = values
+  metrics = loss_functions.calculate_error_metrics(predicted, actual)
+  for i in range(3):
+    is_valid = np.isfinite(predicted[i]) & np.isfinite(actual[i])
+    predicted_i = pd.Series(predicted[i, is_valid])
+    actual_i = pd.Series(actual[i, is_valid])
+    assert metrics['MAE'][i] == pytest.approx(
+        loss_functions.calculate_mae(predicted_i, actual_i))
+    assert metrics['RMSE'][i] == pytest.approx(
+        loss_functions.calculate_rmse(predicted_i, actual_i))
+    assert metrics['MSE'][i] == pytest.approx(
+        loss_functions.calculate_mse(predicted_i, actual_i))
+    assert metrics['Bias'][i] == pytest.approx((predicted_i - actual_i).mean())
+    assert metrics['CV(RMSE)'][i] == pytest.approx(metrics['RMSE'][i] /
+                                                   actual_i.mean() * 100)
+
+
+def test_never_measured_gives_nan_without_warning(values):
+  predicted, actual = values
+  with np.errstate(all='raise'):
+    metrics = loss_functions.calculate_error_metrics(predicted, actual)
+  for metric in metrics.values():
+    assert np.isnan(metric[3])
+    assert np.isfinite(metric[:3]).all()
+
+
+def test_one_dimensional_chunks_accumulate_a_single_error():
+  accumulator = loss_functions.ErrorAccumulator().update([1.0, 2.0, np.nan],
+                                                         [0.0, 4.0, 1.0])
+  accumulator.update(np.array([3.0]), np.array([np.nan]))
+  assert accumulator.count == 2
+  assert accumulator.mae == 1.5
+  assert accumulator.mse == 2.5
+  assert accumulator.bias == -0.5
+  assert accumulator.cv_rmse == pytest.approx(np.sqrt(2.5) / 2 * 100)
@@ -0,0 +1,119 @@
+"""Filtering, sorting and slicing of the rows of the AgGrid tables."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import common_functions, row_model
+
+
+@pytest.fixture(autouse=True)
+def area_type(monkeypatch):
+  monkeypatch.setenv('AREA_TYPE', 'Dwelling')
+
+
+@pytest.fixture
+def table() -> pd.DataFrame:
+  return row_model.to_display_frame(
+      pd.DataFrame(
+          {
+              'Risk': [3.0, np.nan, 1.0, 2.0, 1.0],
+              'Flag': [1, 0, 1, 0, 1],
+          },
+          index=pd.Index([2, 10, 1, 11, 100], name='Area_ID')))
+
+
+def get_rows(table: pd.DataFrame, **request) -> list[dict]:
+  return row_model.get_frame_rows(table, {
+      'startRow': 0,
+      'endRow': 100,
+      **request
+  })['rowData']
+
+
+def get_area_ids(rows: list[dict]) -> list[int]:
+  return [
+      common_functions.get_area_id(row[row_model.INDEX_COLUMN]) for row in rows
+  ]
+
+
+@pytest.mark.parametrize('direction, expected', [
+    ('asc', [1, 2, 10, 11, 100]),
+    ('desc', [100, 11, 10, 2, 1]),
+])
+def test_sort_by_index_sorts_area_ids_as_numbers(table, direction, expected):
+  rows = get_rows(table,
+                  sortModel=[{
+                      'colId': row_model.INDEX_COLUMN,
+                      'sort': direction
+                  }])
+  assert get_area_ids(rows) == expected
+
+
+def test_sort_keeps_blanks_last_and_ties_stable(table):
+  rows = get_rows(table, sortModel=[{'colId': 'Risk', 'sort': 'desc'}])
+  assert get_area_ids(rows) == [2, 11, 1, 100, 10]
+  assert rows[-1]['Risk'] == 'NaN'
+
+
+def test_sort_by_several_columns(table):
+  rows = get_rows(table,
+                  sortModel=[{
+                      'colId': 'Flag',
+                      'sort': 'asc'
+                  }, {
+                      'colId': 'Risk',
+                      'sort': 'asc'
+                  }])
+  assert get_area_ids(rows) == [11, 10, 1, 100, 2]
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('1', [10, 1, 11, 100]),
+    ('DWELLING', [2, 10, 1, 11, 100]),
+])
+def test_text_filter_on_index_matches_area_strings(table, text, expected):
+  rows = get_rows(table,
+                  filterModel={
+                      row_model.INDEX_COLUMN: {
+                          'filterType': 'text',
+                          'type': 'contains',
+                          'filter': text
+                      }
+                  })
+  assert get_area_ids(rows) == expected
+
+
+def test_number_filters_combine(table):
+  response = row_model.get_frame_rows(
+      table, {
+          'startRow': 0,
+          'endRow': 1,
+          'filterModel': {
+              'Risk': {
+                  'filterType':
+                  'number',
+                  'operator':
+                  'OR',
+                  'conditions': [{
+                      'type': 'lessThan',
+                      'filter': 2
+                  }, {
+                      'type': 'blank'
+                  }]
+              },
+              'Flag': {
+                  'filterType': 'number',
+                  'type': 'equals',
+                  'filter': 1
+              }
+          }
+      })
+  assert response['rowCount'] == 2
+  assert get_area_ids(response['rowData']) == [1]
+
+
+def test_get_frame_rows_slices_the_block(table):
+  response = row_model.get_frame_rows(table, {'startRow': 1, 'endRow': 3})
+  assert response['rowCount'] == 5
+  assert get_area_ids(response['rowData']) == [10, 1]
+  assert table[row_model.INDEX_COLUMN].tolist() == [2, 10, 1, 11, 100]
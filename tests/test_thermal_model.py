@@ -0,0 +1,164 @@
+"""Batched 1R1C simulation of the indoor air temperature."""
+import numpy as np
+import pandas as pd
+
+from utils import data_store, enums, loader, schema, thermal_model
+
+RESISTANCE = np.array([4.0, 7.5, 2.5])
+CAPACITANCE = np.array([26.0, 29.0, 15.0])
+
+
+def simulate_one(oat: np.ndarray, gains: np.ndarray, resistance: float,
+                 capacitance: float, initial_temperature: float) -> np.ndarray:
+  temperature = [initial_temperature]
+  for k in range(1, len(oat)):
+    # exact solution of C dT/dt = (T_out - T) / R + Q over one hour
+    equilibrium = oat[k] + resistance * gains[k]
+    temperature.append(equilibrium + (temperature[-1] - equilibrium) *
+                       np.exp(-1 / (resistance * capacitance)))
+  return np.array(temperature)
+
+
+def test_simulate_1r1c_matches_single_dwelling_loop():
+  rng = np.random.default_rng(0)
+  oat = rng.normal(12, 5, (3, 200))
+  gains = rng.uniform(0, 2, (3, 200))
+  simulated = thermal_model.simulate_1r1c(oat, gains, RESISTANCE, CAPACITANCE,
+                                          [18.0, 20.0, 22.0])
+  for i in range(3):
+    np.testing.assert_allclose(
+        simulated[i],
+        simulate_one(oat[i], gains[i], RESISTANCE[i], CAPACITANCE[i],
+                     [18.0, 20.0, 22.0][i]))
+
+
+def test_simulate_1r1c_decays_to_equilibrium_with_time_constant():
+  hours = np.arange(500)
+  oat = np.full((3, len(hours)), 10.0)
+  gains = np.full((3, len(hours)), 1.0)
+  simulated = thermal_model.simulate_1r1c(oat, gains, RESISTANCE, CAPACITANCE,
+                                          20.0)
+  equilibrium = 10.0 + RESISTANCE[:, np.newaxis]
+  time_constant = (RESISTANCE * CAPACITANCE)[:, np.newaxis]
+  np.testing.assert_allclose(
+      simulated,
+      equilibrium + (20.0 - equilibrium) * np.exp(-hours / time_constant))
+
+
+def test_simulate_1r1c_starts_at_first_hour():
+  rng = np.random.default_rng(1)
+  oat = rng.normal(12, 5, (3, 100))
+  gains = rng.uniform(0, 2, (3, 100))
+  first_hour = np.array([0, 10, 99])
+  simulated = thermal_model.simulate_1r1c(oat,
+                                          gains,
+                                          RESISTANCE,
+                                          CAPACITANCE, [18.0, 20.0, 22.0],
+                                          first_hour=first_hour)
+  for i, start in enumerate(first_hour):
+    assert np.isnan(simulated[i, :start]).all()
+    np.testing.assert_allclose(
+        simulated[i, start:],
+        simulate_one(oat[i, start:], gains[i, start:], RESISTANCE[i],
+                     CAPACITANCE[i], [18.0, 20.0, 22.0][i]))
+
+
+def test_get_default_parameters_from_env(monkeypatch):
+  monkeypatch.setenv('THERMAL_RESISTANCE', '3.5')
+  monkeypatch.delenv('THERMAL_CAPACITANCE', raising=False)
+  parameters = thermal_model.get_default_parameters([4, 7])
+  assert parameters.index.tolist() == [4, 7]
+  assert parameters[schema.ThermalModelParameters.RESISTANCE].tolist() == [
+      3.5, 3.5
+  ]
+  assert parameters[schema.ThermalModelParameters.CAPACITANCE].tolist() == [
+      11.9, 11.9
+  ]
+
+
+def test_simulate_dataset_simulates_every_area_of_the_store():
+  rng = np.random.default_rng(2)
+  index = pd.date_range('2021-05-01', periods=48, freq='h', tz='UTC')
+  oat = rng.normal(12, 5, (3, len(index)))
+  gains = rng.uniform(0, 2, (3, len(index)))
+  frame = pd.concat(
+      pd.DataFrame(
+          {
+              schema.SimulationData.OAT: oat[i],
+              schema.SimulationData.TOTAL_GAINS: gains[i] / 2,
+              schema.SimulationData.HEATING_OUTPUT: gains[i] / 2,
+              schema.SimulationData.PREDICTED_IAT: 18.0 + i,
+              schema.SimulationData.AREA_ID: area_id,
+          },
+          index=index) for i, area_id in enumerate([5, 1, 3]))
+  store = data_store.DataStore({
+      enums.Dataset.SIMULATION:
+      data_store.DatasetSpec(build=lambda: frame,
+                             area_column=schema.SimulationData.AREA_ID)
+  })
+  previous_store = data_store.get_store()
+  data_store.set_store(store)
+  try:
+    simulated = thermal_model.simulate_dataset(
+        enums.Dataset.SIMULATION,
+        pd.DataFrame(
+            {
+                schema.ThermalModelParameters.RESISTANCE: RESISTANCE,
+                schema.ThermalModelParameters.CAPACITANCE: CAPACITANCE,
+            },
+            index=pd.Index([5, 1, 3])))
+  finally:
+    data_store.set_store(previous_store)
+  assert simulated.columns.tolist() == [1, 3, 5]
+  assert simulated.index.equals(index)
+  for i, area_id in enumerate([5, 1, 3]):
+    np.testing.assert_allclose(
+        simulated[area_id],
+        simulate_one(oat[i], gains[i], RESISTANCE[i], CAPACITANCE[i],
+                     18.0 + i))
+
+
+def test_simulate_indoor_air_temperature_is_driven_by_the_weather_data():
+  rng = np.random.default_rng(3)
+  index = pd.date_range('2021-05-01', periods=48, freq='h', tz='UTC')
+  weather = pd.DataFrame({schema.WeatherData.OAT: rng.normal(12, 5, 48)},
+                         index=index)
+  gains = rng.uniform(0, 2, (2, 48))
+  # the dwelling 7 starts a day later
+  dataf = pd.concat([
+      pd.DataFrame(
+          {
+              schema.SimulationData.TOTAL_GAINS: gains[0],
+              schema.SimulationData.HEATING_OUTPUT: 0.0,
+              schema.SimulationData.PREDICTED_IAT: 18.0,
+              schema.SimulationData.AREA_ID: 7,
+          },
+          index=index)[24:],
+      pd.DataFrame(
+          {
+              schema.SimulationData.TOTAL_GAINS: 0.0,
+              schema.SimulationData.HEATING_OUTPUT: gains[1],
+              schema.SimulationData.PREDICTED_IAT: 21.0,
+              schema.SimulationData.AREA_ID: 2,
+          },
+          index=index),
+  ])
+  parameters = pd.DataFrame(
+      {
+          schema.ThermalModelParameters.RESISTANCE: RESISTANCE[:2],
+          schema.ThermalModelParameters.CAPACITANCE: CAPACITANCE[:2],
+      },
+      index=pd.Index([7, 2]))
+  simulated = loader.simulate_indoor_air_temperature(dataf, weather,
+                                                     parameters)
+  assert simulated.index.equals(dataf.index)
+  assert simulated[schema.SimulationData.AREA_ID].tolist() == dataf[
+      schema.SimulationData.AREA_ID].tolist()
+  oat = weather[schema.WeatherData.OAT].to_numpy()
+  np.testing.assert_allclose(
+      simulated[schema.SimulationData.PREDICTED_IAT][:24],
+      simulate_one(oat[24:], gains[0, 24:], RESISTANCE[0], CAPACITANCE[0],
+                   18.0))
+  np.testing.assert_allclose(
+      simulated[schema.SimulationData.PREDICTED_IAT][24:],
+      simulate_one(oat, gains[1], RESISTANCE[1], CAPACITANCE[1], 21.0))